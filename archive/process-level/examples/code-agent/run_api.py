@@ -11,7 +11,10 @@ def main():
         "src.api.server:app",
         host=settings.api_host,
         port=settings.api_port,
-        reload=True,
+        reload=settings.debug,
+        workers=1 if settings.debug else settings.api_workers,
+        loop="auto",  # uvloop when installed
+        http="auto",  # httptools when installed
     )
 
 
@@ -1,10 +1,15 @@
 """LangGraph workflow definition."""
 
 import uuid
+from typing import Any, Callable, Optional
+from uuid import UUID
+from langchain_core.callbacks import AsyncCallbackHandler
 from langgraph.graph import StateGraph, END
 
 from src.agent.state import AgentState
+from src.tools.git import parse_repo_name
 from src.agent.nodes import (
+    _ts,
     setup_node,
     execute_node,
     create_pr_node,
@@ -13,6 +18,47 @@ from src.agent.nodes import (
 )
 
 
+class ShellOutputLogger(AsyncCallbackHandler):
+    """
+    Reports shell tool output as log lines while the command is still running.
+    
+    Consumes the "shell_output" events run_shell_command dispatches. Output
+    arrives in arbitrary chunks, so each tool run's unfinished last line is
+    held until its newline arrives or the run ends. stdout lines are marked
+    with "|" and stderr lines with "!".
+    """
+    
+    def __init__(self, on_logs: Callable[[list[str]], None]):
+        self.on_logs = on_logs
+        # (tool run ID, stream) -> output after the last newline
+        self._partial: dict[tuple[UUID, str], str] = {}
+    
+    async def on_custom_event(self, name: str, data: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        if name != "shell_output":
+            return
+        key = (run_id, data["stream"])
+        *lines, self._partial[key] = (self._partial.pop(key, "") + data["text"]).split("\n")
+        self._report(data["stream"], lines)
+    
+    async def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._flush(run_id)
+    
+    async def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._flush(run_id)
+    
+    def _flush(self, run_id: UUID) -> None:
+        """Report the unfinished last lines of a tool run that has ended."""
+        for stream in ("stdout", "stderr"):
+            rest = self._partial.pop((run_id, stream), "")
+            if rest:
+                self._report(stream, [rest])
+    
+    def _report(self, stream: str, lines: list[str]) -> None:
+        if lines:
+            prefix = f"[{_ts()}] {'!' if stream == 'stderr' else '|'} "
+            self.on_logs([prefix + line for line in lines])
+
+
 def create_agent_graph():
     """
     Create the LangGraph workflow for the coding agent.
@@ -82,6 +128,7 @@ async def run_agent(
     model: str | None = None,
     max_iterations: int | None = None,
     sandbox_provider: str | None = None,
+    on_logs: Optional[Callable[[list[str]], None]] = None,
 ) -> dict:
     """
     Run the coding agent.
@@ -96,6 +143,8 @@ async def run_agent(
         model: Specific model to use (None = use provider default)
         max_iterations: Max LLM iterations (None = use config default)
         sandbox_provider: Sandbox provider ("opensandbox" or "e2b", None = use config default)
+        on_logs: Called with new log lines after each step, and with shell
+            command output while the command runs
         
     Returns:
         Final state dict with results
@@ -107,6 +156,7 @@ async def run_agent(
         "messages": [],
         "task": task,
         "repo_url": repo_url,
+        "repo_name": parse_repo_name(repo_url),
         "branch_name": branch_name or f"agent/{uuid.uuid4().hex[:8]}",
         "base_branch": base_branch,  # None means auto-detect
         "github_token": github_token,
@@ -123,7 +173,18 @@ async def run_agent(
         "logs": [],
     }
     
-    # Run the graph
-    final_state = await graph.ainvoke(initial_state)
+    if on_logs is None:
+        return await graph.ainvoke(initial_state)
+    
+    # Run the graph step by step, reporting log lines as each node adds them
+    final_state = initial_state
+    reported = 0
+    config = {"callbacks": [ShellOutputLogger(on_logs)]}
+    async for state in graph.astream(initial_state, config, stream_mode="values"):
+        final_state = state
+        logs = state.get("logs", [])
+        if len(logs) > reported:
+            on_logs(logs[reported:])
+            reported = len(logs)
     
     return final_state
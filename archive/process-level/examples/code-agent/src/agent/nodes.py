@@ -1,15 +1,16 @@
 """Node implementations for the LangGraph workflow."""
 
+import asyncio
 import logging
+import time
 import uuid
-from datetime import datetime
-from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage
 
 from src.agent.state import AgentState
-from src.sandbox import get_sandbox
+from src.sandbox import get_sandbox_pool, repo_key
 from src.sandbox.base import BaseSandbox
 from src.tools.git import GitTools, create_git_tools
-from src.tools.code import create_code_tools
+from src.tools.code import create_code_tools, truncate_output
 from src.llm import get_llm
 from src.config import get_settings
 
@@ -18,71 +19,137 @@ logger = logging.getLogger(__name__)
 # Store sandbox instances by sandbox_id for cleanup
 _sandboxes: dict[str, BaseSandbox] = {}
 
+# Timers that force-destroy sandboxes whose task never reached cleanup
+_expiry_timers: dict[str, asyncio.TimerHandle] = {}
+
+# Cleanup tasks running after the graph has returned (kept referenced until done)
+_cleanup_tasks: set[asyncio.Task] = set()
+
+# Seconds to wait for a sandbox to be reset and returned to its pool
+RELEASE_TIMEOUT = 60
+
+
+# Last formatted log timestamp: (epoch second, "HH:MM:SS")
+_last_ts: tuple[int, str] = (0, "")
+
+
+def _ts() -> str:
+    """Get the current time as HH:MM:SS, formatting at most once per second."""
+    global _last_ts
+    now = int(time.time())
+    if now != _last_ts[0]:
+        _last_ts = (now, time.strftime("%H:%M:%S", time.localtime(now)))
+    return _last_ts[1]
+
 
 def add_log(state: AgentState, message: str) -> list[str]:
     """Add a timestamped log message."""
-    timestamp = datetime.now().strftime("%H:%M:%S")
-    return state["logs"] + [f"[{timestamp}] {message}"]
+    return state["logs"] + [f"[{_ts()}] {message}"]
+
+
+def _spawn_cleanup(coro) -> None:
+    """Run a cleanup coroutine in the background."""
+    task = asyncio.create_task(coro)
+    _cleanup_tasks.add(task)
+    task.add_done_callback(_cleanup_tasks.discard)
+
+
+def _track_sandbox(sandbox: BaseSandbox, ttl: int) -> None:
+    """Register a sandbox for cleanup, force-destroying it after `ttl` seconds."""
+    sandbox_id = sandbox.sandbox_id
+    _sandboxes[sandbox_id] = sandbox
+    _expiry_timers[sandbox_id] = asyncio.get_running_loop().call_later(
+        ttl, _expire_sandbox, sandbox_id
+    )
+
+
+def _expire_sandbox(sandbox_id: str) -> None:
+    """Destroy a sandbox that outlived its timeout without being cleaned up."""
+    _expiry_timers.pop(sandbox_id, None)
+    sandbox = _sandboxes.pop(sandbox_id, None)
+    if sandbox:
+        logger.warning(f"Sandbox {sandbox_id} leaked past its timeout, destroying")
+        _spawn_cleanup(sandbox.destroy())
+
+
+async def _release_sandbox(sandbox: BaseSandbox, provider: str, **release_kwargs) -> None:
+    """Return a sandbox to its pool, destroying it if that fails or takes too long."""
+    try:
+        await asyncio.wait_for(
+            get_sandbox_pool(provider).release(sandbox, **release_kwargs),
+            timeout=RELEASE_TIMEOUT,
+        )
+    except Exception as e:
+        logger.warning(f"Releasing sandbox {sandbox.sandbox_id} failed, destroying: {e}")
+        await sandbox.destroy()
+
+
+def message_text(message) -> str:
+    """Get the text of a message, skipping non-text content blocks (e.g. tool use)."""
+    content = message.content
+    if isinstance(content, str):
+        return content
+    return "".join(
+        block if isinstance(block, str) else block.get("text", "")
+        for block in content
+        if isinstance(block, str) or block.get("type") == "text"
+    )
 
 
 async def setup_node(state: AgentState) -> dict:
     """
     Setup node: Create sandbox and clone repository.
     """
-    import time
-    
     setup_start = time.time()
     logs = add_log(state, "Starting setup...")
+    sandbox_id = None
     
     try:
-        # Create sandbox using configured provider
+        # Take a sandbox from the pool (warm, or holding a previous checkout of this repo)
         settings = get_settings()
         provider = state.get("sandbox_provider") or settings.sandbox_provider
-        logs = logs + [f"[{datetime.now().strftime('%H:%M:%S')}] Creating {provider} sandbox..."]
-        
-        sandbox_kwargs = {}
-        if provider == "opensandbox":
-            sandbox_kwargs["base_url"] = settings.opensandbox_url
+        logs = logs + [f"[{_ts()}] Creating {provider} sandbox..."]
         
         sandbox_start = time.time()
-        sandbox = get_sandbox(provider, **sandbox_kwargs)
-        sandbox_id = await sandbox.create(timeout=settings.sandbox_timeout)
-        _sandboxes[sandbox_id] = sandbox
+        pool = get_sandbox_pool(provider)
+        sandbox, reused = await pool.acquire(repo_key(state["repo_url"], state["github_token"]))
+        sandbox_id = sandbox.sandbox_id
+        _track_sandbox(sandbox, settings.sandbox_timeout)
         sandbox_time = time.time() - sandbox_start
         
-        logs = logs + [f"[{datetime.now().strftime('%H:%M:%S')}] Sandbox created: {sandbox_id} ({sandbox_time:.1f}s)"]
+        logs = logs + [f"[{_ts()}] Sandbox created: {sandbox_id} ({sandbox_time:.1f}s)"]
         
-        # Setup git authentication
-        auth_start = time.time()
         git = GitTools(sandbox, state["github_token"], state["workdir"])
-        await git.setup_git_auth()
-        auth_time = time.time() - auth_start
-        logs = logs + [f"[{datetime.now().strftime('%H:%M:%S')}] GitHub authentication configured ({auth_time:.1f}s)"]
-        
-        # Clone repository
-        clone_start = time.time()
-        logs = logs + [f"[{datetime.now().strftime('%H:%M:%S')}] Cloning {state['repo_url']}..."]
-        await git.clone_repo(state["repo_url"])
-        clone_time = time.time() - clone_start
-        logs = logs + [f"[{datetime.now().strftime('%H:%M:%S')}] Repository cloned ({clone_time:.1f}s)"]
+        if reused:
+            logs = logs + [f"[{_ts()}] Reusing existing checkout of {state['repo_url']}"]
+        else:
+            # Configure git authentication and clone in one sandbox command
+            clone_start = time.time()
+            logs = logs + [f"[{_ts()}] Configuring GitHub authentication and cloning {state['repo_url']}..."]
+            await git.clone_repo(state["repo_url"], setup_auth=True)
+            clone_time = time.time() - clone_start
+            logs = logs + [f"[{_ts()}] Repository cloned ({clone_time:.1f}s)"]
         
         # Determine base branch and checkout
         base_branch = state.get("base_branch")
         if not base_branch:
             base_branch = await git.get_default_branch()
-            logs = logs + [f"[{datetime.now().strftime('%H:%M:%S')}] Auto-detected base branch: {base_branch}"]
+            logs = logs + [f"[{_ts()}] Auto-detected base branch: {base_branch}"]
         
         # Checkout base branch before creating feature branch
-        await git.checkout_branch(base_branch)
-        logs = logs + [f"[{datetime.now().strftime('%H:%M:%S')}] Checked out base branch: {base_branch}"]
+        if reused:
+            await git.sync_branch(base_branch)
+        else:
+            await git.checkout_branch(base_branch)
+        logs = logs + [f"[{_ts()}] Checked out base branch: {base_branch}"]
         
         # Create feature branch from base
         branch_name = state["branch_name"] or f"agent/{uuid.uuid4().hex[:8]}"
         await git.create_branch(branch_name)
         
         total_setup_time = time.time() - setup_start
-        logs = logs + [f"[{datetime.now().strftime('%H:%M:%S')}] Created branch: {branch_name} (from {base_branch})"]
-        logs = logs + [f"[{datetime.now().strftime('%H:%M:%S')}] ✅ Setup complete in {total_setup_time:.1f}s"]
+        logs = logs + [f"[{_ts()}] Created branch: {branch_name} (from {base_branch})"]
+        logs = logs + [f"[{_ts()}] ✅ Setup complete in {total_setup_time:.1f}s"]
         
         return {
             "sandbox_id": sandbox_id,
@@ -96,10 +163,11 @@ async def setup_node(state: AgentState) -> dict:
     except Exception as e:
         logger.exception("Setup failed")
         return {
+            "sandbox_id": sandbox_id,  # Let cleanup release a sandbox acquired before the failure
             "status": "failed",
             "error": str(e),
             "current_step": "cleanup",
-            "logs": logs + [f"[{datetime.now().strftime('%H:%M:%S')}] ERROR: {str(e)}"]
+            "logs": logs + [f"[{_ts()}] ERROR: {str(e)}"]
         }
 
 
@@ -115,7 +183,7 @@ async def execute_node(state: AgentState) -> dict:
             "status": "failed",
             "error": "Sandbox not found",
             "current_step": "cleanup",
-            "logs": logs + [f"[{datetime.now().strftime('%H:%M:%S')}] ERROR: Sandbox not found"]
+            "logs": logs + [f"[{_ts()}] ERROR: Sandbox not found"]
         }
     
     sandbox = _sandboxes[sandbox_id]
@@ -123,38 +191,33 @@ async def execute_node(state: AgentState) -> dict:
     
     try:
         # Create tools
-        git_tools, _ = create_git_tools(sandbox, state["github_token"], workdir)
-        code_tools, _ = create_code_tools(sandbox, workdir)
+        git_tools, _ = create_git_tools(sandbox, state["github_token"], workdir, state.get("repo_name"))
+        max_output = get_settings().tool_output_limit
+        code_tools, _ = create_code_tools(sandbox, workdir, max_output)
         all_tools = git_tools + code_tools
         
         # Check if semantic search index is available
         from src.tools.search import create_search_tools, check_index_available
-        repo_url = state.get("repo_url", "")
-        
-        # Extract repo name from URL (e.g., "https://github.com/owner/repo" -> "owner/repo")
-        repo_name = None
-        if "github.com" in repo_url:
-            parts = repo_url.rstrip("/").split("/")
-            if len(parts) >= 2:
-                repo_name = f"{parts[-2]}/{parts[-1]}"
+        repo_name = state.get("repo_name")
         
         has_index = False
         if repo_name and check_index_available(repo_name):
             search_tools = create_search_tools(repo_name)
             all_tools = search_tools + all_tools  # Prioritize search tools
             has_index = True
-            logs = logs + [f"[{datetime.now().strftime('%H:%M:%S')}] Semantic search index available for {repo_name}"]
+            logs = logs + [f"[{_ts()}] Semantic search index available for {repo_name}"]
         else:
-            logs = logs + [f"[{datetime.now().strftime('%H:%M:%S')}] No semantic search index (using grep-based search)"]
+            logs = logs + [f"[{_ts()}] No semantic search index (using grep-based search)"]
         
         # Get LLM with specified provider and model
         llm_provider = state.get("llm_provider", "anthropic")
         model = state.get("model")  # None uses provider default
         llm = get_llm(provider=llm_provider, model=model)
         llm_with_tools = llm.bind_tools(all_tools)
+        tools_by_name = {t.name: t for t in all_tools}
         
         model_name = model or f"{llm_provider} default"
-        logs = logs + [f"[{datetime.now().strftime('%H:%M:%S')}] Using model: {model_name}"]
+        logs = logs + [f"[{_ts()}] Using model: {model_name}"]
         
         # Build system prompt based on available tools
         search_tools_section = ""
@@ -178,11 +241,13 @@ You have access to the following tools:
 
 **GitHub Tools (use these first!):**
 - fetch_github_issue: Fetch issue content (title, body, comments). ALWAYS use this first if task mentions an issue number!
+- fetch_github_issues: Fetch several issues in one call (prefer this over repeated fetch_github_issue)
 - fetch_github_pr: Fetch PR content (title, body, files)
 - run_gh_command: Run any gh CLI command (e.g., 'issue list', 'pr list')
 {search_tools_section}
 **Code Tools:**
 - read_file: Read file contents
+- read_files_batch: Read several files in one call (prefer this over repeated read_file)
 - write_file: Write/modify files
 - list_directory: List directory contents
 - find_files: Find files by pattern
@@ -231,62 +296,69 @@ Please complete this task. Start by exploring the repository structure.""")
         # Agentic loop - configurable iterations for complex tasks
         from src.config import get_settings
         max_iterations = state.get("max_iterations") or get_settings().max_iterations
-        logs = logs + [f"[{datetime.now().strftime('%H:%M:%S')}] Max iterations: {max_iterations}"]
+        logs = logs + [f"[{_ts()}] Max iterations: {max_iterations}"]
         iteration = 0
         
         while iteration < max_iterations:
             iteration += 1
-            logs = logs + [f"[{datetime.now().strftime('%H:%M:%S')}] LLM iteration {iteration}"]
+            logs = logs + [f"[{_ts()}] LLM iteration {iteration}"]
             
             # Get LLM response
             response = await llm_with_tools.ainvoke(messages)
             messages.append(response)
             
-            # Check if done
-            if "TASK_COMPLETE" in str(response.content):
-                logs = logs + [f"[{datetime.now().strftime('%H:%M:%S')}] Task marked complete by agent"]
+            # Check if done. If the completion marker comes with tool calls (e.g. a
+            # final push), run them but don't go back to the LLM afterwards.
+            task_complete = "TASK_COMPLETE" in message_text(response)
+            if task_complete and not response.tool_calls:
+                logs = logs + [f"[{_ts()}] Task marked complete by agent"]
                 break
             
             # Process tool calls
             if response.tool_calls:
-                from langchain_core.messages import ToolMessage
-                
+                tool_messages = []
                 for tool_call in response.tool_calls:
                     tool_name = tool_call["name"]
                     tool_args = tool_call["args"]
                     
                     # Log tool call with arguments for visibility
                     args_summary = ", ".join(f"{k}={repr(v)[:50]}" for k, v in tool_args.items())
-                    logs = logs + [f"[{datetime.now().strftime('%H:%M:%S')}] Tool: {tool_name}({args_summary})"]
+                    logs = logs + [f"[{_ts()}] Tool: {tool_name}({args_summary})"]
                     
                     # Find and execute the tool
-                    tool_fn = next((t for t in all_tools if t.name == tool_name), None)
+                    tool_fn = tools_by_name.get(tool_name)
                     if tool_fn:
                         try:
                             result = await tool_fn.ainvoke(tool_args)
+                            result_str = result if isinstance(result, str) else str(result)
                             # Log brief result summary
-                            result_preview = str(result)[:200].replace('\n', ' ')
-                            if len(str(result)) > 200:
+                            result_preview = result_str[:200].replace('\n', ' ')
+                            if len(result_str) > 200:
                                 result_preview += "..."
-                            logs = logs + [f"[{datetime.now().strftime('%H:%M:%S')}]   → {result_preview}"]
+                            logs = logs + [f"[{_ts()}]   → {result_preview}"]
                             # Truncate long results for LLM context
-                            if len(str(result)) > 5000:
-                                result = str(result)[:5000] + "\n... (truncated)"
+                            result_str = truncate_output(result_str, max_output)
                         except Exception as e:
-                            result = f"Error: {str(e)}"
-                            logs = logs + [f"[{datetime.now().strftime('%H:%M:%S')}]   → ERROR: {str(e)}"]
+                            result_str = f"Error: {str(e)}"
+                            logs = logs + [f"[{_ts()}]   → ERROR: {str(e)}"]
                     else:
-                        result = f"Unknown tool: {tool_name}"
+                        result_str = f"Unknown tool: {tool_name}"
                     
-                    messages.append(ToolMessage(content=str(result), tool_call_id=tool_call["id"]))
+                    tool_messages.append(ToolMessage(content=result_str, tool_call_id=tool_call["id"]))
+                
+                messages.extend(tool_messages)
+                
+                if task_complete:
+                    logs = logs + [f"[{_ts()}] Task marked complete by agent"]
+                    break
             else:
                 # No tool calls and not complete - might be stuck
                 if iteration > 5:
-                    logs = logs + [f"[{datetime.now().strftime('%H:%M:%S')}] No tool calls, prompting agent"]
+                    logs = logs + [f"[{_ts()}] No tool calls, prompting agent"]
                     messages.append(HumanMessage(content="Continue with the task. Use the available tools to make progress."))
         
         if iteration >= max_iterations:
-            logs = logs + [f"[{datetime.now().strftime('%H:%M:%S')}] WARNING: Max iterations reached"]
+            logs = logs + [f"[{_ts()}] WARNING: Max iterations reached"]
         
         return {
             "messages": messages,
@@ -301,7 +373,7 @@ Please complete this task. Start by exploring the repository structure.""")
             "status": "failed",
             "error": str(e),
             "current_step": "cleanup",
-            "logs": logs + [f"[{datetime.now().strftime('%H:%M:%S')}] ERROR: {str(e)}"]
+            "logs": logs + [f"[{_ts()}] ERROR: {str(e)}"]
         }
 
 
@@ -329,10 +401,10 @@ async def create_pr_node(state: AgentState) -> dict:
         base_branch = state.get("base_branch")
         if not base_branch:
             base_branch = await git.get_default_branch()
-            logs = logs + [f"[{datetime.now().strftime('%H:%M:%S')}] Auto-detected base branch: {base_branch}"]
+            logs = logs + [f"[{_ts()}] Auto-detected base branch: {base_branch}"]
         
         # Create PR (this will push the branch automatically)
-        logs = logs + [f"[{datetime.now().strftime('%H:%M:%S')}] Creating PR against {base_branch}..."]
+        logs = logs + [f"[{_ts()}] Creating PR against {base_branch}..."]
         pr_title = f"[Agent] {state['task'][:50]}"
         pr_body = f"""## Summary
 This PR was automatically created by the Code Agent.
@@ -346,7 +418,7 @@ This PR was automatically created by the Code Agent.
 """
         
         pr_url = await git.create_pr(pr_title, pr_body, base=base_branch)
-        logs = logs + [f"[{datetime.now().strftime('%H:%M:%S')}] PR created: {pr_url}"]
+        logs = logs + [f"[{_ts()}] PR created: {pr_url}"]
         
         return {
             "pr_url": pr_url,
@@ -361,31 +433,41 @@ This PR was automatically created by the Code Agent.
             "status": "failed",
             "error": str(e),
             "current_step": "cleanup",
-            "logs": logs + [f"[{datetime.now().strftime('%H:%M:%S')}] ERROR: {str(e)}"]
+            "logs": logs + [f"[{_ts()}] ERROR: {str(e)}"]
         }
 
 
 async def cleanup_node(state: AgentState) -> dict:
     """
-    Cleanup node: Destroy sandbox.
+    Cleanup node: Release sandbox.
+    
+    The release runs in the background so the final status (and PR URL)
+    is returned without waiting on sandbox teardown.
     """
     logs = add_log(state, "Cleaning up...")
     
     sandbox_id = state["sandbox_id"]
     if sandbox_id and sandbox_id in _sandboxes:
-        try:
-            sandbox = _sandboxes.pop(sandbox_id)
-            await sandbox.destroy()
-            logs = logs + [f"[{datetime.now().strftime('%H:%M:%S')}] Sandbox destroyed"]
-        except Exception as e:
-            logs = logs + [f"[{datetime.now().strftime('%H:%M:%S')}] Warning: Cleanup error: {str(e)}"]
+        sandbox = _sandboxes.pop(sandbox_id)
+        timer = _expiry_timers.pop(sandbox_id, None)
+        if timer:
+            timer.cancel()
+        # Failed tasks may leave the checkout in an unknown state, so don't reuse it
+        _spawn_cleanup(_release_sandbox(
+            sandbox,
+            state.get("sandbox_provider") or get_settings().sandbox_provider,
+            key=repo_key(state["repo_url"], state["github_token"]),
+            workdir=state["workdir"],
+            reusable=not state.get("error"),
+        ))
+        logs = logs + [f"[{_ts()}] Sandbox release scheduled"]
     
     # Determine final status
     final_status = "completed" if state.get("pr_url") else state.get("status", "failed")
     if state.get("error"):
         final_status = "failed"
     
-    logs = logs + [f"[{datetime.now().strftime('%H:%M:%S')}] Finished with status: {final_status}"]
+    logs = logs + [f"[{_ts()}] Finished with status: {final_status}"]
     
     return {
         "sandbox_id": None,
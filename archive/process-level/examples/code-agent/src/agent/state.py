@@ -18,6 +18,7 @@ class AgentState(TypedDict):
     # Task information
     task: str                           # User's task description
     repo_url: str                       # GitHub repository URL
+    repo_name: Optional[str]            # owner/repo parsed from repo_url (None if not GitHub)
     branch_name: str                    # Working branch name
     base_branch: Optional[str]          # Base branch for PR (None = auto-detect)
     
@@ -0,0 +1,137 @@
+"""Bounded in-memory task logs with a compressed on-disk archive."""
+
+import gzip
+import logging
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Iterable, Optional
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+
+class TaskLogs:
+    """
+    Log lines for a single task.
+
+    Only the most recent `max_lines` lines are kept in memory. Older lines are
+    appended to a gzip archive in batches of `flush_every` lines so they can
+    still be served on request.
+
+    Lines are addressed by absolute index (0 = first line ever logged).
+
+    Safe to use from several threads: `since` is typically run in a worker
+    thread while the event loop keeps appending.
+    """
+
+    def __init__(self, archive_path: Path, max_lines: int = 2000, flush_every: int = 200):
+        self.archive_path = archive_path
+        self._recent: deque[str] = deque(maxlen=max_lines)
+        self._spill: list[str] = []
+        self._archived = 0  # Lines written to the archive file
+        self._archived_bytes = 0  # Size of the archive file
+        self._flush_every = flush_every
+        # Guards all of the above. The archive is only appended to, so its
+        # first _archived_bytes bytes can be read without holding the lock.
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Total number of lines logged."""
+        with self._lock:
+            return self._archived + len(self._spill) + len(self._recent)
+
+    @property
+    def first_index(self) -> int:
+        """Absolute index of the oldest line held in memory."""
+        with self._lock:
+            return self._archived + len(self._spill)
+
+    def append(self, line: str) -> None:
+        """Add a log line, spilling the oldest in-memory line if full."""
+        with self._lock:
+            self._append(line)
+
+    def extend(self, lines: Iterable[str]) -> None:
+        """Add several log lines."""
+        with self._lock:
+            for line in lines:
+                self._append(line)
+
+    def _append(self, line: str) -> None:
+        """Add a log line. Must be called with the lock held."""
+        if len(self._recent) == self._recent.maxlen:
+            self._spill.append(self._recent[0])
+            if len(self._spill) >= self._flush_every:
+                self._flush()
+        self._recent.append(line)
+
+    def recent(self) -> list[str]:
+        """Get the lines held in memory."""
+        with self._lock:
+            return list(self._recent)
+
+    def held_since(self, index: int) -> Optional[list[str]]:
+        """
+        Get all lines from an absolute index onwards, if none are archived.
+
+        Returns:
+            List of log lines, or None if `since` must read the archive
+        """
+        index = max(index, 0)
+        with self._lock:
+            if index < self._archived:
+                return None
+            return (self._spill + list(self._recent))[index - self._archived:]
+
+    def since(self, index: int) -> list[str]:
+        """
+        Get all lines from an absolute index onwards.
+
+        Lines older than the in-memory window are read back from the archive.
+
+        Args:
+            index: Absolute index of the first line to return
+
+        Returns:
+            List of log lines
+        """
+        index = max(index, 0)
+        with self._lock:
+            archived = self._archived
+            archived_bytes = self._archived_bytes
+            held = self._spill + list(self._recent)
+        if index >= archived:
+            return held[index - archived:]
+
+        # Lines archived after the snapshot are appended past archived_bytes
+        with open(self.archive_path, "rb") as f:
+            data = f.read(archived_bytes)
+        lines = gzip.decompress(data).split(b"\n")[index:archived]
+        return [orjson.loads(line) for line in lines] + held
+
+    def delete(self) -> None:
+        """Delete the archive file, once the task is discarded."""
+        with self._lock:
+            self.archive_path.unlink(missing_ok=True)
+
+    def flush(self) -> None:
+        """Write spilled lines to the archive."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        """Write spilled lines to the archive. Must be called with the lock held."""
+        if not self._spill:
+            return
+        self.archive_path.parent.mkdir(parents=True, exist_ok=True)
+        # One JSON string per line so messages containing newlines round-trip.
+        # Each flush appends a new gzip member; readers see one stream.
+        data = gzip.compress(b"".join(orjson.dumps(line) + b"\n" for line in self._spill))
+        with open(self.archive_path, "ab") as f:
+            f.write(data)
+        self._archived += len(self._spill)
+        self._archived_bytes += len(data)
+        self._spill.clear()
+        logger.debug(f"Archived task logs to {self.archive_path} ({self._archived} lines)")
@@ -1,17 +1,24 @@
 """FastAPI server for the coding agent."""
 
 import asyncio
+import time
 import uuid
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+import orjson
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
 
 from src.models import TaskRequest, TaskResponse, TaskStatusResponse, TaskStatus
 from src.agent.graph import run_agent
+from src.api.logs import TaskLogs
 from src.config import get_settings
+from src.sandbox import get_sandbox_pool, close_sandbox_pools, close_shared_client
+from src.tools import close_github_client
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -20,13 +27,34 @@ logger = logging.getLogger(__name__)
 # In-memory task storage (use Redis/DB for production)
 tasks: dict[str, dict] = {}
 
+# Statuses after which a task's logs no longer change
+FINISHED_STATUSES = (TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED)
+
+# Seconds between keep-alive comments on an idle log stream
+LOG_STREAM_KEEPALIVE = 15.0
+
+# Seconds between sweeps for finished tasks past their retention
+TASK_SWEEP_INTERVAL = 300.0
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan handler."""
     logger.info("Starting Code Agent API...")
+    settings = get_settings()
+    # Tasks live in memory, so archives a previous run left behind are never evicted
+    cutoff = time.time() - settings.task_retention
+    for path in Path(settings.log_dir).glob("*.log.gz"):
+        if path.stat().st_mtime < cutoff:
+            path.unlink(missing_ok=True)
+    await get_sandbox_pool(settings.sandbox_provider).start()
+    sweeper = asyncio.create_task(sweep_tasks(settings.task_retention))
     yield
     logger.info("Shutting down Code Agent API...")
+    sweeper.cancel()
+    await close_sandbox_pools()
+    await close_shared_client()
+    await close_github_client()
 
 
 app = FastAPI(
@@ -34,6 +62,7 @@ app = FastAPI(
     description="LangGraph-powered coding agent with E2B sandbox execution",
     version="0.1.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Add CORS middleware
@@ -46,11 +75,45 @@ app.add_middleware(
 )
 
 
+def touch_task(task: dict) -> None:
+    """Mark a task as updated and wake up anything streaming its logs."""
+    task["updated_at"] = datetime.now()
+    changed = task["changed"]
+    task["changed"] = asyncio.Event()
+    changed.set()
+
+
+def evict_finished_tasks(retention: float) -> None:
+    """Drop finished tasks not updated for `retention` seconds, and delete their log archives."""
+    cutoff = datetime.now() - timedelta(seconds=retention)
+    expired = [
+        task_id for task_id, task in tasks.items()
+        if task["status"] in FINISHED_STATUSES and task["updated_at"] < cutoff
+    ]
+    for task_id in expired:
+        tasks.pop(task_id)["logs"].delete()
+    if expired:
+        logger.info(f"Evicted {len(expired)} finished tasks")
+
+
+async def sweep_tasks(retention: float) -> None:
+    """Periodically evict finished tasks past their retention."""
+    while True:
+        await asyncio.sleep(TASK_SWEEP_INTERVAL)
+        evict_finished_tasks(retention)
+
+
 async def execute_task(task_id: str, request: TaskRequest):
     """Background task to execute the agent."""
+    task = tasks[task_id]
+    
+    def on_logs(lines: list[str]) -> None:
+        task["logs"].extend(lines)
+        touch_task(task)
+    
     try:
-        tasks[task_id]["status"] = TaskStatus.RUNNING
-        tasks[task_id]["updated_at"] = datetime.now()
+        task["status"] = TaskStatus.RUNNING
+        touch_task(task)
         
         # Run the agent
         result = await run_agent(
@@ -63,21 +126,21 @@ async def execute_task(task_id: str, request: TaskRequest):
             model=request.model,
             max_iterations=request.max_iterations,
             sandbox_provider=request.sandbox_provider.value,
+            on_logs=on_logs,
         )
         
-        # Update task with results
-        tasks[task_id]["status"] = TaskStatus(result.get("status", "failed"))
-        tasks[task_id]["pr_url"] = result.get("pr_url")
-        tasks[task_id]["error"] = result.get("error")
-        tasks[task_id]["logs"] = result.get("logs", [])
-        tasks[task_id]["branch_name"] = result.get("branch_name")
-        tasks[task_id]["updated_at"] = datetime.now()
+        # Update task with results (logs already arrived through on_logs)
+        task["status"] = TaskStatus(result.get("status", "failed"))
+        task["pr_url"] = result.get("pr_url")
+        task["error"] = result.get("error")
+        task["branch_name"] = result.get("branch_name")
+        touch_task(task)
         
     except Exception as e:
         logger.exception(f"Task {task_id} failed")
-        tasks[task_id]["status"] = TaskStatus.FAILED
-        tasks[task_id]["error"] = str(e)
-        tasks[task_id]["updated_at"] = datetime.now()
+        task["status"] = TaskStatus.FAILED
+        task["error"] = str(e)
+        touch_task(task)
 
 
 @app.post("/task", response_model=TaskResponse)
@@ -88,6 +151,7 @@ async def create_task(request: TaskRequest, background_tasks: BackgroundTasks):
     The task will be executed in the background. Use the task_id to check status.
     """
     task_id = str(uuid.uuid4())
+    settings = get_settings()
     
     # Store task info
     tasks[task_id] = {
@@ -100,7 +164,12 @@ async def create_task(request: TaskRequest, background_tasks: BackgroundTasks):
         "branch_name": request.branch_name,
         "pr_url": None,
         "error": None,
-        "logs": [],
+        "logs": TaskLogs(
+            Path(settings.log_dir) / f"{task_id}.log.gz",
+            max_lines=settings.max_inmem_logs,
+        ),
+        # Replaced and set on every update; see touch_task
+        "changed": asyncio.Event(),
     }
     
     # Start background execution
@@ -114,12 +183,41 @@ async def create_task(request: TaskRequest, background_tasks: BackgroundTasks):
 
 
 @app.get("/task/{task_id}", response_model=TaskStatusResponse)
-async def get_task_status(task_id: str):
-    """Get the status of a task."""
+async def get_task_status(
+    task_id: str,
+    request: Request,
+    response: Response,
+    from_: Optional[int] = Query(default=None, alias="from", description="Return logs from this line index (includes archived lines)"),
+):
+    """
+    Get the status of a task.
+    
+    By default only the most recent log lines held in memory are returned.
+    Pass `from` to fetch older lines from the log archive.
+    
+    The response carries an ETag; a request whose If-None-Match still
+    matches gets an empty 304 instead. The ETag covers the task, not the
+    requested range, so a client polling for lines past its copy with
+    `from` gets a 304 until the task changes.
+    """
     if task_id not in tasks:
         raise HTTPException(status_code=404, detail="Task not found")
     
     task = tasks[task_id]
+    task_logs: TaskLogs = task["logs"]
+    
+    # Every change to a task goes through touch_task, which moves updated_at
+    etag = f'"{task["updated_at"].timestamp()}-{len(task_logs)}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    
+    if from_ is None:
+        log_offset = task_logs.first_index
+        logs = task_logs.recent()
+    else:
+        log_offset = max(from_, 0)
+        logs = await asyncio.to_thread(task_logs.since, log_offset)
     return TaskStatusResponse(
         task_id=task["task_id"],
         status=task["status"],
@@ -130,37 +228,54 @@ async def get_task_status(task_id: str):
         branch_name=task.get("branch_name"),
         pr_url=task.get("pr_url"),
         error=task.get("error"),
-        logs=task.get("logs", []),
+        logs=logs,
+        log_offset=log_offset,
+        total_logs=len(task_logs),
     )
 
 
 @app.get("/task/{task_id}/logs")
-async def stream_task_logs(task_id: str):
-    """Stream task logs as server-sent events."""
+async def stream_task_logs(
+    task_id: str,
+    from_: Optional[int] = Query(default=None, alias="from", description="Start at this line index (default: the in-memory window)"),
+):
+    """
+    Stream task logs as server-sent events.
+    
+    Each log line is sent as `data: {"line": ...}` as soon as it is logged.
+    The stream ends with a `done` event carrying `{"status": ...}` once the
+    task has finished.
+    """
     if task_id not in tasks:
         raise HTTPException(status_code=404, detail="Task not found")
     
+    task = tasks[task_id]
+    logs: TaskLogs = task["logs"]
+    
     async def log_generator():
-        last_log_count = 0
+        sent = logs.first_index if from_ is None else max(from_, 0)
         while True:
-            if task_id not in tasks:
-                break
-                
-            task = tasks[task_id]
-            logs = task.get("logs", [])
+            # Take the event before reading, so an update in between isn't missed
+            changed = task["changed"]
             
-            # Send new logs
-            if len(logs) > last_log_count:
-                for log in logs[last_log_count:]:
-                    yield f"data: {log}\n\n"
-                last_log_count = len(logs)
+            if len(logs) > sent:
+                lines = logs.held_since(sent)
+                if lines is None:
+                    # Archived lines are read back from disk
+                    lines = await asyncio.to_thread(logs.since, sent)
+                for line in lines:
+                    yield f"data: {orjson.dumps({'line': line}).decode()}\n\n"
+                # More lines may have arrived while these were sent
+                sent += len(lines)
             
-            # Check if task is done
-            if task["status"] in [TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED]:
-                yield f"data: [DONE] Status: {task['status'].value}\n\n"
+            if task["status"] in FINISHED_STATUSES:
+                yield f"event: done\ndata: {orjson.dumps({'status': task['status'].value}).decode()}\n\n"
                 break
             
-            await asyncio.sleep(1)
+            try:
+                await asyncio.wait_for(changed.wait(), LOG_STREAM_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
     
     return StreamingResponse(
         log_generator(),
@@ -181,7 +296,7 @@ async def cancel_task(task_id: str):
     task = tasks[task_id]
     if task["status"] == TaskStatus.RUNNING:
         task["status"] = TaskStatus.CANCELLED
-        task["updated_at"] = datetime.now()
+        touch_task(task)
         return {"message": "Task cancellation requested"}
     else:
         return {"message": f"Task is not running (status: {task['status'].value})"}
@@ -223,7 +338,10 @@ def start_server():
         "src.api.server:app",
         host=settings.api_host,
         port=settings.api_port,
-        reload=True,
+        reload=settings.debug,
+        workers=1 if settings.debug else settings.api_workers,
+        loop="auto",  # uvloop when installed
+        http="auto",  # httptools when installed
     )
 
 
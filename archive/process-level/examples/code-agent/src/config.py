@@ -22,13 +22,22 @@ class Settings(BaseSettings):
     sandbox_provider: str = Field(default="opensandbox", alias="SANDBOX_PROVIDER")
     sandbox_timeout: int = Field(default=1800, alias="SANDBOX_TIMEOUT")  # 30 minutes
     opensandbox_url: str = Field(default="http://localhost:8080", alias="OPENSANDBOX_URL")
+    sandbox_pool_size: int = Field(default=2, alias="SANDBOX_POOL_SIZE")  # Warm sandboxes kept ready (0 = disabled)
+    sandbox_pool_max_starting: int = Field(default=2, alias="SANDBOX_POOL_MAX_STARTING")  # Concurrent sandbox creations
+    sandbox_pool_max_idle: int = Field(default=240, alias="SANDBOX_POOL_MAX_IDLE")  # Seconds before a pooled sandbox is dropped
     
     # Agent Configuration
     max_iterations: int = Field(default=50, alias="MAX_ITERATIONS")  # Max LLM tool-calling iterations
+    tool_output_limit: int = Field(default=5000, alias="TOOL_OUTPUT_LIMIT")  # Max characters of tool output sent to the LLM
     
     # Server Configuration
+    max_inmem_logs: int = Field(default=2000, alias="MAX_INMEM_LOGS")  # Log lines kept in memory per task
+    log_dir: str = Field(default="logs", alias="LOG_DIR")  # Where older task log lines are archived
+    task_retention: int = Field(default=86400, alias="TASK_RETENTION")  # Seconds finished tasks and their log archives are kept
     api_host: str = Field(default="0.0.0.0", alias="API_HOST")
     api_port: int = Field(default=8000, alias="API_PORT")
+    api_workers: int = Field(default=1, alias="API_WORKERS")  # >1 needs a shared task store (tasks are in-memory)
+    debug: bool = Field(default=False, alias="DEBUG")  # Enables auto-reload
     
     class Config:
         env_file = ".env"
@@ -1,16 +1,19 @@
 """Codebase indexer for semantic search."""
 
-from .embeddings import get_embeddings_client, embed_texts, embed_single
-from .chunker import chunk_file, chunk_codebase
+from .embeddings import get_embeddings_client, embed_texts, embed_texts_async, embed_single, embed_queries
+from .chunker import chunk_file, chunk_codebase, chunk_files
 from .faiss_store import FAISSStore
 from .repo_manager import RepoManager
 
 __all__ = [
     "get_embeddings_client",
     "embed_texts",
+    "embed_texts_async",
     "embed_single",
+    "embed_queries",
     "chunk_file",
     "chunk_codebase",
+    "chunk_files",
     "FAISSStore",
     "RepoManager",
 ]
@@ -2,10 +2,16 @@
 
 import os
 import logging
-from typing import List, Dict, Any
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 from pathlib import Path
 from dataclasses import dataclass
 
+try:
+    from tree_sitter_languages import get_parser
+except ImportError:  # Optional: without it every file is chunked by lines
+    get_parser = None
+
 logger = logging.getLogger(__name__)
 
 # File extensions to index
@@ -23,6 +29,79 @@ SKIP_PATTERNS = {
     "package-lock.json", "yarn.lock", "Cargo.lock", "go.sum"
 }
 
+# SKIP_PATTERNS split by kind so a check is one set lookup plus one endswith
+_SKIP_NAMES = frozenset(p for p in SKIP_PATTERNS if not p.startswith("*"))
+_SKIP_SUFFIXES = tuple(p[1:] for p in SKIP_PATTERNS if p.startswith("*"))
+
+# Languages by file extension
+_LANG_MAP = {
+    ".py": "python",
+    ".js": "javascript",
+    ".ts": "typescript",
+    ".tsx": "typescript",
+    ".jsx": "javascript",
+    ".go": "go",
+    ".rs": "rust",
+    ".java": "java",
+    ".c": "c",
+    ".cpp": "cpp",
+    ".h": "c",
+    ".hpp": "cpp",
+    ".cs": "csharp",
+    ".rb": "ruby",
+    ".php": "php",
+    ".swift": "swift",
+    ".kt": "kotlin",
+    ".scala": "scala",
+    ".sh": "bash",
+    ".yaml": "yaml",
+    ".yml": "yaml",
+    ".json": "json",
+    ".toml": "toml",
+    ".md": "markdown",
+    ".sql": "sql",
+}
+
+# tree-sitter grammar names for languages chunked by syntax
+_TREE_SITTER_LANGUAGES = {
+    "python": "python",
+    "javascript": "javascript",
+    "typescript": "typescript",
+    "go": "go",
+    "rust": "rust",
+    "java": "java",
+    "c": "c",
+    "cpp": "cpp",
+    "csharp": "c_sharp",
+    "ruby": "ruby",
+    "php": "php",
+}
+
+# Top-level node types that start a new chunk
+_DEFINITION_TYPES = frozenset({
+    # Python
+    "function_definition", "class_definition", "decorated_definition",
+    # JavaScript / TypeScript
+    "function_declaration", "class_declaration", "export_statement",
+    "interface_declaration", "lexical_declaration",
+    # Go
+    "method_declaration", "type_declaration",
+    # Rust
+    "function_item", "impl_item", "struct_item", "enum_item", "trait_item", "mod_item",
+    # Java / C#
+    "interface_declaration", "enum_declaration", "namespace_declaration",
+    # C / C++
+    "struct_specifier", "class_specifier", "namespace_definition", "template_declaration",
+    # Ruby
+    "method", "class", "module",
+})
+
+# Parsers by grammar name, created on first use in each process
+_parsers: Dict[str, Any] = {}
+
+# Files larger than this many bytes are not indexed
+MAX_FILE_SIZE = 500_000
+
 # Target chunk size in characters (roughly 500-800 tokens)
 TARGET_CHUNK_SIZE = 2000
 CHUNK_OVERLAP = 200
@@ -51,71 +130,132 @@ class CodeChunk:
         return cls(**data)
 
 
-def should_skip(path: Path) -> bool:
-    """Check if a path should be skipped."""
-    name = path.name
-    
-    for pattern in SKIP_PATTERNS:
-        if pattern.startswith("*"):
-            if name.endswith(pattern[1:]):
-                return True
-        elif name == pattern or pattern in str(path):
-            return True
+def should_skip(name: str) -> bool:
+    """
+    Check if a file or directory should be skipped, by its name.
     
-    return False
+    Only the entry's own name is checked; skipped directories are never
+    descended into, so their contents don't need checking.
+    """
+    return name in _SKIP_NAMES or name.endswith(_SKIP_SUFFIXES)
 
 
 def get_language(file_path: str) -> str:
     """Get language from file extension."""
-    ext = Path(file_path).suffix.lower()
-    
-    lang_map = {
-        ".py": "python",
-        ".js": "javascript",
-        ".ts": "typescript",
-        ".tsx": "typescript",
-        ".jsx": "javascript",
-        ".go": "go",
-        ".rs": "rust",
-        ".java": "java",
-        ".c": "c",
-        ".cpp": "cpp",
-        ".h": "c",
-        ".hpp": "cpp",
-        ".cs": "csharp",
-        ".rb": "ruby",
-        ".php": "php",
-        ".swift": "swift",
-        ".kt": "kotlin",
-        ".scala": "scala",
-        ".sh": "bash",
-        ".yaml": "yaml",
-        ".yml": "yaml",
-        ".json": "json",
-        ".toml": "toml",
-        ".md": "markdown",
-        ".sql": "sql",
-    }
-    
-    return lang_map.get(ext, "text")
+    dot = file_path.rfind(".")
+    # No dot in the file name itself, or a dotfile like ".env"
+    if dot <= file_path.rfind("/") + 1:
+        return "text"
+    
+    return _LANG_MAP.get(file_path[dot:].lower(), "text")
+
+
+def _get_parser(language: str):
+    """Get a cached tree-sitter parser for a language, or None if unsupported."""
+    ts_name = _TREE_SITTER_LANGUAGES.get(language)
+    if ts_name is None or get_parser is None:
+        return None
+    
+    if ts_name not in _parsers:
+        try:
+            _parsers[ts_name] = get_parser(ts_name)
+        except Exception as e:
+            logger.warning(f"No tree-sitter parser for {ts_name}: {e}")
+            _parsers[ts_name] = None
+    return _parsers[ts_name]
 
 
 def chunk_file(file_path: str, content: str) -> List[CodeChunk]:
     """
     Chunk a single file into smaller pieces.
     
-    Uses a simple line-based chunking strategy that tries to break
-    at logical boundaries (blank lines, function definitions).
+    For languages with a tree-sitter grammar, chunks follow top-level
+    definitions: a chunk never starts or ends inside a top-level function or
+    class. Adjacent small definitions, and the code between them, are merged
+    up to TARGET_CHUNK_SIZE. Other files, and definitions larger than
+    TARGET_CHUNK_SIZE, fall back to line-based chunking.
     """
     lines = content.split("\n")
-    chunks = []
     language = get_language(file_path)
     
+    parser = _get_parser(language)
+    if parser is None:
+        return _chunk_lines(file_path, lines, language)
+    
+    tree = parser.parse(content.encode("utf-8"))
+    
+    # Split the file into consecutive sections of 0-based line ranges: each
+    # top-level definition, and the imports, constants and comments between
+    sections = []
+    pos = 0  # First line not yet assigned to a section
+    for node in tree.root_node.children:
+        if node.type not in _DEFINITION_TYPES:
+            continue
+        
+        start = max(node.start_point[0], pos)
+        end_row, end_col = node.end_point
+        end = end_row if end_col == 0 else end_row + 1
+        if end <= start:
+            continue
+        
+        if start > pos:
+            sections.append((pos, start))
+        sections.append((start, end))
+        pos = end
+    
+    if pos < len(lines):
+        sections.append((pos, len(lines)))
+    
+    chunks = []
+    
+    def add_lines(start: int, end: int) -> None:
+        section = lines[start:end]
+        if any(line.strip() for line in section):
+            chunks.extend(_chunk_lines(file_path, section, language, first_line=start + 1))
+    
+    # Merge adjacent sections up to TARGET_CHUNK_SIZE, so one-line constants,
+    # imports and short functions don't each become a chunk of their own
+    group_start = group_end = group_size = 0
+    for start, end in sections:
+        size = sum(len(line) + 1 for line in lines[start:end])
+        if group_end > group_start and group_size + size > TARGET_CHUNK_SIZE:
+            add_lines(group_start, group_end)
+            group_start, group_size = start, 0
+        group_end = end
+        group_size += size
+    
+    add_lines(group_start, group_end)
+    return chunks
+
+
+def _chunk_lines(
+    file_path: str,
+    lines: List[str],
+    language: str,
+    first_line: int = 1,
+) -> List[CodeChunk]:
+    """
+    Split lines into chunks of about TARGET_CHUNK_SIZE characters.
+    
+    Uses a simple line-based strategy with a few lines of overlap between
+    consecutive chunks.
+    
+    Args:
+        file_path: Path of the file the lines come from
+        lines: Lines to chunk
+        language: Language of the file
+        first_line: 1-based line number of lines[0] in the file
+        
+    Returns:
+        List of CodeChunk objects
+    """
+    chunks = []
+    
     current_chunk_lines = []
-    current_start_line = 1
+    current_start_line = first_line
     current_size = 0
     
-    for i, line in enumerate(lines, 1):
+    for i, line in enumerate(lines, first_line):
         line_size = len(line) + 1  # +1 for newline
         
         # Check if adding this line would exceed target size
@@ -133,7 +273,7 @@ def chunk_file(file_path: str, content: str) -> List[CodeChunk]:
             # Start new chunk with overlap
             overlap_lines = current_chunk_lines[-3:] if len(current_chunk_lines) > 3 else []
             current_chunk_lines = overlap_lines + [line]
-            current_start_line = max(1, i - len(overlap_lines))
+            current_start_line = max(first_line, i - len(overlap_lines))
             current_size = sum(len(l) + 1 for l in current_chunk_lines)
         else:
             current_chunk_lines.append(line)
@@ -146,62 +286,161 @@ def chunk_file(file_path: str, content: str) -> List[CodeChunk]:
             content=chunk_content,
             file_path=file_path,
             start_line=current_start_line,
-            end_line=len(lines),
+            end_line=first_line + len(lines) - 1,
             language=language,
         ))
     
     return chunks
 
 
-def chunk_codebase(repo_path: str) -> List[CodeChunk]:
+def _chunk_worker(item: Tuple[str, str]) -> List[CodeChunk]:
+    """Process pool entry point: chunk one (relative_path, content) item."""
+    relative_path, content = item
+    return chunk_file(relative_path, content)
+
+
+def _scan(directory: str) -> Iterator[os.DirEntry]:
+    """
+    Recursively yield code files under a directory, pruning skipped directories.
+    
+    Uses os.scandir so names and file types come from the directory listing
+    itself instead of a stat call per entry.
+    """
+    subdirs = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                name = entry.name
+                if should_skip(name):
+                    continue
+                
+                # Directories are descended into whatever their name, even
+                # one with a code extension like "chart.js"
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                    continue
+                
+                dot = name.rfind(".")
+                if dot > 0 and name[dot:].lower() in CODE_EXTENSIONS and entry.is_file():
+                    yield entry
+    except OSError as e:
+        logger.warning(f"Error scanning {directory}: {e}")
+        return
+    
+    # Recurse after closing the listing so deep trees don't hold open handles
+    for subdir in subdirs:
+        yield from _scan(subdir)
+
+
+def _read_text(path: str, size: int) -> Optional[str]:
+    """Read a file to index, or return None if it is too large."""
+    # Skip very large files before reading them
+    if size > MAX_FILE_SIZE:
+        logger.warning(f"Skipping large file: {path}")
+        return None
+    
+    with open(path, "rb") as f:
+        return f.read().decode("utf-8", errors="ignore")
+
+
+def _read_files(repo_path: Path) -> Iterator[Tuple[str, str]]:
+    """
+    Walk a repository and yield (relative_path, content) for each file to index.
+    
+    Skips ignored paths, non-code files, and files over 500KB.
+    """
+    root = str(repo_path)
+    prefix_len = len(os.path.join(root, ""))
+    
+    for entry in _scan(root):
+        try:
+            content = _read_text(entry.path, entry.stat().st_size)
+            if content is not None:
+                # Get relative path for storage
+                yield entry.path[prefix_len:], content
+            
+        except Exception as e:
+            logger.warning(f"Error processing {entry.path}: {e}")
+
+
+def _read_paths(repo_path: Path, relative_paths: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """
+    Yield (relative_path, content) for the given files that should be indexed.
+    
+    Applies the same filters as _read_files. Paths that no longer exist are
+    skipped silently.
+    """
+    for relative_path in relative_paths:
+        name = relative_path.rsplit("/", 1)[-1]
+        dot = name.rfind(".")
+        if dot <= 0 or name[dot:].lower() not in CODE_EXTENSIONS:
+            continue
+        if any(should_skip(part) for part in relative_path.split("/")):
+            continue
+        
+        path = os.path.join(repo_path, relative_path)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            continue  # Deleted
+        
+        try:
+            content = _read_text(path, st.st_size)
+            if content is not None:
+                yield relative_path, content
+        except Exception as e:
+            logger.warning(f"Error processing {path}: {e}")
+
+
+def _chunk_all(items: Iterable[Tuple[str, str]], max_workers: Optional[int]) -> List[CodeChunk]:
+    """Chunk (relative_path, content) items across a process pool."""
+    all_chunks = []
+    files_processed = 0
+    
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        for chunks in executor.map(_chunk_worker, items, chunksize=32):
+            all_chunks.extend(chunks)
+            files_processed += 1
+    
+    logger.info(f"Processed {files_processed} files, created {len(all_chunks)} chunks")
+    return all_chunks
+
+
+def chunk_codebase(repo_path: str, max_workers: Optional[int] = None) -> List[CodeChunk]:
     """
     Chunk all files in a codebase.
     
+    Files are read in this process and chunked in parallel across a
+    process pool.
+    
     Args:
         repo_path: Path to the repository root
+        max_workers: Number of worker processes (default: CPU count)
         
     Returns:
         List of CodeChunk objects
     """
     repo_path = Path(repo_path)
-    all_chunks = []
-    files_processed = 0
-    
     logger.info(f"Chunking codebase at {repo_path}")
+    return _chunk_all(_read_files(repo_path), max_workers)
+
+
+def chunk_files(
+    repo_path: str,
+    relative_paths: Iterable[str],
+    max_workers: Optional[int] = None,
+) -> List[CodeChunk]:
+    """
+    Chunk specific files in a codebase, e.g. those changed since the last index.
     
-    for root, dirs, files in os.walk(repo_path):
-        root_path = Path(root)
-        
-        # Skip directories
-        dirs[:] = [d for d in dirs if not should_skip(root_path / d)]
+    Args:
+        repo_path: Path to the repository root
+        relative_paths: Paths relative to repo_path, using "/" separators
+        max_workers: Number of worker processes (default: CPU count)
         
-        for file in files:
-            file_path = root_path / file
-            
-            # Skip non-code files
-            if file_path.suffix.lower() not in CODE_EXTENSIONS:
-                continue
-            
-            if should_skip(file_path):
-                continue
-            
-            try:
-                content = file_path.read_text(encoding="utf-8", errors="ignore")
-                
-                # Skip very large files
-                if len(content) > 500000:  # 500KB
-                    logger.warning(f"Skipping large file: {file_path}")
-                    continue
-                
-                # Get relative path for storage
-                relative_path = str(file_path.relative_to(repo_path))
-                
-                chunks = chunk_file(relative_path, content)
-                all_chunks.extend(chunks)
-                files_processed += 1
-                
-            except Exception as e:
-                logger.warning(f"Error processing {file_path}: {e}")
-    
-    logger.info(f"Processed {files_processed} files, created {len(all_chunks)} chunks")
-    return all_chunks
+    Returns:
+        List of CodeChunk objects
+    """
+    repo_path = Path(repo_path)
+    logger.info(f"Chunking changed files at {repo_path}")
+    return _chunk_all(_read_paths(repo_path, sorted(relative_paths)), max_workers)
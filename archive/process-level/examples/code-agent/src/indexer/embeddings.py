@@ -1,8 +1,24 @@
 """Embeddings generation using OpenAI."""
 
+import asyncio
 import logging
-from typing import List
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Awaitable, List, TypeVar
+from openai import (
+    APIConnectionError,
+    AsyncOpenAI,
+    BadRequestError,
+    InternalServerError,
+    OpenAI,
+    RateLimitError,
+)
+from tenacity import (
+    retry,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_random_exponential,
+)
 
 from src.config import get_settings
 
@@ -12,42 +28,125 @@ logger = logging.getLogger(__name__)
 EMBEDDING_MODEL = "text-embedding-3-small"
 EMBEDDING_DIMENSIONS = 1536
 
+T = TypeVar("T")
 
+
+def run_sync(coro: Awaitable[T]) -> T:
+    """
+    Run a coroutine to completion from synchronous code.
+    
+    asyncio.run cannot be nested, so when this thread already runs an event
+    loop the coroutine gets its own loop on a worker thread. That still
+    blocks the calling loop; async code should await the async variant.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+
+@lru_cache
 def get_embeddings_client() -> OpenAI:
-    """Get OpenAI client for embeddings."""
+    """Get cached OpenAI client for embeddings."""
     settings = get_settings()
     return OpenAI(api_key=settings.openai_api_key)
 
 
-def embed_texts(texts: List[str], batch_size: int = 100) -> List[List[float]]:
+def get_async_embeddings_client() -> AsyncOpenAI:
+    """Get async OpenAI client for embeddings."""
+    settings = get_settings()
+    return AsyncOpenAI(api_key=settings.openai_api_key)
+
+
+@retry(
+    wait=wait_random_exponential(min=1, max=30),
+    stop=stop_after_attempt(6),
+    retry=retry_if_exception_type((RateLimitError, APIConnectionError, InternalServerError)),
+    reraise=True,
+)
+async def _create_embeddings(client: AsyncOpenAI, batch: List[str]) -> List[List[float]]:
+    """Call the embeddings API, retrying rate limits and transient server errors."""
+    response = await client.embeddings.create(
+        model=EMBEDDING_MODEL,
+        input=batch
+    )
+    return [item.embedding for item in response.data]
+
+
+async def _embed_batch(client: AsyncOpenAI, batch: List[str]) -> List[List[float]]:
     """
-    Generate embeddings for a list of texts.
+    Embed a batch, halving it when the request exceeds the token limit.
+    
+    Args:
+        client: Async OpenAI client
+        batch: Texts to embed
+        
+    Returns:
+        List of embedding vectors, in the same order as batch
+    """
+    try:
+        return await _create_embeddings(client, batch)
+    except BadRequestError as e:
+        if len(batch) == 1 or "maximum context length" not in str(e):
+            raise
+        mid = len(batch) // 2
+        logger.debug(f"Batch of {len(batch)} too large, splitting")
+        return await _embed_batch(client, batch[:mid]) + await _embed_batch(client, batch[mid:])
+
+
+async def embed_texts_async(
+    texts: List[str],
+    batch_size: int = 100,
+    concurrency: int = 16,
+) -> List[List[float]]:
+    """
+    Generate embeddings for a list of texts, sending batches concurrently.
     
     Args:
         texts: List of text strings to embed
         batch_size: Number of texts to embed per API call
+        concurrency: Maximum number of API calls in flight
         
     Returns:
-        List of embedding vectors
+        List of embedding vectors, in the same order as texts
     """
-    client = get_embeddings_client()
-    all_embeddings = []
+    client = get_async_embeddings_client()
+    semaphore = asyncio.Semaphore(concurrency)
     
-    # Process in batches
-    for i in range(0, len(texts), batch_size):
-        batch = texts[i:i + batch_size]
-        logger.debug(f"Embedding batch {i // batch_size + 1}, size {len(batch)}")
-        
-        response = client.embeddings.create(
-            model=EMBEDDING_MODEL,
-            input=batch
-        )
-        
-        # Extract embeddings in order
-        batch_embeddings = [item.embedding for item in response.data]
-        all_embeddings.extend(batch_embeddings)
+    async def embed_batch(batch_num: int, batch: List[str]) -> List[List[float]]:
+        async with semaphore:
+            logger.debug(f"Embedding batch {batch_num}, size {len(batch)}")
+            return await _embed_batch(client, batch)
+    
+    try:
+        # gather preserves argument order, so batches come back in input order
+        batches = await asyncio.gather(*(
+            embed_batch(i // batch_size + 1, texts[i:i + batch_size])
+            for i in range(0, len(texts), batch_size)
+        ))
+    finally:
+        await client.close()
     
-    return all_embeddings
+    return [embedding for batch in batches for embedding in batch]
+
+
+def embed_texts(texts: List[str], batch_size: int = 100, concurrency: int = 16) -> List[List[float]]:
+    """
+    Generate embeddings for a list of texts.
+    
+    Synchronous wrapper around embed_texts_async; see run_sync.
+    
+    Args:
+        texts: List of text strings to embed
+        batch_size: Number of texts to embed per API call
+        concurrency: Maximum number of API calls in flight
+        
+    Returns:
+        List of embedding vectors
+    """
+    return run_sync(embed_texts_async(texts, batch_size, concurrency))
 
 
 def embed_single(text: str) -> List[float]:
@@ -68,3 +167,25 @@ def embed_single(text: str) -> List[float]:
     )
     
     return response.data[0].embedding
+
+
+def embed_queries(texts: List[str]) -> List[List[float]]:
+    """
+    Generate embeddings for a few short texts in a single API call.
+    
+    Meant for search queries; use embed_texts for bulk indexing.
+    
+    Args:
+        texts: Text strings to embed
+        
+    Returns:
+        List of embedding vectors, in the same order as texts
+    """
+    client = get_embeddings_client()
+    
+    response = client.embeddings.create(
+        model=EMBEDDING_MODEL,
+        input=texts
+    )
+    
+    return [item.embedding for item in response.data]
@@ -1,24 +1,275 @@
 """FAISS vector store for code search."""
 
-import json
+import hashlib
 import logging
+import os
+import sqlite3
 import numpy as np
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
+from dataclasses import dataclass
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 
 import faiss
+import msgpack
+import orjson
 
 from .chunker import CodeChunk
-from .embeddings import embed_texts, embed_single, EMBEDDING_DIMENSIONS
+from .embeddings import embed_texts, embed_queries, EMBEDDING_DIMENSIONS
 
 logger = logging.getLogger(__name__)
 
+# Indexes with at least this many vectors use IVF-PQ instead of HNSW
+IVFPQ_MIN_VECTORS = 50_000
+HNSW_NEIGHBORS = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+IVF_MAX_LISTS = 4096
+IVF_NPROBE = 32
+PQ_SUBQUANTIZERS = 96  # 1536 dims / 96 = 16 dims per 8-bit code
+IVF_MAX_TRAINING_VECTORS = 200_000
+
+
+def _fsync_file(path: Path) -> None:
+    """Flush a file's contents to disk."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _fsync_dir(path: Path) -> None:
+    """Flush a directory entry so renames inside it survive a crash (POSIX only)."""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class EmbeddingCache:
+    """
+    Persistent cache of embedding vectors keyed by sha256 of the embedded text.
+    
+    Lets index rebuilds skip the API for chunks whose text has not changed.
+    """
+    
+    # Stay under SQLite's bound-parameter limit
+    LOOKUP_BATCH = 500
+    
+    def __init__(self, db_path: Path):
+        """
+        Initialize the cache.
+        
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("CREATE TABLE IF NOT EXISTS cache (hash BLOB PRIMARY KEY, vec BLOB NOT NULL)")
+        conn.commit()
+        conn.close()
+    
+    @staticmethod
+    def key(text: str) -> bytes:
+        """Get the cache key for a text."""
+        return hashlib.sha256(text.encode()).digest()
+    
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """
+        Look up cached vectors.
+        
+        Args:
+            keys: Cache keys to look up
+            
+        Returns:
+            Dict mapping each found key to its float32 vector
+        """
+        found = {}
+        conn = sqlite3.connect(self.db_path)
+        try:
+            for i in range(0, len(keys), self.LOOKUP_BATCH):
+                batch = keys[i:i + self.LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT hash, vec FROM cache WHERE hash IN ({placeholders})",
+                    batch
+                )
+                for key, vec in rows:
+                    found[key] = np.frombuffer(vec, dtype=np.float32)
+        finally:
+            conn.close()
+        return found
+    
+    def put_many(self, items: List[Tuple[bytes, np.ndarray]]) -> None:
+        """
+        Store vectors in the cache.
+        
+        Args:
+            items: List of (key, vector) tuples
+        """
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.executemany(
+                "INSERT OR IGNORE INTO cache (hash, vec) VALUES (?, ?)",
+                ((key, np.asarray(vec, dtype=np.float32).tobytes()) for key, vec in items)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+
+def _front_code(paths: List[str]) -> Tuple[np.ndarray, List[str]]:
+    """
+    Front-code a list of paths against their predecessors.
+    
+    Paths arrive in directory-walk order, so neighbours share long directory
+    prefixes; only the differing suffix of each path is kept.
+    
+    Returns:
+        Tuple of (uint16 shared-prefix lengths, suffixes)
+    """
+    prefix_lens = np.zeros(len(paths), dtype=np.uint16)
+    suffixes = []
+    previous = ""
+    for i, path in enumerate(paths):
+        shared = min(len(os.path.commonprefix([previous, path])), 0xFFFF)
+        prefix_lens[i] = shared
+        suffixes.append(path[shared:])
+        previous = path
+    return prefix_lens, suffixes
+
+
+def _front_decode(prefix_lens: np.ndarray, suffixes: List[str]) -> List[str]:
+    """Rebuild paths encoded by _front_code."""
+    paths = []
+    previous = ""
+    for shared, suffix in zip(prefix_lens.tolist(), suffixes):
+        previous = previous[:shared] + suffix
+        paths.append(previous)
+    return paths
+
+
+@dataclass
+class ChunkTable:
+    """
+    Column-oriented storage for indexed chunk metadata.
+    
+    Row i holds the chunk for vector i in the FAISS index. File paths and
+    languages are dictionary-encoded so each distinct string is stored once,
+    and line numbers live in contiguous numpy arrays. CodeChunk objects are
+    only built for rows a caller actually reads.
+    """
+    content: List[str]
+    paths: List[str]  # Distinct file paths
+    file_ids: np.ndarray  # int32 index into paths
+    start_line: np.ndarray  # int32
+    end_line: np.ndarray  # int32
+    languages: List[str]  # Distinct languages
+    language_ids: np.ndarray  # int8 index into languages
+    
+    @classmethod
+    def empty(cls) -> "ChunkTable":
+        return cls.from_chunks([])
+    
+    @classmethod
+    def from_chunks(cls, chunks: List[CodeChunk]) -> "ChunkTable":
+        """Build a table from a list of chunks."""
+        path_ids: Dict[str, int] = {}
+        language_ids: Dict[str, int] = {}
+        file_ids = [path_ids.setdefault(c.file_path, len(path_ids)) for c in chunks]
+        langs = [language_ids.setdefault(c.language, len(language_ids)) for c in chunks]
+        
+        return cls(
+            content=[c.content for c in chunks],
+            paths=list(path_ids),
+            file_ids=np.array(file_ids, dtype=np.int32),
+            start_line=np.array([c.start_line for c in chunks], dtype=np.int32),
+            end_line=np.array([c.end_line for c in chunks], dtype=np.int32),
+            languages=list(language_ids),
+            language_ids=np.array(langs, dtype=np.int8),
+        )
+    
+    def __len__(self) -> int:
+        return len(self.content)
+    
+    def __getitem__(self, idx: int) -> CodeChunk:
+        return CodeChunk(
+            content=self.content[idx],
+            file_path=self.paths[self.file_ids[idx]],
+            start_line=int(self.start_line[idx]),
+            end_line=int(self.end_line[idx]),
+            language=self.languages[self.language_ids[idx]],
+        )
+    
+    def without_files(self, file_paths: Iterable[str]) -> List[CodeChunk]:
+        """
+        Get the chunks of every file except the given ones.
+        
+        Args:
+            file_paths: Files whose chunks to leave out
+            
+        Returns:
+            List of CodeChunk objects, in table order
+        """
+        path_ids = {path: i for i, path in enumerate(self.paths)}
+        excluded = [path_ids[path] for path in file_paths if path in path_ids]
+        keep = np.flatnonzero(~np.isin(self.file_ids, excluded))
+        return [self[i] for i in keep.tolist()]
+    
+    def texts(self) -> List[str]:
+        """Get the text to embed for every row."""
+        # Include file path in the text for better context
+        paths = self.paths
+        return [
+            f"File: {paths[file_id]}\nLines {start}-{end}\n\n{content}"
+            for content, file_id, start, end in zip(
+                self.content,
+                self.file_ids.tolist(),
+                self.start_line.tolist(),
+                self.end_line.tolist(),
+            )
+        ]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        prefix_lens, suffixes = _front_code(self.paths)
+        return {
+            "content": self.content,
+            "path_prefix_lens": prefix_lens.tobytes(),
+            "path_suffixes": suffixes,
+            "file_ids": self.file_ids.tobytes(),
+            "start_line": self.start_line.tobytes(),
+            "end_line": self.end_line.tobytes(),
+            "languages": self.languages,
+            "language_ids": self.language_ids.tobytes(),
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ChunkTable":
+        if "path_suffixes" in data:
+            prefix_lens = np.frombuffer(data["path_prefix_lens"], dtype=np.uint16)
+            paths = _front_decode(prefix_lens, data["path_suffixes"])
+        else:
+            paths = data["paths"]
+        
+        return cls(
+            content=data["content"],
+            paths=paths,
+            file_ids=np.frombuffer(data["file_ids"], dtype=np.int32),
+            start_line=np.frombuffer(data["start_line"], dtype=np.int32),
+            end_line=np.frombuffer(data["end_line"], dtype=np.int32),
+            languages=data["languages"],
+            language_ids=np.frombuffer(data["language_ids"], dtype=np.int8),
+        )
+
 
 class FAISSStore:
     """
     FAISS-based vector store for code chunks.
     
-    Stores embeddings in a FAISS index and metadata in a JSON file.
+    Stores embeddings in a FAISS index and metadata in a msgpack file.
     """
     
     def __init__(self, index_path: str):
@@ -32,10 +283,12 @@ class FAISSStore:
         self.index_path.mkdir(parents=True, exist_ok=True)
         
         self.faiss_file = self.index_path / "index.faiss"
-        self.metadata_file = self.index_path / "metadata.json"
+        self.metadata_file = self.index_path / "metadata.msgpack"
+        self.legacy_metadata_file = self.index_path / "metadata.json"
+        self.embedding_cache = EmbeddingCache(self.index_path / "embeddings.db")
         
-        self.index: Optional[faiss.IndexFlatIP] = None
-        self.chunks: List[CodeChunk] = []
+        self.index: Optional[faiss.Index] = None
+        self.chunks = ChunkTable.empty()
     
     def build_index(self, chunks: List[CodeChunk], batch_size: int = 100) -> None:
         """
@@ -51,28 +304,89 @@ class FAISSStore:
         
         logger.info(f"Building index for {len(chunks)} chunks...")
         
-        # Generate embeddings
-        texts = [self._chunk_to_text(chunk) for chunk in chunks]
-        embeddings = embed_texts(texts, batch_size=batch_size)
+        table = ChunkTable.from_chunks(chunks)
+        
+        # Generate embeddings, only calling the API for texts not seen before
+        texts = table.texts()
+        keys = [EmbeddingCache.key(text) for text in texts]
+        cached = self.embedding_cache.get_many(keys)
         
-        # Convert to numpy array
-        embeddings_array = np.array(embeddings, dtype=np.float32)
+        # Write vectors straight into one preallocated buffer, in input order
+        embeddings_array = np.empty((len(keys), EMBEDDING_DIMENSIONS), dtype=np.float32)
+        misses = []
+        for i, key in enumerate(keys):
+            vec = cached.get(key)
+            if vec is None:
+                misses.append(i)
+            else:
+                embeddings_array[i] = vec
+        
+        logger.info(f"Embedding cache: {len(texts) - len(misses)} hits, {len(misses)} misses")
+        if misses:
+            new_embeddings = embed_texts([texts[i] for i in misses], batch_size=batch_size)
+            for i, vec in zip(misses, new_embeddings):
+                embeddings_array[i] = vec
+            self.embedding_cache.put_many([(keys[i], embeddings_array[i]) for i in misses])
         
         # Normalize for cosine similarity (using inner product index)
         faiss.normalize_L2(embeddings_array)
         
         # Create FAISS index (Inner Product = cosine similarity for normalized vectors)
-        self.index = faiss.IndexFlatIP(EMBEDDING_DIMENSIONS)
+        self.index = self._create_index(embeddings_array)
         self.index.add(embeddings_array)
+        self._configure_search()
         
-        self.chunks = chunks
+        self.chunks = table
         
         logger.info(f"Index built with {self.index.ntotal} vectors")
     
-    def _chunk_to_text(self, chunk: CodeChunk) -> str:
-        """Convert a chunk to text for embedding."""
-        # Include file path in the text for better context
-        return f"File: {chunk.file_path}\nLines {chunk.start_line}-{chunk.end_line}\n\n{chunk.content}"
+    def _create_index(self, embeddings_array: np.ndarray) -> faiss.Index:
+        """
+        Create an approximate inner-product index sized for the vectors.
+        
+        HNSW over fp16 vectors gives logarithmic search for small and medium
+        repos at half the memory of float32. Large repos use IVF-PQ, which
+        compresses each vector to PQ_SUBQUANTIZERS bytes.
+        
+        Args:
+            embeddings_array: Normalized vectors the index will hold
+            
+        Returns:
+            An empty index, trained if the index type requires it
+        """
+        n = len(embeddings_array)
+        if n < IVFPQ_MIN_VECTORS:
+            index = faiss.IndexHNSWSQ(
+                EMBEDDING_DIMENSIONS,
+                faiss.ScalarQuantizer.QT_fp16,
+                HNSW_NEIGHBORS,
+                faiss.METRIC_INNER_PRODUCT,
+            )
+            index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+            # fp16 needs no learned ranges, but the index still expects a train call
+            index.train(embeddings_array)
+            return index
+        
+        # ~39 training points per list is the minimum FAISS accepts without warning
+        nlist = min(IVF_MAX_LISTS, n // 39)
+        quantizer = faiss.IndexFlatIP(EMBEDDING_DIMENSIONS)
+        index = faiss.IndexIVFPQ(
+            quantizer, EMBEDDING_DIMENSIONS, nlist, PQ_SUBQUANTIZERS, 8, faiss.METRIC_INNER_PRODUCT
+        )
+        
+        if n > IVF_MAX_TRAINING_VECTORS:
+            sample = np.random.default_rng(0).choice(n, IVF_MAX_TRAINING_VECTORS, replace=False)
+            index.train(embeddings_array[sample])
+        else:
+            index.train(embeddings_array)
+        return index
+    
+    def _configure_search(self) -> None:
+        """Set query-time parameters on the loaded index."""
+        if isinstance(self.index, faiss.IndexHNSW):
+            self.index.hnsw.efSearch = HNSW_EF_SEARCH
+        elif isinstance(self.index, faiss.IndexIVF):
+            self.index.nprobe = IVF_NPROBE
     
     def search(self, query: str, top_k: int = 10) -> List[Tuple[CodeChunk, float]]:
         """
@@ -85,21 +399,39 @@ class FAISSStore:
         Returns:
             List of (chunk, score) tuples
         """
+        return self.search_batch([query], top_k)[0]
+    
+    def search_batch(self, queries: List[str], top_k: int = 10) -> List[List[Tuple[CodeChunk, float]]]:
+        """
+        Search for several queries with one embeddings call and one FAISS call.
+        
+        Args:
+            queries: Search queries
+            top_k: Number of results to return per query
+            
+        Returns:
+            List of (chunk, score) tuple lists, one per query
+        """
         if self.index is None or self.index.ntotal == 0:
             logger.warning("Index is empty")
+            return [[] for _ in queries]
+        if not queries:
             return []
         
-        # Embed query
-        query_embedding = np.array([embed_single(query)], dtype=np.float32)
-        faiss.normalize_L2(query_embedding)
+        # Embed queries
+        query_embeddings = np.array(embed_queries(queries), dtype=np.float32)
+        faiss.normalize_L2(query_embeddings)
         
         # Search
-        scores, indices = self.index.search(query_embedding, min(top_k, self.index.ntotal))
+        scores, indices = self.index.search(query_embeddings, min(top_k, self.index.ntotal))
         
         results = []
-        for score, idx in zip(scores[0], indices[0]):
-            if idx >= 0 and idx < len(self.chunks):
-                results.append((self.chunks[idx], float(score)))
+        for row_scores, row_indices in zip(scores, indices):
+            results.append([
+                (self.chunks[idx], float(score))
+                for score, idx in zip(row_scores, row_indices)
+                if 0 <= idx < len(self.chunks)
+            ])
         
         return results
     
@@ -109,17 +441,29 @@ class FAISSStore:
             logger.warning("No index to save")
             return
         
+        # Write to temp files and rename over the old ones, so a crash
+        # mid-save never leaves a truncated index behind
+        tmp_faiss = self.faiss_file.with_suffix(".faiss.tmp")
+        tmp_metadata = self.metadata_file.with_suffix(".msgpack.tmp")
+        
         # Save FAISS index
-        faiss.write_index(self.index, str(self.faiss_file))
+        faiss.write_index(self.index, str(tmp_faiss))
+        _fsync_file(tmp_faiss)
         
         # Save metadata (chunks)
         metadata = {
-            "chunks": [chunk.to_dict() for chunk in self.chunks],
+            "table": self.chunks.to_dict(),
             "total_chunks": len(self.chunks),
         }
         
-        with open(self.metadata_file, "w") as f:
-            json.dump(metadata, f)
+        with open(tmp_metadata, "wb") as f:
+            msgpack.pack(metadata, f, use_bin_type=True)
+            f.flush()
+            os.fsync(f.fileno())
+        
+        os.replace(tmp_faiss, self.faiss_file)
+        os.replace(tmp_metadata, self.metadata_file)
+        _fsync_dir(self.index_path)
         
         logger.info(f"Index saved to {self.index_path}")
     
@@ -130,38 +474,73 @@ class FAISSStore:
         Returns:
             True if loaded successfully, False otherwise
         """
-        if not self.faiss_file.exists() or not self.metadata_file.exists():
+        has_metadata = self.metadata_file.exists() or self.legacy_metadata_file.exists()
+        if not self.faiss_file.exists() or not has_metadata:
             logger.info("No existing index found")
             return False
         
         try:
             # Load FAISS index
-            self.index = faiss.read_index(str(self.faiss_file))
+            self.index = self._read_index()
+            self._configure_search()
             
             # Load metadata
-            with open(self.metadata_file, "r") as f:
-                metadata = json.load(f)
+            if self.metadata_file.exists():
+                with open(self.metadata_file, "rb") as f:
+                    metadata = msgpack.unpack(f, raw=False)
+            else:
+                # Indexes saved before metadata moved to msgpack
+                with open(self.legacy_metadata_file, "rb") as f:
+                    metadata = orjson.loads(f.read())
+            
+            if "table" in metadata:
+                self.chunks = ChunkTable.from_dict(metadata["table"])
+            else:
+                # Row-oriented metadata from older indexes
+                self.chunks = ChunkTable.from_chunks(
+                    [CodeChunk.from_dict(c) for c in metadata["chunks"]]
+                )
             
-            self.chunks = [CodeChunk.from_dict(c) for c in metadata["chunks"]]
+            # A crash between the two renames in save() leaves mismatched files
+            if self.index.ntotal != len(self.chunks):
+                raise ValueError(
+                    f"Index has {self.index.ntotal} vectors but metadata has {len(self.chunks)} chunks"
+                )
             
             logger.info(f"Loaded index with {self.index.ntotal} vectors")
             return True
             
         except Exception as e:
             logger.error(f"Error loading index: {e}")
+            self.index = None
+            self.chunks = ChunkTable.empty()
             return False
     
+    def _read_index(self) -> faiss.Index:
+        """
+        Read the FAISS index, memory-mapping its vectors where supported.
+        
+        With mmap, vectors are paged in on demand rather than read up front,
+        so loading is fast regardless of index size. Index types FAISS cannot
+        map are read into memory instead.
+        """
+        try:
+            return faiss.read_index(
+                str(self.faiss_file),
+                faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY,
+            )
+        except RuntimeError as e:
+            logger.debug(f"Index cannot be memory-mapped, reading into memory: {e}")
+            return faiss.read_index(str(self.faiss_file))
+    
     def get_stats(self) -> Dict[str, Any]:
         """Get index statistics."""
         if self.index is None:
             return {"status": "not_built", "chunks": 0, "vectors": 0}
         
-        # Count files
-        files = set(chunk.file_path for chunk in self.chunks)
-        
         return {
             "status": "ready",
             "chunks": len(self.chunks),
             "vectors": self.index.ntotal,
-            "files": len(files),
+            "files": len(self.chunks.paths),
         }
@@ -1,16 +1,18 @@
 """Repository manager with SQLite persistence."""
 
+import asyncio
 import os
 import sqlite3
 import logging
-import subprocess
 import shutil
+import threading
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import List, NamedTuple, Optional, Set, Tuple
 from dataclasses import dataclass
 
-from .chunker import chunk_codebase
+from .chunker import CodeChunk, chunk_codebase, chunk_files
+from .embeddings import run_sync
 from .faiss_store import FAISSStore
 
 logger = logging.getLogger(__name__)
@@ -22,6 +24,23 @@ INDEXES_DIR = DATA_DIR / "indexes"
 DB_PATH = DATA_DIR / "repos.db"
 
 
+async def _run_git(*args: str, cwd: Optional[str] = None) -> Tuple[int, str, str]:
+    """
+    Run a git command as an asyncio subprocess.
+    
+    Returns:
+        Tuple of (returncode, stdout, stderr)
+    """
+    proc = await asyncio.create_subprocess_exec(
+        "git", *args,
+        cwd=cwd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    stdout, stderr = await proc.communicate()
+    return proc.returncode, stdout.decode(errors="replace"), stderr.decode(errors="replace")
+
+
 @dataclass
 class RepoInfo:
     """Information about a tracked repository."""
@@ -33,6 +52,7 @@ class RepoInfo:
     chunk_count: int
     last_indexed: Optional[datetime]
     created_at: datetime
+    last_indexed_sha: Optional[str] = None  # Commit the index was built from
     
     @property
     def display_name(self) -> str:
@@ -45,6 +65,16 @@ class RepoInfo:
         return str(INDEXES_DIR / safe_name)
 
 
+class SearchHit(NamedTuple):
+    """A code chunk matching a search query."""
+    score: float
+    file_path: str
+    start_line: int
+    end_line: int
+    language: str
+    content: str
+
+
 class RepoManager:
     """
     Manages repositories and their indexes.
@@ -59,39 +89,62 @@ class RepoManager:
         REPOS_DIR.mkdir(exist_ok=True)
         INDEXES_DIR.mkdir(exist_ok=True)
         
+        # One shared connection; the lock serializes access across threads
+        self._conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._lock = threading.Lock()
+        
         self._init_db()
     
     def _init_db(self):
         """Initialize the SQLite database."""
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS repos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT UNIQUE NOT NULL,
-                url TEXT NOT NULL,
-                local_path TEXT NOT NULL,
-                index_status TEXT DEFAULT 'not_indexed',
-                chunk_count INTEGER DEFAULT 0,
-                last_indexed TIMESTAMP,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        conn.commit()
-        conn.close()
+        with self._lock:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS repos (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT UNIQUE NOT NULL,
+                    url TEXT NOT NULL,
+                    local_path TEXT NOT NULL,
+                    index_status TEXT DEFAULT 'not_indexed',
+                    chunk_count INTEGER DEFAULT 0,
+                    last_indexed TIMESTAMP,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    last_indexed_sha TEXT
+                )
+            """)
+            
+            # Databases created before incremental indexing
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(repos)")}
+            if "last_indexed_sha" not in columns:
+                self._conn.execute("ALTER TABLE repos ADD COLUMN last_indexed_sha TEXT")
+            self._conn.commit()
     
-    def _get_conn(self) -> sqlite3.Connection:
-        """Get a database connection."""
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        return conn
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
     
     def add_repo(self, url: str, clone: bool = True) -> RepoInfo:
         """
         Add a repository to track.
         
+        Args:
+            url: GitHub repository URL
+            clone: Whether to clone the repo
+            
+        Returns:
+            RepoInfo for the added repo
+        """
+        return run_sync(self.add_repo_async(url, clone))
+    
+    async def add_repo_async(self, url: str, clone: bool = True) -> RepoInfo:
+        """
+        Add a repository to track, cloning it without blocking the event loop.
+        
+        Several repos can be added concurrently with asyncio.gather.
+        
         Args:
             url: GitHub repository URL
             clone: Whether to clone the repo
@@ -117,42 +170,30 @@ class RepoManager:
         # Clone if needed
         if clone and not Path(local_path).exists():
             logger.info(f"Cloning {url} to {local_path}")
-            result = subprocess.run(
-                ["git", "clone", url, local_path],
-                capture_output=True,
-                text=True
-            )
-            if result.returncode != 0:
-                raise RuntimeError(f"Failed to clone: {result.stderr}")
+            returncode, _, stderr = await _run_git("clone", url, local_path)
+            if returncode != 0:
+                raise RuntimeError(f"Failed to clone: {stderr}")
         
         # Add to database
-        conn = self._get_conn()
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute(
-                "INSERT INTO repos (name, url, local_path) VALUES (?, ?, ?)",
-                (name, url, local_path)
-            )
-            conn.commit()
-            repo_id = cursor.lastrowid
-        except sqlite3.IntegrityError:
-            # Repo already exists, get existing
-            cursor.execute("SELECT id FROM repos WHERE name = ?", (name,))
-            repo_id = cursor.fetchone()["id"]
-        finally:
-            conn.close()
+        with self._lock:
+            try:
+                cursor = self._conn.execute(
+                    "INSERT INTO repos (name, url, local_path) VALUES (?, ?, ?)",
+                    (name, url, local_path)
+                )
+                self._conn.commit()
+                repo_id = cursor.lastrowid
+            except sqlite3.IntegrityError:
+                # Repo already exists, get existing
+                cursor = self._conn.execute("SELECT id FROM repos WHERE name = ?", (name,))
+                repo_id = cursor.fetchone()["id"]
         
         return self.get_repo(repo_id)
     
     def get_repo(self, repo_id: int) -> Optional[RepoInfo]:
         """Get a repository by ID."""
-        conn = self._get_conn()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT * FROM repos WHERE id = ?", (repo_id,))
-        row = cursor.fetchone()
-        conn.close()
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM repos WHERE id = ?", (repo_id,)).fetchone()
         
         if row:
             return self._row_to_repo_info(row)
@@ -160,12 +201,8 @@ class RepoManager:
     
     def get_repo_by_name(self, name: str) -> Optional[RepoInfo]:
         """Get a repository by name (owner/repo)."""
-        conn = self._get_conn()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT * FROM repos WHERE name = ?", (name,))
-        row = cursor.fetchone()
-        conn.close()
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM repos WHERE name = ?", (name,)).fetchone()
         
         if row:
             return self._row_to_repo_info(row)
@@ -173,12 +210,8 @@ class RepoManager:
     
     def list_repos(self) -> List[RepoInfo]:
         """List all tracked repositories."""
-        conn = self._get_conn()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT * FROM repos ORDER BY created_at DESC")
-        rows = cursor.fetchall()
-        conn.close()
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM repos ORDER BY created_at DESC").fetchall()
         
         return [self._row_to_repo_info(row) for row in rows]
     
@@ -193,12 +226,32 @@ class RepoManager:
             chunk_count=row["chunk_count"],
             last_indexed=datetime.fromisoformat(row["last_indexed"]) if row["last_indexed"] else None,
             created_at=datetime.fromisoformat(row["created_at"]),
+            last_indexed_sha=row["last_indexed_sha"],
         )
     
     def build_index(self, repo_id: int) -> FAISSStore:
         """
         Build a FAISS index for a repository.
         
+        If the repo was indexed before, only files changed since the indexed
+        commit are re-chunked; chunks for the rest are taken from the existing
+        index, and their embeddings come from the store's embedding cache.
+        
+        Args:
+            repo_id: Repository ID
+            
+        Returns:
+            The FAISSStore with the built index
+        """
+        return run_sync(self.build_index_async(repo_id))
+    
+    async def build_index_async(self, repo_id: int) -> FAISSStore:
+        """
+        Build a FAISS index for a repository without blocking the event loop.
+        
+        The pull runs as an asyncio subprocess; chunking, embedding and
+        saving run on a worker thread. See build_index.
+        
         Args:
             repo_id: Repository ID
             
@@ -215,31 +268,17 @@ class RepoManager:
         try:
             # Pull latest changes
             logger.info(f"Pulling latest changes for {repo.name}")
-            subprocess.run(
-                ["git", "pull"],
-                cwd=repo.local_path,
-                capture_output=True
-            )
-            
-            # Chunk the codebase
-            logger.info(f"Chunking codebase for {repo.name}")
-            chunks = chunk_codebase(repo.local_path)
-            
-            # Build FAISS index
-            logger.info(f"Building FAISS index for {repo.name}")
-            store = FAISSStore(repo.index_path)
-            store.build_index(chunks)
-            store.save()
+            head_sha, changed = await self._pull(repo)
+            store, chunks = await asyncio.to_thread(self._index, repo, changed)
             
             # Update database
-            conn = self._get_conn()
-            cursor = conn.cursor()
-            cursor.execute(
-                "UPDATE repos SET index_status = ?, chunk_count = ?, last_indexed = ? WHERE id = ?",
-                ("indexed", len(chunks), datetime.now().isoformat(), repo_id)
-            )
-            conn.commit()
-            conn.close()
+            with self._lock:
+                self._conn.execute(
+                    "UPDATE repos SET index_status = ?, chunk_count = ?, last_indexed = ?, "
+                    "last_indexed_sha = ? WHERE id = ?",
+                    ("indexed", len(chunks), datetime.now().isoformat(), head_sha, repo_id)
+                )
+                self._conn.commit()
             
             logger.info(f"Index built successfully for {repo.name}: {len(chunks)} chunks")
             return store
@@ -249,6 +288,60 @@ class RepoManager:
             self._update_status(repo_id, "error")
             raise
     
+    def _index(self, repo: RepoInfo, changed: Optional[Set[str]]) -> Tuple[FAISSStore, List[CodeChunk]]:
+        """
+        Chunk a pulled repository, then embed, build and save its index.
+        
+        Args:
+            repo: The repository
+            changed: Paths changed since the last index, or None for a full rebuild
+            
+        Returns:
+            Tuple of (store, chunks)
+        """
+        store = FAISSStore(repo.index_path)
+        if changed is not None and store.load():
+            # Re-chunk only what changed since the last index
+            logger.info(f"Re-chunking {len(changed)} changed files for {repo.name}")
+            chunks = store.chunks.without_files(changed) + chunk_files(repo.local_path, changed)
+        else:
+            # Chunk the codebase
+            logger.info(f"Chunking codebase for {repo.name}")
+            chunks = chunk_codebase(repo.local_path)
+        
+        # Build FAISS index
+        logger.info(f"Building FAISS index for {repo.name}")
+        store.build_index(chunks)
+        store.save()
+        return store, chunks
+    
+    async def _pull(self, repo: RepoInfo) -> Tuple[Optional[str], Optional[Set[str]]]:
+        """
+        Pull a repository and find the files changed since it was last indexed.
+        
+        Returns:
+            Tuple of (head_sha, changed_paths). changed_paths is None when
+            there is no usable previous index commit and a full rebuild is needed.
+        """
+        await _run_git("pull", cwd=repo.local_path)
+        
+        returncode, stdout, _ = await _run_git("rev-parse", "HEAD", cwd=repo.local_path)
+        head_sha = stdout.strip() if returncode == 0 else None
+        if not head_sha or not repo.last_indexed_sha:
+            return head_sha, None
+        
+        # Diff against the working tree so uncommitted edits count too;
+        # --no-renames lists both the old and the new path of a rename
+        returncode, stdout, stderr = await _run_git(
+            "diff", "--name-only", "--no-renames", repo.last_indexed_sha,
+            cwd=repo.local_path,
+        )
+        if returncode != 0:
+            # e.g. the indexed commit is gone after a force push
+            logger.info(f"Cannot diff against {repo.last_indexed_sha}, rebuilding: {stderr.strip()}")
+            return head_sha, None
+        return head_sha, set(stdout.splitlines())
+    
     def get_index(self, repo_id: int) -> Optional[FAISSStore]:
         """
         Get the FAISS index for a repository.
@@ -280,24 +373,20 @@ class RepoManager:
                 shutil.rmtree(repo.index_path)
         
         # Remove from database
-        conn = self._get_conn()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM repos WHERE id = ?", (repo_id,))
-        conn.commit()
-        conn.close()
+        with self._lock:
+            self._conn.execute("DELETE FROM repos WHERE id = ?", (repo_id,))
+            self._conn.commit()
     
     def _update_status(self, repo_id: int, status: str) -> None:
         """Update repository index status."""
-        conn = self._get_conn()
-        cursor = conn.cursor()
-        cursor.execute(
-            "UPDATE repos SET index_status = ? WHERE id = ?",
-            (status, repo_id)
-        )
-        conn.commit()
-        conn.close()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE repos SET index_status = ? WHERE id = ?",
+                (status, repo_id)
+            )
+            self._conn.commit()
     
-    def search(self, repo_id: int, query: str, top_k: int = 10) -> List[Dict[str, Any]]:
+    def search(self, repo_id: int, query: str, top_k: int = 10) -> List[SearchHit]:
         """
         Search a repository's index.
         
@@ -307,7 +396,7 @@ class RepoManager:
             top_k: Number of results
             
         Returns:
-            List of search results with chunk info and scores
+            List of matching chunks with their scores, best first
         """
         store = self.get_index(repo_id)
         if not store:
@@ -316,13 +405,8 @@ class RepoManager:
         results = store.search(query, top_k)
         
         return [
-            {
-                "file_path": chunk.file_path,
-                "start_line": chunk.start_line,
-                "end_line": chunk.end_line,
-                "content": chunk.content,
-                "language": chunk.language,
-                "score": score,
-            }
+            SearchHit(
+                score, chunk.file_path, chunk.start_line, chunk.end_line, chunk.language, chunk.content
+            )
             for chunk, score in results
         ]
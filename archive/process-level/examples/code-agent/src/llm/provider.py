@@ -1,5 +1,7 @@
 """LLM provider abstraction."""
 
+from functools import lru_cache
+
 from langchain_anthropic import ChatAnthropic
 from langchain_openai import ChatOpenAI
 from langchain_core.language_models.chat_models import BaseChatModel
@@ -11,6 +13,9 @@ def get_llm(provider: str | None = None, model: str | None = None) -> BaseChatMo
     """
     Get an LLM instance based on the provider and model.
     
+    Instances are cached per (provider, model) so their HTTP connection
+    pools are reused across requests.
+    
     Args:
         provider: "anthropic" or "openai". If None, uses default from settings.
         model: Specific model to use. If None, uses default for the provider.
@@ -25,17 +30,25 @@ def get_llm(provider: str | None = None, model: str | None = None) -> BaseChatMo
     provider = provider or settings.default_llm_provider
     
     if provider == "anthropic":
-        model_name = model or settings.anthropic_model
+        return _make_llm(provider, model or settings.anthropic_model)
+    elif provider == "openai":
+        return _make_llm(provider, model or settings.openai_model)
+    else:
+        raise ValueError(f"Unknown LLM provider: {provider}. Supported: ['anthropic', 'openai']")
+
+
+@lru_cache(maxsize=16)
+def _make_llm(provider: str, model_name: str) -> BaseChatModel:
+    """Create a chat model for a resolved provider and model name."""
+    settings = get_settings()
+    
+    if provider == "anthropic":
         return ChatAnthropic(
             model=model_name,
             api_key=settings.anthropic_api_key,
             max_tokens=8192,
         )
-    elif provider == "openai":
-        model_name = model or settings.openai_model
-        return ChatOpenAI(
-            model=model_name,
-            api_key=settings.openai_api_key,
-        )
-    else:
-        raise ValueError(f"Unknown LLM provider: {provider}. Supported: ['anthropic', 'openai']")
+    return ChatOpenAI(
+        model=model_name,
+        api_key=settings.openai_api_key,
+    )
@@ -77,6 +77,8 @@ class TaskStatusResponse(BaseModel):
     pr_url: Optional[str] = None
     error: Optional[str] = None
     logs: list[str] = Field(default_factory=list)
+    log_offset: int = Field(default=0, description="Absolute index of the first entry in logs")
+    total_logs: int = Field(default=0, description="Total number of log lines for the task")
 
 
 class CommandResult(BaseModel):
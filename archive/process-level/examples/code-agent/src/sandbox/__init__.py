@@ -2,7 +2,8 @@
 
 from .base import BaseSandbox
 from .e2b import E2BSandbox
-from .opensandbox import OpenSandbox
+from .opensandbox import OpenSandbox, OpenSandboxClientScope, close_shared_client
+from .pool import SandboxPool, get_sandbox_pool, close_sandbox_pools, repo_key
 
 
 def get_sandbox(provider: str = "opensandbox", **kwargs) -> BaseSandbox:
@@ -27,4 +28,15 @@ def get_sandbox(provider: str = "opensandbox", **kwargs) -> BaseSandbox:
     raise ValueError(f"Unknown sandbox provider: {provider}. Supported: ['e2b', 'opensandbox']")
 
 
-__all__ = ["BaseSandbox", "E2BSandbox", "OpenSandbox", "get_sandbox"]
+__all__ = [
+    "BaseSandbox",
+    "E2BSandbox",
+    "OpenSandbox",
+    "OpenSandboxClientScope",
+    "close_shared_client",
+    "SandboxPool",
+    "get_sandbox",
+    "get_sandbox_pool",
+    "close_sandbox_pools",
+    "repo_key",
+]
@@ -1,9 +1,13 @@
 """Abstract base class for sandbox providers."""
 
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Awaitable, Callable, Optional
 from src.models import CommandResult
 
+# Receives ("stdout" | "stderr", text) as a command produces output
+OutputCallback = Callable[[str, str], Awaitable[None]]
+
 
 class BaseSandbox(ABC):
     """
@@ -13,8 +17,14 @@ class BaseSandbox(ABC):
     - Create and destroy sandbox instances
     - Execute commands in the sandbox
     - Read and write files in the sandbox
+    
+    Sandboxes are created in large numbers and their attributes are read on
+    every call, so implementations declare `__slots__` instead of using an
+    instance `__dict__`.
     """
     
+    __slots__ = ()
+    
     @property
     @abstractmethod
     def sandbox_id(self) -> Optional[str]:
@@ -45,7 +55,8 @@ class BaseSandbox(ABC):
         self, 
         command: str, 
         workdir: Optional[str] = None,
-        env: Optional[dict[str, str]] = None
+        env: Optional[dict[str, str]] = None,
+        on_chunk: Optional[OutputCallback] = None
     ) -> CommandResult:
         """
         Execute a command in the sandbox.
@@ -54,12 +65,65 @@ class BaseSandbox(ABC):
             command: The command to execute
             workdir: Working directory (optional)
             env: Additional environment variables (optional)
+            on_chunk: Called with partial output while the command runs (optional)
             
         Returns:
             CommandResult with stdout, stderr, and exit_code
         """
         pass
     
+    async def run_script(
+        self,
+        *commands: str,
+        workdir: Optional[str] = None,
+        env: Optional[dict[str, str]] = None
+    ) -> CommandResult:
+        """
+        Run several commands in one shell invocation, stopping at the first failure.
+        
+        Saves a round-trip per command compared to separate run_command calls.
+        
+        Args:
+            commands: Shell commands, run in order
+            workdir: Working directory (optional)
+            env: Additional environment variables (optional)
+            
+        Returns:
+            CommandResult of the combined invocation
+        """
+        return await self.run_command(" && ".join(commands), workdir=workdir, env=env)
+    
+    async def run_commands(
+        self,
+        commands: list[str],
+        workdir: Optional[str] = None,
+        env: Optional[dict[str, str]] = None,
+        stop_on_error: bool = False
+    ) -> list[CommandResult]:
+        """
+        Run several commands one after another, keeping each one's result.
+        
+        Unlike run_script, every command gets its own CommandResult. The
+        default implementation calls run_command for each; providers with a
+        batch API override this to use a single request.
+        
+        Args:
+            commands: Shell commands, run in order
+            workdir: Working directory (optional)
+            env: Additional environment variables (optional)
+            stop_on_error: Skip the remaining commands after one fails
+            
+        Returns:
+            Results of the commands that ran, in order
+        """
+        results = []
+        for command in commands:
+            result = await self.run_command(command, workdir=workdir, env=env)
+            results.append(result)
+            if stop_on_error and result.exit_code != 0:
+                break
+        return results
+    
     @abstractmethod
     async def read_file(self, path: str) -> str:
         """
@@ -76,10 +140,35 @@ class BaseSandbox(ABC):
         """
         pass
     
+    async def read_files(self, paths: list[str]) -> dict[str, str]:
+        """
+        Read several files at once.
+        
+        The default implementation reads them concurrently; providers with a
+        batch API override this to use a single request.
+        
+        Args:
+            paths: Paths to the files in the sandbox
+            
+        Returns:
+            Dict mapping each readable path to its contents.
+            Paths that could not be read are left out.
+        """
+        results = await asyncio.gather(
+            *(self.read_file(path) for path in paths),
+            return_exceptions=True,
+        )
+        return {
+            path: content
+            for path, content in zip(paths, results)
+            if not isinstance(content, BaseException)
+        }
+    
     @abstractmethod
     async def write_file(self, path: str, content: str) -> None:
         """
-        Write content to a file in the sandbox.
+        Write content to a file in the sandbox, creating missing parent
+        directories.
         
         Args:
             path: Path to the file in the sandbox
@@ -96,10 +185,34 @@ class BaseSandbox(ABC):
             path: Directory path (default current directory)
             
         Returns:
-            List of file/directory names
+            List of file/directory names, directories with a trailing "/"
         """
         pass
     
+    async def list_files_batch(self, paths: list[str]) -> dict[str, list[str]]:
+        """
+        List several directories at once.
+        
+        The default implementation lists them concurrently; providers with a
+        batch API override this to use a single request.
+        
+        Args:
+            paths: Directory paths
+            
+        Returns:
+            Dict mapping each listable path to its names, as list_files
+            returns them. Paths that could not be listed are left out.
+        """
+        results = await asyncio.gather(
+            *(self.list_files(path) for path in paths),
+            return_exceptions=True,
+        )
+        return {
+            path: files
+            for path, files in zip(paths, results)
+            if not isinstance(files, BaseException)
+        }
+    
     @abstractmethod
     async def destroy(self) -> None:
         """
@@ -1,11 +1,11 @@
 """E2B sandbox implementation."""
 
+import asyncio
 import logging
-import os
 from typing import Optional
-from e2b import Sandbox
+from e2b import FileType, Sandbox
 
-from .base import BaseSandbox
+from .base import BaseSandbox, OutputCallback
 from src.models import CommandResult
 from src.config import get_settings
 
@@ -19,6 +19,8 @@ class E2BSandbox(BaseSandbox):
     Uses E2B's cloud sandbox for secure code execution.
     """
     
+    __slots__ = ("_sandbox", "_sandbox_id")
+    
     def __init__(self):
         self._sandbox: Optional[Sandbox] = None
         self._sandbox_id: Optional[str] = None
@@ -43,15 +45,18 @@ class E2BSandbox(BaseSandbox):
         Returns:
             The sandbox ID
         """
-        settings = get_settings()
-        
-        # E2B SDK reads API key from environment variable
-        os.environ["E2B_API_KEY"] = settings.e2b_api_key
-        
         logger.info("Creating E2B sandbox...")
         
-        # Create sandbox using the class method (constructor is deprecated)
-        self._sandbox = Sandbox.create(timeout=timeout)
+        # Create sandbox using the class method (constructor is deprecated).
+        # The key is passed per call rather than written to os.environ; with
+        # no key configured the SDK falls back to E2B_API_KEY itself.
+        # The SDK call blocks, so run it off the event loop: pools create
+        # sandboxes in the background while tasks are running.
+        self._sandbox = await asyncio.to_thread(
+            Sandbox.create,
+            timeout=timeout,
+            api_key=get_settings().e2b_api_key or None,
+        )
         self._sandbox_id = self._sandbox.sandbox_id
         
         logger.info(f"Created sandbox: {self._sandbox_id}")
@@ -70,10 +75,11 @@ class E2BSandbox(BaseSandbox):
         logger.info("Setting up sandbox environment...")
         
         # Check if gh is installed, install if not
-        result = self._sandbox.commands.run("which gh || echo 'not found'")
+        result = await asyncio.to_thread(self._sandbox.commands.run, "which gh || echo 'not found'")
         if "not found" in result.stdout:
             logger.info("Installing GitHub CLI...")
-            self._sandbox.commands.run(
+            await asyncio.to_thread(
+                self._sandbox.commands.run,
                 "curl -fsSL https://cli.github.com/packages/githubcli-archive-keyring.gpg | sudo dd of=/usr/share/keyrings/githubcli-archive-keyring.gpg && "
                 "echo 'deb [arch=$(dpkg --print-architecture) signed-by=/usr/share/keyrings/githubcli-archive-keyring.gpg] https://cli.github.com/packages stable main' | sudo tee /etc/apt/sources.list.d/github-cli.list > /dev/null && "
                 "sudo apt update && sudo apt install gh -y",
@@ -86,7 +92,8 @@ class E2BSandbox(BaseSandbox):
         self, 
         command: str, 
         workdir: Optional[str] = None,
-        env: Optional[dict[str, str]] = None
+        env: Optional[dict[str, str]] = None,
+        on_chunk: Optional[OutputCallback] = None
     ) -> CommandResult:
         """
         Execute a command in the sandbox.
@@ -95,6 +102,8 @@ class E2BSandbox(BaseSandbox):
             command: The command to execute
             workdir: Working directory
             env: Additional environment variables
+            on_chunk: Called with the command's output. The E2B client blocks
+                until the command finishes, so output arrives all at once.
             
         Returns:
             CommandResult with stdout, stderr, exit_code
@@ -111,6 +120,12 @@ class E2BSandbox(BaseSandbox):
             timeout=300  # 5 minute timeout per command
         )
         
+        if on_chunk:
+            if result.stdout:
+                await on_chunk("stdout", result.stdout)
+            if result.stderr:
+                await on_chunk("stderr", result.stderr)
+        
         return CommandResult(
             stdout=result.stdout,
             stderr=result.stderr,
@@ -158,25 +173,16 @@ class E2BSandbox(BaseSandbox):
             path: Directory path
             
         Returns:
-            List of file/directory names
+            List of file/directory names, directories with a trailing "/"
         """
         if not self._sandbox:
             raise RuntimeError("Sandbox not created. Call create() first.")
         
-        result = await self.run_command(f"ls -la {path}")
-        if result.exit_code != 0:
-            raise FileNotFoundError(f"Directory not found: {path}")
-        
-        # Parse ls output (skip total line and . / ..)
-        lines = result.stdout.strip().split("\n")
-        files = []
-        for line in lines[1:]:  # Skip "total" line
-            parts = line.split()
-            if len(parts) >= 9:
-                name = parts[-1]
-                if name not in [".", ".."]:
-                    files.append(name)
-        return files
+        try:
+            entries = self._sandbox.files.list(path)
+        except Exception as e:
+            raise FileNotFoundError(f"Directory not found: {path}") from e
+        return [entry.name + "/" if entry.type == FileType.DIR else entry.name for entry in entries]
     
     async def destroy(self) -> None:
         """Destroy the sandbox."""
@@ -1,16 +1,122 @@
 """OpenSandbox implementation using HTTP API."""
 
+import asyncio
+import json
 import logging
+import posixpath
+import time
 import uuid
+import weakref
 import httpx
+from collections import OrderedDict
+from contextvars import ContextVar
 from typing import Optional
 
-from .base import BaseSandbox
+from .base import BaseSandbox, OutputCallback
 from src.models import CommandResult
 from src.config import get_settings
 
 logger = logging.getLogger(__name__)
 
+# Client for the current scope (see OpenSandboxClientScope)
+_client_cv: ContextVar[Optional[httpx.AsyncClient]] = ContextVar("opensandbox_client", default=None)
+
+# Fallback client per event loop for code running outside any scope
+_shared_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+# Working directory sessions are created with. Commands may run elsewhere,
+# but the session's own cwd never changes.
+SESSION_CWD = "/home/user"
+
+# File contents kept per session, revalidated with the server's ETag
+FILE_CACHE_SIZE = 256
+FILE_CACHE_MAX_BYTES = 1_000_000
+# How long a missing file is remembered, in seconds
+MISSING_FILE_TTL = 1.0
+
+# (git, gh) versions by server URL; every session on a server runs the same image
+_tool_versions: dict[str, tuple[str, str]] = {}
+VERSION_MARKER = "---GH---"
+VERSION_CHECK = f"git --version; echo {VERSION_MARKER}; gh --version"
+
+
+def _new_client() -> httpx.AsyncClient:
+    # Pool settings live on the transport: httpx ignores the client's
+    # http2/limits arguments when a transport is given. HTTP/2 is negotiated
+    # over TLS; against a plain http:// server, requests reuse HTTP/1.1
+    # keep-alive connections instead, kept open for the length of a task.
+    transport = httpx.AsyncHTTPTransport(
+        http2=True,
+        limits=httpx.Limits(
+            max_connections=128,
+            max_keepalive_connections=64,
+            keepalive_expiry=300.0,
+        ),
+        retries=1,  # Retry once if a pooled connection fails to connect
+    )
+    return httpx.AsyncClient(
+        transport=transport,
+        timeout=httpx.Timeout(300.0, connect=5.0),  # 5 minute timeout
+    )
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Get the HTTP client shared by all OpenSandbox instances.
+    
+    Returns the client of the enclosing OpenSandboxClientScope, or else one
+    client shared by everything on the running event loop.
+    """
+    client = _client_cv.get()
+    if client is not None:
+        return client
+    
+    loop = asyncio.get_running_loop()
+    client = _shared_clients.get(loop)
+    if client is None or client.is_closed:
+        client = _shared_clients[loop] = _new_client()
+    return client
+
+
+def _entry_name(entry: dict) -> str:
+    """Get a listing entry's name, with a trailing "/" for directories."""
+    return entry["name"] + "/" if entry["is_directory"] else entry["name"]
+
+
+async def close_shared_client() -> None:
+    """Close the fallback client of the running event loop, if any."""
+    client = _shared_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+class OpenSandboxClientScope:
+    """
+    Async context manager that provides one client to all code inside it.
+    
+    Tasks created inside the scope inherit the client. Nested scopes reuse
+    the outer client, and only the outermost scope closes it.
+    """
+    
+    def __init__(self):
+        self._token = None
+    
+    async def __aenter__(self) -> httpx.AsyncClient:
+        client = _client_cv.get()
+        if client is None:
+            client = _new_client()
+            self._token = _client_cv.set(client)
+        return client
+    
+    async def __aexit__(self, *exc_info) -> None:
+        if self._token is not None:
+            client = _client_cv.get()
+            _client_cv.reset(self._token)
+            self._token = None
+            await client.aclose()
+
 
 class OpenSandbox(BaseSandbox):
     """
@@ -20,11 +126,15 @@ class OpenSandbox(BaseSandbox):
     Communicates via HTTP API.
     """
     
+    __slots__ = ("_base_url", "_session_id", "_workdir", "_file_cache", "_missing")
+    
     def __init__(self, base_url: str = "http://localhost:8080"):
         self._base_url = base_url
         self._session_id: Optional[str] = None
-        self._client = httpx.Client(timeout=300)  # 5 minute timeout
         self._workdir = "/home/user/repo"
+        # path -> (etag, content) and path -> time a "not found" expires
+        self._file_cache: OrderedDict[str, tuple[str, str]] = OrderedDict()
+        self._missing: dict[str, float] = {}
     
     @property
     def sandbox_id(self) -> Optional[str]:
@@ -48,10 +158,15 @@ class OpenSandbox(BaseSandbox):
         """
         logger.info("Creating OpenSandbox session...")
         
-        # Create session with initial environment
-        response = self._client.post(
+        # Create session with initial environment; the server creates the
+        # working directory, so the repo can be cloned into it right away
+        payload = {"env": {}, "cwd": SESSION_CWD}
+        if self._base_url not in _tool_versions:
+            # Check tool versions as part of creation rather than a later /run
+            payload["init"] = [["/bin/sh", "-c", VERSION_CHECK]]
+        response = await get_client().post(
             f"{self._base_url}/sessions",
-            json={"env": {}}
+            json=payload
         )
         response.raise_for_status()
         
@@ -61,32 +176,41 @@ class OpenSandbox(BaseSandbox):
         logger.info(f"Created session: {self._session_id}")
         
         # Set up the sandbox environment
-        await self._setup_sandbox()
+        await self._setup_sandbox(data.get("init_results"))
         
         return self._session_id
     
-    async def _setup_sandbox(self) -> None:
-        """Set up the sandbox with required directories."""
+    async def _setup_sandbox(self, init_results: Optional[list[dict]] = None) -> None:
+        """
+        Check the tools the agent needs.
+        
+        Args:
+            init_results: Results of the creation-time init commands, if the
+                server ran them; otherwise the check runs as a command
+        """
         if not self._session_id:
             return
         
         logger.info("Setting up sandbox environment...")
         
-        # Create parent directory for repo (but not the repo dir itself - clone will create it)
-        await self.run_command("mkdir -p /home/user")
-        
-        # Set initial working directory to /home/user
-        response = self._client.post(
-            f"{self._base_url}/sessions/{self._session_id}/cwd",
-            json={"cwd": "/home/user"}
-        )
-        
-        # Check git and gh are available
-        result = await self.run_command("git --version")
-        logger.info(f"Git version: {result.stdout.strip()}")
-        
-        result = await self.run_command("gh --version")
-        logger.info(f"GitHub CLI: {result.stdout.split(chr(10))[0] if result.exit_code == 0 else 'not available'}")
+        versions = _tool_versions.get(self._base_url)
+        if versions is None:
+            if init_results:
+                stdout = init_results[0].get("stdout", "")
+                exit_code = init_results[0].get("exit_code")
+            else:
+                result = await self.run_command(VERSION_CHECK)
+                stdout, exit_code = result.stdout, result.exit_code
+            git_output, _, gh_output = stdout.partition(VERSION_MARKER)
+            versions = (
+                git_output.strip() or "not available",
+                gh_output.strip().split("\n")[0] or "not available",
+            )
+            if exit_code == 0:
+                _tool_versions[self._base_url] = versions
+        git_version, gh_version = versions
+        logger.info(f"Git version: {git_version}")
+        logger.info(f"GitHub CLI: {gh_version}")
         
         logger.info("Sandbox setup complete")
     
@@ -94,7 +218,8 @@ class OpenSandbox(BaseSandbox):
         self, 
         command: str, 
         workdir: Optional[str] = None,
-        env: Optional[dict[str, str]] = None
+        env: Optional[dict[str, str]] = None,
+        on_chunk: Optional[OutputCallback] = None
     ) -> CommandResult:
         """
         Execute a command in the sandbox.
@@ -103,6 +228,8 @@ class OpenSandbox(BaseSandbox):
             command: The command to execute
             workdir: Working directory
             env: Additional environment variables
+            on_chunk: Called with partial output as it is produced; the
+                command then runs through the streaming endpoint
             
         Returns:
             CommandResult with stdout, stderr, exit_code
@@ -111,32 +238,17 @@ class OpenSandbox(BaseSandbox):
             raise RuntimeError("Session not created. Call create() first.")
         
         logger.debug(f"Running command: {command}")
+        # The command may create files we remember as missing
+        self._missing.clear()
         
-        # Set environment variables if provided
-        if env:
-            self._client.post(
-                f"{self._base_url}/sessions/{self._session_id}/env",
-                json={"env": env}
-            )
+        payload = self._run_payload(command, workdir, env)
         
-        # Set working directory if provided
-        if workdir:
-            self._client.post(
-                f"{self._base_url}/sessions/{self._session_id}/cwd",
-                json={"cwd": workdir}
-            )
+        if on_chunk:
+            return await self._run_streaming(payload, on_chunk)
         
-        # Run the command via shell
-        # OpenSandbox expects command as array, wrap in shell for string commands
-        response = self._client.post(
+        response = await get_client().post(
             f"{self._base_url}/sessions/{self._session_id}/run",
-            json={
-                "command": ["/bin/sh", "-c", command],
-                "time": 300000,   # 5 minute timeout in ms
-                "mem": 4194304,   # 4GB memory limit in KB
-                "fsize": 102400,  # 100MB max file size in KB
-                "nofile": 1024,   # 1024 open files (git clone needs many)
-            }
+            json=payload
         )
         
         if response.status_code != 200:
@@ -148,8 +260,83 @@ class OpenSandbox(BaseSandbox):
                 exit_code=1
             )
         
-        data = response.json()
+        return self._command_result(response.json())
+    
+    async def run_commands(
+        self,
+        commands: list[str],
+        workdir: Optional[str] = None,
+        env: Optional[dict[str, str]] = None,
+        stop_on_error: bool = False
+    ) -> list[CommandResult]:
+        """
+        Run several commands one after another in a single request.
+        
+        Args:
+            commands: Shell commands, run in order
+            workdir: Working directory
+            env: Additional environment variables
+            stop_on_error: Skip the remaining commands after one fails
+            
+        Returns:
+            Results of the commands that ran, in order. If the request fails,
+            every command gets a failed result (only the first with
+            stop_on_error, as the rest would have been skipped).
+        """
+        if not self._session_id:
+            raise RuntimeError("Session not created. Call create() first.")
+        if not commands:
+            return []
         
+        logger.debug(f"Running {len(commands)} commands: {commands}")
+        self._missing.clear()
+        
+        response = await get_client().post(
+            f"{self._base_url}/sessions/{self._session_id}/run/batch",
+            json={
+                "commands": [self._run_payload(c, workdir, env) for c in commands],
+                "stop_on_error": stop_on_error,
+            }
+        )
+        
+        if response.status_code != 200:
+            error_text = response.text
+            logger.error(f"Batch command failed: {error_text}")
+            failed = 1 if stop_on_error else len(commands)
+            return [
+                CommandResult(stdout="", stderr=f"HTTP error: {error_text}", exit_code=1)
+                for _ in range(failed)
+            ]
+        
+        return [self._command_result(data) for data in response.json()["results"]]
+    
+    @staticmethod
+    def _run_payload(
+        command: str,
+        workdir: Optional[str],
+        env: Optional[dict[str, str]]
+    ) -> dict:
+        """Build the request body for running a shell command."""
+        # Run the command via shell
+        # OpenSandbox expects command as array, wrap in shell for string commands.
+        # env and cwd apply to this command only, so one request is enough and
+        # concurrent commands on the same session can't see each other's settings.
+        payload = {
+            "command": ["/bin/sh", "-c", command],
+            "time": 300000,   # 5 minute timeout in ms
+            "mem": 4194304,   # 4GB memory limit in KB
+            "fsize": 102400,  # 100MB max file size in KB
+            "nofile": 1024,   # 1024 open files (git clone needs many)
+        }
+        if env:
+            payload["env"] = env
+        if workdir:
+            payload["cwd"] = workdir
+        return payload
+    
+    @staticmethod
+    def _command_result(data: dict) -> CommandResult:
+        """Convert a run result from the server into a CommandResult."""
         exit_code = data.get("exit_code", 0)
         if data.get("signal"):
             # Process was killed by signal
@@ -161,12 +348,62 @@ class OpenSandbox(BaseSandbox):
             exit_code=exit_code
         )
     
+    async def _run_streaming(self, payload: dict, on_chunk: OutputCallback) -> CommandResult:
+        """
+        Run a command through the server-sent events endpoint.
+        
+        Output is passed to `on_chunk` as it arrives and also collected into
+        the returned CommandResult.
+        """
+        output = {"stdout": [], "stderr": []}
+        status: Optional[dict] = None
+        event = "message"
+        data: list[str] = []
+        
+        async with get_client().stream(
+            "POST",
+            f"{self._base_url}/sessions/{self._session_id}/run/stream",
+            json=payload
+        ) as response:
+            if response.status_code != 200:
+                error_text = (await response.aread()).decode(errors="replace")
+                logger.error(f"Command failed: {error_text}")
+                return CommandResult(stdout="", stderr=f"HTTP error: {error_text}", exit_code=1)
+            
+            async for line in response.aiter_lines():
+                if line.startswith("event:"):
+                    event = line[6:].strip()
+                elif line.startswith("data:"):
+                    data.append(line[5:].lstrip())
+                elif not line and data:
+                    # Blank line ends an event
+                    value = json.loads("\n".join(data))
+                    if event in output:
+                        output[event].append(value)
+                        await on_chunk(event, value)
+                    elif event == "exit":
+                        status = value
+                    elif event == "error":
+                        output["stderr"].append(f"HTTP error: {value}")
+                    event, data = "message", []
+        
+        stdout = "".join(output["stdout"])
+        stderr = "".join(output["stderr"])
+        if status is None:
+            return CommandResult(stdout=stdout, stderr=stderr, exit_code=1)
+        
+        exit_code = status.get("exit_code") or 0
+        if status.get("signal"):
+            # Process was killed by signal
+            exit_code = 128 + status["signal"]
+        return CommandResult(stdout=stdout, stderr=stderr, exit_code=exit_code)
+    
     async def read_file(self, path: str) -> str:
         """
         Read a file from the sandbox.
         
         Args:
-            path: Path to the file
+            path: Path to the file (relative paths resolve from the session cwd)
             
         Returns:
             File contents
@@ -174,40 +411,84 @@ class OpenSandbox(BaseSandbox):
         if not self._session_id:
             raise RuntimeError("Session not created. Call create() first.")
         
-        result = await self.run_command(f"cat {path}")
-        if result.exit_code != 0:
+        expires = self._missing.get(path)
+        if expires is not None:
+            if time.monotonic() < expires:
+                raise FileNotFoundError(f"File not found: {path}")
+            del self._missing[path]
+        
+        # Revalidate a cached copy; the server answers 304 if the file's
+        # mtime and size are unchanged
+        cached = self._file_cache.get(path)
+        response = await get_client().get(
+            f"{self._base_url}/sessions/{self._session_id}/files",
+            params={"path": path},
+            headers={"If-None-Match": cached[0]} if cached else None
+        )
+        if response.status_code == 304 and cached:
+            self._file_cache.move_to_end(path)
+            return cached[1]
+        
+        self._file_cache.pop(path, None)
+        if response.status_code == 404:
+            self._missing[path] = time.monotonic() + MISSING_FILE_TTL
             raise FileNotFoundError(f"File not found: {path}")
+        response.raise_for_status()
         
-        return result.stdout
+        content = response.content.decode("utf-8", errors="replace")
+        etag = response.headers.get("etag")
+        if etag and len(response.content) <= FILE_CACHE_MAX_BYTES:
+            self._file_cache[path] = (etag, content)
+            if len(self._file_cache) > FILE_CACHE_SIZE:
+                self._file_cache.popitem(last=False)
+        return content
     
-    async def write_file(self, path: str, content: str) -> None:
+    async def read_files(self, paths: list[str]) -> dict[str, str]:
         """
-        Write content to a file in the sandbox.
+        Read several files in a single request.
         
         Args:
-            path: Path to the file
-            content: Content to write
+            paths: Paths to the files (relative paths resolve from the session cwd)
+            
+        Returns:
+            Dict mapping each readable path to its contents.
+            Paths that could not be read are left out.
         """
         if not self._session_id:
             raise RuntimeError("Session not created. Call create() first.")
         
-        # Ensure parent directory exists
-        dir_path = "/".join(path.rsplit("/", 1)[:-1]) if "/" in path else "."
-        if dir_path and dir_path != ".":
-            await self.run_command(f"mkdir -p {dir_path}")
+        response = await get_client().post(
+            f"{self._base_url}/sessions/{self._session_id}/files/read-batch",
+            json={"paths": paths}
+        )
+        response.raise_for_status()
         
-        # Use heredoc to write file content safely
-        # Escape any backticks and dollar signs in content
-        escaped_content = content.replace("\\", "\\\\").replace("$", "\\$").replace("`", "\\`")
+        return response.json()["files"]
+    
+    async def write_file(self, path: str, content: str) -> None:
+        """
+        Write content to a file in the sandbox.
         
-        # Write via base64 to handle special characters
-        import base64
-        b64_content = base64.b64encode(content.encode()).decode()
-        result = await self.run_command(f"echo '{b64_content}' | base64 -d > {path}")
+        The raw bytes are sent as the request body; the server creates any
+        missing parent directories.
+        
+        Args:
+            path: Path to the file (relative paths resolve from the session cwd)
+            content: Content to write
+        """
+        if not self._session_id:
+            raise RuntimeError("Session not created. Call create() first.")
         
-        if result.exit_code != 0:
-            raise RuntimeError(f"Failed to write file: {result.stderr}")
+        response = await get_client().put(
+            f"{self._base_url}/sessions/{self._session_id}/files",
+            params={"path": path},
+            content=content.encode()
+        )
+        if response.status_code >= 400:
+            raise RuntimeError(f"Failed to write file: {response.text}")
         
+        self._file_cache.pop(path, None)
+        self._missing.pop(path, None)
         logger.debug(f"Wrote file: {path}")
     
     async def list_files(self, path: str = ".") -> list[str]:
@@ -218,35 +499,55 @@ class OpenSandbox(BaseSandbox):
             path: Directory path
             
         Returns:
-            List of file/directory names
+            List of file/directory names, directories with a trailing "/"
         """
         if not self._session_id:
             raise RuntimeError("Session not created. Call create() first.")
         
-        result = await self.run_command(f"ls -la {path}")
-        if result.exit_code != 0:
+        full_path = posixpath.join(SESSION_CWD, path)
+        response = await get_client().get(
+            f"{self._base_url}/sessions/{self._session_id}/files/list",
+            params={"path": full_path}
+        )
+        if response.status_code == 404:
             raise FileNotFoundError(f"Directory not found: {path}")
+        response.raise_for_status()
         
-        # Parse ls output (skip total line and . / ..)
-        lines = result.stdout.strip().split("\n")
-        files = []
-        for line in lines[1:]:  # Skip "total" line
-            parts = line.split()
-            if len(parts) >= 9:
-                name = parts[-1]
-                if name not in [".", ".."]:
-                    files.append(name)
-        return files
+        return [_entry_name(entry) for entry in response.json()["files"]]
+    
+    async def list_files_batch(self, paths: list[str]) -> dict[str, list[str]]:
+        """
+        List several directories in a single request.
+        
+        Args:
+            paths: Directory paths
+            
+        Returns:
+            Dict mapping each listable path to its names, as list_files
+            returns them. Paths that could not be listed are left out.
+        """
+        if not self._session_id:
+            raise RuntimeError("Session not created. Call create() first.")
+        
+        response = await get_client().post(
+            f"{self._base_url}/sessions/{self._session_id}/files/list-batch",
+            json={"paths": paths}
+        )
+        response.raise_for_status()
+        
+        listings = response.json()["listings"]
+        return {
+            path: [_entry_name(entry) for entry in entries]
+            for path, entries in listings.items()
+        }
     
     async def destroy(self) -> None:
         """Destroy the session."""
         if self._session_id:
             logger.info(f"Destroying session: {self._session_id}")
             try:
-                self._client.delete(f"{self._base_url}/sessions/{self._session_id}")
+                await get_client().delete(f"{self._base_url}/sessions/{self._session_id}")
             except Exception as e:
                 logger.warning(f"Error destroying session: {e}")
             finally:
                 self._session_id = None
-        
-        self._client.close()
@@ -0,0 +1,303 @@
+"""Warm pool of pre-created sandboxes."""
+
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Optional
+
+from .base import BaseSandbox
+from src.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Puts a released checkout back on the remote's default branch, discarding
+# the task's changes and deleting every other local branch so the next task
+# can create its branch under any name
+RESET_CHECKOUT_COMMAND = (
+    'b=$(git symbolic-ref --short refs/remotes/origin/HEAD) && b="${b#origin/}"'
+    ' && git checkout -q -f "$b" && git clean -fdxq'
+    " && git for-each-ref --format='%(refname:short)' refs/heads"
+    ' | grep -vxF "$b" | xargs -r git branch -q -D'
+)
+
+
+def repo_key(repo_url: str, github_token: str) -> str:
+    """
+    Build the cache key for a sandbox holding a cloned repository.
+
+    The token is part of the key because the checkout was fetched with the
+    user's credentials, so it is only ever handed back to the same user.
+    """
+    return hashlib.sha256(f"{repo_url}\0{github_token}".encode()).hexdigest()
+
+
+class SandboxPool:
+    """
+    Keeps sandboxes created ahead of time so tasks skip session creation.
+
+    Two kinds of sandboxes are pooled:
+    - Fresh sandboxes, created in the background up to `min_warm`
+    - Released sandboxes that still hold a cloned repository, keyed by `repo_key`
+
+    Sandboxes idle for longer than `max_idle` seconds are destroyed instead of
+    being handed out, since the server expires idle sessions on its own. So
+    are sandboxes with less than `min_remaining` seconds left of the `timeout`
+    they were created with, so a task never starts on one about to be killed.
+    Warm sandboxes are replaced in the background shortly before either
+    happens, so an acquire after a quiet period doesn't have to create one.
+
+    Until `start()` is called the pool holds nothing: `acquire()` creates a
+    sandbox on demand and `release()` destroys it.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        min_warm: int = 2,
+        max_starting: int = 2,
+        max_idle: float = 240.0,
+        timeout: int = 1800,
+        min_remaining: float = 600.0,
+        **sandbox_kwargs,
+    ):
+        self.provider = provider
+        self.min_warm = min_warm
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self.min_remaining = min_remaining
+        self._sandbox_kwargs = sandbox_kwargs
+        self._warm: asyncio.Queue[tuple[BaseSandbox, float]] = asyncio.Queue()
+        self._by_repo: dict[str, list[tuple[BaseSandbox, float]]] = {}
+        # Creation time of every sandbox the pool created and hasn't destroyed
+        self._created_at: dict[str, float] = {}
+        self._starting = asyncio.Semaphore(max_starting)
+        self._pending = 0
+        self._tasks: set[asyncio.Task] = set()
+        self._started = False
+        self._closed = False
+
+    async def start(self) -> None:
+        """Start filling the pool with warm sandboxes."""
+        self._started = True
+        self._refill()
+        self._spawn(self._expire_loop())
+
+    async def acquire(self, key: Optional[str] = None) -> tuple[BaseSandbox, bool]:
+        """
+        Take a sandbox from the pool, creating one if none are ready.
+
+        Args:
+            key: Repository key (see `repo_key`) to look for a reusable checkout
+
+        Returns:
+            Tuple of (sandbox, reused) where reused is True if the sandbox
+            already holds the repository checkout for `key`
+        """
+        if key:
+            cached = self._by_repo.get(key, [])
+            while cached:
+                sandbox, released_at = cached.pop()
+                if self._is_usable(sandbox, released_at):
+                    logger.info(f"Reusing sandbox {sandbox.sandbox_id} for cached checkout")
+                    return sandbox, True
+                self._discard(sandbox)
+            self._by_repo.pop(key, None)
+
+        sandbox = None
+        while not self._warm.empty():
+            candidate, created_at = self._warm.get_nowait()
+            if self._is_usable(candidate, created_at):
+                sandbox = candidate
+                break
+            self._discard(candidate)
+
+        self._refill()
+
+        if sandbox is None:
+            sandbox = await self._create()
+        return sandbox, False
+
+    async def release(
+        self,
+        sandbox: BaseSandbox,
+        key: Optional[str] = None,
+        workdir: Optional[str] = None,
+        reusable: bool = True,
+    ) -> None:
+        """
+        Return a sandbox after a task finishes.
+
+        If the sandbox is reusable its checkout is reset to the default branch
+        and kept for the next task on the same repository, otherwise it is
+        destroyed.
+
+        Args:
+            sandbox: The sandbox to release
+            key: Repository key the checkout belongs to
+            workdir: Repository directory to reset
+            reusable: Whether the sandbox may be handed out again
+        """
+        if not self._started or self._closed or not reusable or not key or not workdir:
+            await self._destroy(sandbox)
+            return
+
+        result = await sandbox.run_command(RESET_CHECKOUT_COMMAND, workdir=workdir)
+        if result.exit_code != 0:
+            logger.warning(f"Could not reset sandbox {sandbox.sandbox_id}: {result.stderr}")
+            await self._destroy(sandbox)
+            return
+
+        self._by_repo.setdefault(key, []).append((sandbox, time.monotonic()))
+
+    async def close(self) -> None:
+        """Destroy all pooled sandboxes and stop refilling."""
+        self._closed = True
+        for task in list(self._tasks):
+            task.cancel()
+
+        sandboxes = []
+        while not self._warm.empty():
+            sandboxes.append(self._warm.get_nowait()[0])
+        for cached in self._by_repo.values():
+            sandboxes.extend(sandbox for sandbox, _ in cached)
+        self._by_repo.clear()
+
+        await asyncio.gather(*(self._destroy(s) for s in sandboxes), return_exceptions=True)
+
+    def _is_usable(self, sandbox: BaseSandbox, since: float, margin: float = 0.0) -> bool:
+        """
+        Check whether a pooled sandbox can still be handed out `margin` seconds from now.
+
+        Args:
+            sandbox: The pooled sandbox
+            since: When it was created or last released
+            margin: Seconds ahead to check for
+        """
+        now = time.monotonic() + margin
+        if now - since >= self.max_idle:
+            return False
+        created_at = self._created_at.get(sandbox.sandbox_id, since)
+        return now < created_at + self.timeout - self.min_remaining
+    
+    async def _expire_loop(self) -> None:
+        """Periodically replace pooled sandboxes that are about to expire."""
+        interval = self.max_idle / 4
+        while not self._closed:
+            await asyncio.sleep(interval)
+            self._expire(margin=interval)
+    
+    def _expire(self, margin: float) -> None:
+        """Destroy sandboxes that won't be usable for another `margin` seconds."""
+        warm = []
+        while not self._warm.empty():
+            warm.append(self._warm.get_nowait())
+        for item in self._keep_fresh(warm, margin):
+            self._warm.put_nowait(item)
+        
+        for key, cached in list(self._by_repo.items()):
+            kept = self._keep_fresh(cached, margin)
+            if kept:
+                self._by_repo[key] = kept
+            else:
+                del self._by_repo[key]
+        
+        self._refill()
+    
+    def _keep_fresh(
+        self, items: list[tuple[BaseSandbox, float]], margin: float
+    ) -> list[tuple[BaseSandbox, float]]:
+        """Filter (sandbox, timestamp) pairs, discarding the stale ones."""
+        fresh = []
+        for sandbox, since in items:
+            if self._is_usable(sandbox, since, margin):
+                fresh.append((sandbox, since))
+            else:
+                self._discard(sandbox)
+        return fresh
+
+    async def _create(self) -> BaseSandbox:
+        """Create a new sandbox, respecting the concurrent start limit."""
+        from . import get_sandbox
+
+        async with self._starting:
+            sandbox = get_sandbox(self.provider, **self._sandbox_kwargs)
+            await sandbox.create(timeout=self.timeout)
+            self._created_at[sandbox.sandbox_id] = time.monotonic()
+            return sandbox
+
+    def _refill(self) -> None:
+        """Schedule background creation until `min_warm` sandboxes are ready."""
+        if not self._started or self._closed:
+            return
+        missing = self.min_warm - self._warm.qsize() - self._pending
+        for _ in range(max(missing, 0)):
+            self._pending += 1
+            self._spawn(self._warm_one())
+
+    async def _warm_one(self) -> None:
+        try:
+            sandbox = await self._create()
+        except Exception as e:
+            logger.warning(f"Failed to pre-create {self.provider} sandbox: {e}")
+            return
+        finally:
+            self._pending -= 1
+
+        if self._closed:
+            await self._destroy(sandbox)
+            return
+        self._warm.put_nowait((sandbox, time.monotonic()))
+        logger.info(f"Warm sandbox ready: {sandbox.sandbox_id}")
+
+    async def _destroy(self, sandbox: BaseSandbox) -> None:
+        """Destroy a sandbox and forget its creation time."""
+        self._created_at.pop(sandbox.sandbox_id, None)
+        await sandbox.destroy()
+
+    def _discard(self, sandbox: BaseSandbox) -> None:
+        """Destroy an expired sandbox in the background."""
+        self._spawn(self._destroy(sandbox))
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+
+# Pools by provider name
+_pools: dict[str, SandboxPool] = {}
+
+
+def get_sandbox_pool(provider: str) -> SandboxPool:
+    """
+    Get or create the sandbox pool for a provider, configured from settings.
+
+    Args:
+        provider: The sandbox provider ("e2b" or "opensandbox")
+
+    Returns:
+        The shared SandboxPool for the provider
+    """
+    if provider not in _pools:
+        settings = get_settings()
+        sandbox_kwargs = {}
+        if provider == "opensandbox":
+            sandbox_kwargs["base_url"] = settings.opensandbox_url
+        _pools[provider] = SandboxPool(
+            provider,
+            min_warm=settings.sandbox_pool_size,
+            max_starting=settings.sandbox_pool_max_starting,
+            max_idle=settings.sandbox_pool_max_idle,
+            timeout=settings.sandbox_timeout,
+            **sandbox_kwargs,
+        )
+    return _pools[provider]
+
+
+async def close_sandbox_pools() -> None:
+    """Close all sandbox pools."""
+    pools = list(_pools.values())
+    _pools.clear()
+    for pool in pools:
+        await pool.close()
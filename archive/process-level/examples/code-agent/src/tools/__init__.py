@@ -1,7 +1,7 @@
 """Agent tools module."""
 
-from .git import GitTools
+from .git import GitTools, close_github_client
 from .code import CodeTools
 from .search import create_search_tools, check_index_available
 
-__all__ = ["GitTools", "CodeTools", "create_search_tools", "check_index_available"]
+__all__ = ["GitTools", "close_github_client", "CodeTools", "create_search_tools", "check_index_available"]
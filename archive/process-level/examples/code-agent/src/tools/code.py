@@ -1,12 +1,193 @@
 """Code manipulation tools for the agent."""
 
+import asyncio
+import json
 import logging
+import shlex
+from collections import OrderedDict
+from typing import Optional
+from langchain_core.callbacks import adispatch_custom_event
 from langchain_core.tools import tool
 
-from src.sandbox.base import BaseSandbox
+from src.models import CommandResult
+from src.sandbox.base import BaseSandbox, OutputCallback
 
 logger = logging.getLogger(__name__)
 
+TRUNCATION_MARKER = "\n... (truncated)"
+
+# Results of read-only commands, keyed by (sandbox_id, workdir, command)
+COMMAND_CACHE_SIZE = 256
+_command_cache: OrderedDict[tuple[str, str, str], CommandResult] = OrderedDict()
+
+# Commands that never change the sandbox filesystem
+_READ_ONLY_COMMANDS = (
+    "cat", "find", "grep", "head", "ls", "pwd", "rg", "tail", "tree", "wc",
+    "git diff", "git log", "git show", "git status",
+)
+_SHELL_METACHARACTERS = set(";&|<>`$\n")
+# Options that make those commands write files or run other programs
+_UNSAFE_OPTIONS = {
+    "find": ("-delete", "-exec", "-ok", "-fls", "-fprint"),  # also -execdir, -okdir, -fprintf
+    "git": ("--output",),
+    "rg": ("--pre",),
+    "tree": ("-o",),
+}
+
+# Most matches/paths returned by search tools
+MAX_SEARCH_RESULTS = 100
+
+
+def _with_rg_fallback(rg_command: str, fallback: str) -> str:
+    """Build a shell command that uses ripgrep if installed, else a POSIX fallback."""
+    return f"if command -v rg >/dev/null 2>&1; then {rg_command}; else {fallback}; fi"
+
+
+def _rg_text(field: dict) -> str:
+    """Get a string from an rg --json field, which is either text or base64 bytes."""
+    return field.get("text") or field.get("bytes", "")
+
+
+def format_rg_matches(output: str, limit: int = MAX_SEARCH_RESULTS) -> str:
+    """
+    Format `rg --json` output as grep-style `path:line:text` lines.
+    
+    Output that isn't rg JSON (e.g. from the grep fallback) is returned as-is.
+    
+    Args:
+        output: stdout of the search command
+        limit: Maximum number of matches to keep
+        
+    Returns:
+        One line per match
+    """
+    if not output.startswith("{"):
+        return output
+    
+    lines = []
+    for line in output.splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue  # Stream cut off mid-line
+        if record.get("type") != "match":
+            continue
+        data = record["data"]
+        text = _rg_text(data["lines"]).rstrip("\n")
+        lines.append(f"{_rg_text(data['path'])}:{data['line_number']}:{text}")
+        if len(lines) >= limit:
+            break
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def is_read_only(command: str) -> bool:
+    """Check whether a shell command is a single read-only command."""
+    command = command.strip()
+    if _SHELL_METACHARACTERS.intersection(command):
+        return False
+    if not any(
+        command == prefix or command.startswith(prefix + " ")
+        for prefix in _READ_ONLY_COMMANDS
+    ):
+        return False
+    try:
+        words = shlex.split(command)
+    except ValueError:
+        return False
+    unsafe = _UNSAFE_OPTIONS.get(words[0], ())
+    return not any(word.startswith(unsafe) for word in words[1:])
+
+
+async def cached_command(
+    sandbox: BaseSandbox,
+    command: str,
+    workdir: Optional[str] = None,
+) -> CommandResult:
+    """
+    Run a read-only command, reusing the result of an identical earlier run.
+    
+    Only call this for commands whose output depends on the filesystem alone;
+    anything that changes files must call `invalidate_command_cache`.
+    
+    Args:
+        sandbox: Sandbox to run the command in
+        command: The command to execute
+        workdir: Working directory
+        
+    Returns:
+        CommandResult of the command
+    """
+    key = (sandbox.sandbox_id, workdir or "", command)
+    result = _command_cache.get(key)
+    if result is not None:
+        _command_cache.move_to_end(key)
+        return result
+    
+    result = await sandbox.run_command(command, workdir=workdir)
+    if result.exit_code == 0:
+        remember_command(sandbox.sandbox_id, command, workdir, result)
+    return result
+
+
+def remember_command(
+    sandbox_id: Optional[str],
+    command: str,
+    workdir: Optional[str],
+    result: CommandResult,
+) -> None:
+    """
+    Store a command's result as if cached_command had just run it.
+    
+    For callers that already know what a read-only command would print,
+    e.g. the branch they have just checked out.
+    """
+    _command_cache[(sandbox_id, workdir or "", command)] = result
+    if len(_command_cache) > COMMAND_CACHE_SIZE:
+        _command_cache.popitem(last=False)
+
+
+def invalidate_command_cache(sandbox_id: Optional[str]) -> None:
+    """Drop cached command results for a sandbox after its files changed."""
+    for key in [key for key in _command_cache if key[0] == sandbox_id]:
+        del _command_cache[key]
+
+
+def truncate_output(output: str, limit: int, tail: bool = False) -> str:
+    """
+    Cut output down to `limit` characters, marking it if anything was dropped.
+    
+    Keeps the start of the output, or the end if `tail` is set.
+    """
+    if len(output) <= limit:
+        return output
+    if tail:
+        return TRUNCATION_MARKER.strip() + "\n" + output[-limit:]
+    return output[:limit] + TRUNCATION_MARKER
+
+
+def format_command_result(result: CommandResult, limit: int) -> str:
+    """
+    Format a command's output for the LLM in at most about `limit` characters.
+    
+    The end of each stream is kept, since that is where errors and test
+    summaries are. stderr gets up to half the budget when there is stdout too.
+    
+    Args:
+        result: The command result
+        limit: Character budget for the output
+        
+    Returns:
+        stdout, then stderr and the exit code if relevant
+    """
+    limit = max(limit - 64, 0)  # Leave room for the labels below
+    stderr = truncate_output(result.stderr, limit // 2 if result.stdout else limit, tail=True)
+    parts = [truncate_output(result.stdout, limit - len(stderr), tail=True)]
+    if stderr:
+        parts.append(f"STDERR:\n{stderr}")
+    if result.exit_code != 0:
+        parts.append(f"(exit code: {result.exit_code})")
+    return "\n".join(parts)
+
 
 class CodeTools:
     """
@@ -15,9 +196,14 @@ class CodeTools:
     Provides tools for reading, writing, and exploring code files.
     """
     
-    def __init__(self, sandbox: BaseSandbox, workdir: str = "/home/user/repo"):
+    def __init__(self, sandbox: BaseSandbox, workdir: str = "/home/user/repo", max_output: int = 5000):
         self.sandbox = sandbox
         self.workdir = workdir
+        self._workdir_prefix = workdir.rstrip("/") + "/"
+        self.max_output = max_output
+        # Directory listings requested in the current event loop tick
+        self._pending_lists: dict[str, list[asyncio.Future]] = {}
+        self._list_tasks: set[asyncio.Task] = set()
     
     async def read_file(self, path: str) -> str:
         """
@@ -33,6 +219,21 @@ class CodeTools:
         logger.debug(f"Reading file: {full_path}")
         return await self.sandbox.read_file(full_path)
     
+    async def read_files(self, paths: list[str]) -> dict[str, str]:
+        """
+        Read several files at once.
+        
+        Args:
+            paths: Paths relative to workdir, or absolute paths
+            
+        Returns:
+            Dict mapping each readable path (as given) to its contents
+        """
+        full_paths = {self._resolve_path(path): path for path in paths}
+        logger.debug(f"Reading {len(full_paths)} files")
+        contents = await self.sandbox.read_files(list(full_paths))
+        return {full_paths[full_path]: content for full_path, content in contents.items()}
+    
     async def write_file(self, path: str, content: str) -> None:
         """
         Write content to a file.
@@ -43,14 +244,11 @@ class CodeTools:
         """
         full_path = self._resolve_path(path)
         logger.debug(f"Writing file: {full_path}")
-        
-        # Ensure parent directory exists
-        parent = "/".join(full_path.split("/")[:-1])
-        await self.sandbox.run_command(f"mkdir -p {parent}")
-        
+        # Sandboxes create missing parent directories as part of the write
         await self.sandbox.write_file(full_path, content)
+        invalidate_command_cache(self.sandbox.sandbox_id)
     
-    async def list_directory(self, path: str = ".") -> list[str]:
+    async def list_directory(self, path: str = ".") -> str:
         """
         List contents of a directory.
         
@@ -58,11 +256,53 @@ class CodeTools:
             path: Path relative to workdir, or absolute path
             
         Returns:
-            List of file/directory names
+            One name per line, directories marked with a trailing "/"
         """
         full_path = self._resolve_path(path)
-        result = await self.sandbox.run_command(f"ls -la {full_path}")
-        return result.stdout
+        try:
+            files = await self._list_coalesced(full_path)
+        except FileNotFoundError:
+            return f"Directory not found: {path}"
+        return "\n".join(files)
+    
+    async def _list_coalesced(self, full_path: str) -> list[str]:
+        """
+        List a directory, batching with other listings requested concurrently.
+        
+        Requests made in the same event loop tick (e.g. parallel tool calls)
+        are sent to the sandbox as one list_files_batch call.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if not self._pending_lists:
+            loop.call_soon(self._flush_lists)
+        self._pending_lists.setdefault(full_path, []).append(future)
+        return await future
+    
+    def _flush_lists(self) -> None:
+        pending, self._pending_lists = self._pending_lists, {}
+        task = asyncio.create_task(self._run_list_batch(pending))
+        self._list_tasks.add(task)
+        task.add_done_callback(self._list_tasks.discard)
+    
+    async def _run_list_batch(self, pending: dict[str, list[asyncio.Future]]) -> None:
+        try:
+            listings = await self.sandbox.list_files_batch(list(pending))
+        except Exception as e:
+            for futures in pending.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+        
+        for path, futures in pending.items():
+            for future in futures:
+                if future.done():
+                    continue
+                if path in listings:
+                    future.set_result(listings[path])
+                else:
+                    future.set_exception(FileNotFoundError(f"Directory not found: {path}"))
     
     async def find_files(self, pattern: str, path: str = ".") -> str:
         """
@@ -75,12 +315,31 @@ class CodeTools:
         Returns:
             List of matching file paths
         """
-        full_path = self._resolve_path(path)
-        result = await self.sandbox.run_command(
-            f'find {full_path} -name "{pattern}" -type f 2>/dev/null | head -100'
+        full_path = shlex.quote(self._resolve_path(path))
+        glob = shlex.quote(pattern)
+        result = await cached_command(
+            self.sandbox,
+            _with_rg_fallback(
+                f"rg --files -g {glob} {full_path}",
+                f"find {full_path} -name {glob} -type f",
+            ) + f" 2>/dev/null | head -{MAX_SEARCH_RESULTS}"
         )
         return result.stdout
     
+    async def find_files_many(self, patterns: list[str], path: str = ".") -> dict[str, str]:
+        """
+        Find files for several patterns concurrently.
+        
+        Args:
+            patterns: Glob patterns (e.g., ["*.py", "*.toml"])
+            path: Starting directory
+            
+        Returns:
+            Dict mapping each pattern to its matching file paths
+        """
+        results = await asyncio.gather(*(self.find_files(pattern, path) for pattern in patterns))
+        return dict(zip(patterns, results))
+    
     async def search_in_files(self, pattern: str, file_pattern: str = "*", path: str = ".") -> str:
         """
         Search for a pattern in files (like grep).
@@ -93,29 +352,34 @@ class CodeTools:
         Returns:
             Matching lines with file paths
         """
-        full_path = self._resolve_path(path)
+        full_path = shlex.quote(self._resolve_path(path))
+        regex = shlex.quote(pattern)
+        glob = shlex.quote(file_pattern)
+        # rg --json emits begin/end records around each file's matches, so
+        # allow more lines through than the number of matches kept
         result = await self.sandbox.run_command(
-            f'grep -rn "{pattern}" {full_path} --include="{file_pattern}" 2>/dev/null | head -100'
+            _with_rg_fallback(
+                f"rg --json -g {glob} -e {regex} {full_path} 2>/dev/null | head -{MAX_SEARCH_RESULTS * 3}",
+                f"grep -rn -e {regex} {full_path} --include={glob} 2>/dev/null | head -{MAX_SEARCH_RESULTS}",
+            )
         )
-        return result.stdout
+        return truncate_output(format_rg_matches(result.stdout), self.max_output)
     
-    async def run_command(self, command: str) -> str:
+    async def run_command(self, command: str, on_chunk: Optional[OutputCallback] = None) -> CommandResult:
         """
         Run an arbitrary shell command in the repo directory.
         
         Args:
             command: Shell command to run
+            on_chunk: Called with partial output while the command runs
             
         Returns:
-            Command output (stdout + stderr)
-        """
-        result = await self.sandbox.run_command(command, workdir=self.workdir)
-        output = result.stdout
-        if result.stderr:
-            output += f"\nSTDERR:\n{result.stderr}"
-        if result.exit_code != 0:
-            output += f"\n(exit code: {result.exit_code})"
-        return output
+            CommandResult with the full output (see format_command_result)
+        """
+        result = await self.sandbox.run_command(command, workdir=self.workdir, on_chunk=on_chunk)
+        if not is_read_only(command):
+            invalidate_command_cache(self.sandbox.sandbox_id)
+        return result
     
     async def get_file_tree(self, max_depth: int = 3) -> str:
         """
@@ -127,7 +391,8 @@ class CodeTools:
         Returns:
             Tree-formatted directory structure
         """
-        result = await self.sandbox.run_command(
+        result = await cached_command(
+            self.sandbox,
             f"find . -maxdepth {max_depth} -type f | head -200 | sort",
             workdir=self.workdir
         )
@@ -135,18 +400,16 @@ class CodeTools:
     
     def _resolve_path(self, path: str) -> str:
         """Resolve a path relative to workdir."""
-        if path.startswith("/"):
-            return path
-        return f"{self.workdir}/{path}"
+        return path if path[:1] == "/" else self._workdir_prefix + path
 
 
-def create_code_tools(sandbox: BaseSandbox, workdir: str = "/home/user/repo"):
+def create_code_tools(sandbox: BaseSandbox, workdir: str = "/home/user/repo", max_output: int = 5000):
     """
     Create LangChain tools for code operations.
     
     Returns a list of tools that can be bound to an LLM.
     """
-    code = CodeTools(sandbox, workdir)
+    code = CodeTools(sandbox, workdir, max_output)
     
     @tool
     async def read_file(path: str) -> str:
@@ -156,6 +419,18 @@ def create_code_tools(sandbox: BaseSandbox, workdir: str = "/home/user/repo"):
         except FileNotFoundError:
             return f"Error: File not found: {path}"
     
+    @tool
+    async def read_files_batch(paths: list[str]) -> str:
+        """Read several files at once. Paths are relative to the repo root. Faster than calling read_file repeatedly."""
+        contents = await code.read_files(paths)
+        sections = []
+        for path in paths:
+            if path in contents:
+                sections.append(f"=== {path} ===\n{contents[path]}")
+            else:
+                sections.append(f"=== {path} ===\nError: File not found: {path}")
+        return "\n\n".join(sections)
+    
     @tool
     async def write_file(path: str, content: str) -> str:
         """Write content to a file. Path is relative to the repo root. Creates parent directories if needed."""
@@ -164,7 +439,7 @@ def create_code_tools(sandbox: BaseSandbox, workdir: str = "/home/user/repo"):
     
     @tool
     async def list_directory(path: str = ".") -> str:
-        """List contents of a directory. Path is relative to the repo root."""
+        """List contents of a directory, one per line; directories end with "/". Path is relative to the repo root."""
         return await code.list_directory(path)
     
     @tool
@@ -180,11 +455,16 @@ def create_code_tools(sandbox: BaseSandbox, workdir: str = "/home/user/repo"):
     @tool
     async def run_shell_command(command: str) -> str:
         """Run a shell command in the repo directory. Use for running tests, builds, etc."""
-        return await code.run_command(command)
+        async def forward(stream: str, text: str) -> None:
+            # run_agent's ShellOutputLogger turns these into task log lines
+            await adispatch_custom_event("shell_output", {"stream": stream, "text": text})
+        
+        result = await code.run_command(command, on_chunk=forward)
+        return format_command_result(result, code.max_output)
     
     @tool
     async def get_repo_structure(max_depth: int = 3) -> str:
         """Get a tree view of the repository structure up to the specified depth."""
         return await code.get_file_tree(max_depth)
     
-    return [read_file, write_file, list_directory, find_files, search_code, run_shell_command, get_repo_structure], code
+    return [read_file, read_files_batch, write_file, list_directory, find_files, search_code, run_shell_command, get_repo_structure], code
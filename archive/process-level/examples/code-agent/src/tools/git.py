@@ -1,13 +1,93 @@
 """Git operations tools for the agent."""
 
+import asyncio
+import json
 import logging
+import shlex
+import weakref
 from typing import Optional
+
+import httpx
 from langchain_core.tools import tool
 
+from src.models import CommandResult
 from src.sandbox.base import BaseSandbox
+from src.tools.code import cached_command, invalidate_command_cache, remember_command
 
 logger = logging.getLogger(__name__)
 
+# Credential helper that answers with the token in $GH_TOKEN, so the token
+# never appears in a URL, a process's arguments, or the repo's git config.
+# The empty helper first clears any configured helpers.
+_TOKEN_CREDENTIALS = "-c credential.helper= -c credential.helper=" + shlex.quote(
+    '!f() { echo username=x-access-token; echo "password=$GH_TOKEN"; }; f'
+)
+
+# Commit identity and gh credential helper; gh may be missing, which is fine
+_AUTH_SETUP = (
+    'git config --global user.email "agent@code-agent.local"',
+    'git config --global user.name "Code Agent"',
+    "{ gh auth setup-git || true; }",
+)
+
+# Prints the checked out branch; cached, and primed by branch-switching methods
+CURRENT_BRANCH_COMMAND = "git branch --show-current"
+
+# Where create_pr writes the PR description for `gh pr create --body-file`
+PR_BODY_PATH = "/tmp/pr-body.md"
+
+GITHUB_API_URL = "https://api.github.com"
+
+# GitHub API client per event loop, shared by all GitTools
+_github_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_github_client() -> httpx.AsyncClient:
+    """
+    Get the GitHub API client for the running event loop.
+    
+    One keep-alive HTTP/2 connection is reused for every request instead
+    of starting a gh process, with its own TLS handshake, per call.
+    """
+    loop = asyncio.get_running_loop()
+    client = _github_clients.get(loop)
+    if client is None or client.is_closed:
+        client = _github_clients[loop] = httpx.AsyncClient(
+            base_url=GITHUB_API_URL,
+            http2=True,
+            headers={"Accept": "application/vnd.github+json"},
+            timeout=httpx.Timeout(30.0, connect=5.0),
+        )
+    return client
+
+
+async def close_github_client() -> None:
+    """Close the GitHub API client of the running event loop, if any."""
+    client = _github_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def parse_repo_name(repo_url: str) -> Optional[str]:
+    """
+    Extract the owner/repo name from a GitHub URL.
+    
+    Args:
+        repo_url: GitHub repository URL (https://github.com/owner/repo)
+        
+    Returns:
+        Repository name in owner/repo format, or None if not a GitHub URL
+    """
+    if "github.com" not in repo_url:
+        return None
+    parts = repo_url.rstrip("/").split("/")
+    if len(parts) < 2:
+        return None
+    name = f"{parts[-2]}/{parts[-1]}"
+    return name[:-4] if name.endswith(".git") else name
+
 
 class GitTools:
     """
@@ -16,65 +96,83 @@ class GitTools:
     Provides tools for cloning repos, creating branches, committing, and PRs.
     """
     
-    def __init__(self, sandbox: BaseSandbox, github_token: str, workdir: str = "/home/user/repo"):
+    def __init__(
+        self,
+        sandbox: BaseSandbox,
+        github_token: str,
+        workdir: str = "/home/user/repo",
+        repo_name: Optional[str] = None
+    ):
         self.sandbox = sandbox
         self.github_token = github_token
         self.workdir = workdir
+        # owner/repo, used to call the GitHub API directly; set by clone_repo
+        self.repo_name = repo_name
+        # Issue and PR views already fetched, keyed by (kind, number)
+        self._gh_views: dict[tuple[str, int], str] = {}
+        # The remote's default branch doesn't change during a run
+        self._default_branch: Optional[str] = None
     
     async def setup_git_auth(self) -> None:
         """Configure git for commits. GH_TOKEN is passed to commands that need auth."""
-        # Set up git config
-        await self.sandbox.run_command('git config --global user.email "agent@code-agent.local"')
-        await self.sandbox.run_command('git config --global user.name "Code Agent"')
-        
-        # Configure git to use gh as credential helper (uses GH_TOKEN)
-        await self.sandbox.run_command(
-            'gh auth setup-git',
-            env={"GH_TOKEN": self.github_token}
-        )
-        
+        await self.sandbox.run_script(*_AUTH_SETUP, env={"GH_TOKEN": self.github_token})
         logger.info("Git configured with GitHub authentication.")
     
-    async def clone_repo(self, repo_url: str, shallow: bool = True) -> str:
+    async def clone_repo(self, repo_url: str, shallow: bool = True, setup_auth: bool = False) -> str:
         """
         Clone a repository into the sandbox.
         
+        If the working directory already holds a checkout of the same
+        repository, it is fetched and reset to the remote's default branch
+        instead of cloned again.
+        
         Args:
             repo_url: GitHub repository URL (https://github.com/owner/repo)
-            shallow: Use shallow clone (--depth 1) to save disk space (default True)
+            shallow: Clone without file contents outside the checkout
+                (--filter=blob:none) to save transfer and disk space, while
+                keeping full history for log/blame (default True)
+            setup_auth: Also do setup_git_auth's configuration, in the same
+                sandbox command as the clone
             
         Returns:
             Path to the cloned repository
         """
-        logger.info(f"Cloning repository: {repo_url} (shallow={shallow})")
+        logger.info(f"Cloning repository: {repo_url} (partial={shallow})")
         
-        # Extract owner/repo from URL
         # https://github.com/owner/repo -> owner/repo
-        if "github.com" in repo_url:
-            parts = repo_url.rstrip("/").split("/")
-            owner_repo = f"{parts[-2]}/{parts[-1]}"
-        else:
-            owner_repo = repo_url
-        
-        # Use git clone with token in URL for auth
-        # This avoids issues with gh auth and allows --depth flag
-        auth_url = f"https://{self.github_token}@github.com/{owner_repo}"
-        
-        depth_flag = "--depth 1" if shallow else ""
-        result = await self.sandbox.run_command(
-            f"git clone {depth_flag} {auth_url} {self.workdir}",
-            env={"GH_TOKEN": self.github_token}
+        repo_name = parse_repo_name(repo_url)
+        owner_repo = repo_name or repo_url
+        
+        # The token comes from the environment through the credential helper,
+        # so the stored remote URL is clean and needs no rewriting afterwards
+        # Fetches into a partial clone keep its filter, so only the clone needs it
+        filter_flag = "--filter=blob:none " if shallow else ""
+        url = shlex.quote(f"https://github.com/{owner_repo}")
+        workdir = shlex.quote(self.workdir)
+        clone = f"git {_TOKEN_CREDENTIALS} clone {filter_flag}{url} {workdir}"
+        update = (
+            f'b=$(git -C {workdir} symbolic-ref --short refs/remotes/origin/HEAD) && b="${{b#origin/}}"'
+            f' && git -C {workdir} {_TOKEN_CREDENTIALS} fetch origin "$b"'
+            f' && git -C {workdir} checkout -f -B "$b" "origin/$b" && git -C {workdir} clean -fdx'
+        )
+        clone_or_update = (
+            f'if [ "$(git -C {workdir} remote get-url origin 2>/dev/null)" = {url} ]; '
+            f"then {update}; else {clone}; fi"
         )
+        # Either way the checkout ends up on the default branch; report it in the same command
+        head = f"git -C {workdir} symbolic-ref --short HEAD"
+        commands = (*_AUTH_SETUP, clone_or_update, head) if setup_auth else (clone_or_update, head)
+        result = await self.sandbox.run_script(*commands, env={"GH_TOKEN": self.github_token})
         
         if result.exit_code != 0:
             raise RuntimeError(f"Failed to clone repository: {result.stderr}")
         
-        # Remove token from remote URL for safety (use gh for push instead)
-        await self.sandbox.run_command(
-            f"git remote set-url origin https://github.com/{owner_repo}",
-            workdir=self.workdir
-        )
-        
+        invalidate_command_cache(self.sandbox.sandbox_id)
+        self.repo_name = self.repo_name or repo_name
+        lines = result.stdout.strip().splitlines()
+        if lines:
+            self._default_branch = lines[-1].strip()
+            self._switched_to(self._default_branch)
         logger.info(f"Repository cloned to {self.workdir}")
         return self.workdir
     
@@ -87,19 +185,39 @@ class GitTools:
         """
         logger.info(f"Checking out branch: {branch_name}")
         
+        # Creates a local tracking branch if only origin/<branch> exists
         result = await self.sandbox.run_command(
-            f"git checkout {branch_name}",
+            f"git switch {shlex.quote(branch_name)}",
             workdir=self.workdir
         )
+        invalidate_command_cache(self.sandbox.sandbox_id)
         
         if result.exit_code != 0:
-            # Try fetching and checking out origin/branch
-            result = await self.sandbox.run_command(
-                f"git checkout -b {branch_name} origin/{branch_name}",
-                workdir=self.workdir
-            )
-            if result.exit_code != 0:
-                raise RuntimeError(f"Failed to checkout branch: {result.stderr}")
+            raise RuntimeError(f"Failed to checkout branch: {result.stderr}")
+        self._switched_to(branch_name)
+    
+    async def sync_branch(self, branch_name: str) -> None:
+        """
+        Fetch a branch from the remote and check it out at the remote tip.
+        
+        Used when reusing an existing checkout instead of cloning fresh.
+        
+        Args:
+            branch_name: Name of the branch to sync
+        """
+        logger.info(f"Syncing branch: {branch_name}")
+        
+        result = await self.sandbox.run_command(
+            f"git {_TOKEN_CREDENTIALS} fetch origin {shlex.quote(branch_name)}"
+            f" && git checkout -B {shlex.quote(branch_name)} {shlex.quote(f'origin/{branch_name}')}",
+            workdir=self.workdir,
+            env={"GH_TOKEN": self.github_token}
+        )
+        invalidate_command_cache(self.sandbox.sandbox_id)
+        
+        if result.exit_code != 0:
+            raise RuntimeError(f"Failed to sync branch: {result.stderr}")
+        self._switched_to(branch_name)
     
     async def create_branch(self, branch_name: str) -> None:
         """
@@ -111,41 +229,63 @@ class GitTools:
         logger.info(f"Creating branch: {branch_name}")
         
         result = await self.sandbox.run_command(
-            f"git checkout -b {branch_name}",
+            f"git checkout -b {shlex.quote(branch_name)}",
             workdir=self.workdir
         )
+        invalidate_command_cache(self.sandbox.sandbox_id)
         
         if result.exit_code != 0:
             raise RuntimeError(f"Failed to create branch: {result.stderr}")
+        self._switched_to(branch_name)
     
     async def get_current_branch(self) -> str:
-        """Get the current branch name."""
-        result = await self.sandbox.run_command(
-            "git branch --show-current",
+        """
+        Get the current branch name.
+        
+        Cached with the other read-only commands, so it is re-read after
+        anything (including the agent's shell commands) that may have
+        switched branches.
+        """
+        result = await cached_command(
+            self.sandbox,
+            CURRENT_BRANCH_COMMAND,
             workdir=self.workdir
         )
         return result.stdout.strip()
     
+    def _switched_to(self, branch_name: str) -> None:
+        """Record the branch just checked out, so get_current_branch needn't ask."""
+        remember_command(
+            self.sandbox.sandbox_id,
+            CURRENT_BRANCH_COMMAND,
+            self.workdir,
+            CommandResult(stdout=f"{branch_name}\n", stderr="", exit_code=0),
+        )
+    
     async def get_default_branch(self) -> str:
         """Get the repository's default branch (e.g., main, master, develop)."""
-        # Try to get the default branch from the remote
-        result = await self.sandbox.run_command(
-            "git remote show origin | grep 'HEAD branch' | awk '{print $NF}'",
-            workdir=self.workdir,
-            env={"GH_TOKEN": self.github_token}
+        if self._default_branch:
+            return self._default_branch
+        self._default_branch = await self._detect_default_branch()
+        return self._default_branch
+    
+    async def _detect_default_branch(self) -> str:
+        # Clone records the remote's HEAD locally, so no network call is needed.
+        # The fallback checks for common branches run in the same request.
+        fallbacks = ["main", "master", "develop"]
+        head, *checks = await self.sandbox.run_commands(
+            ["git symbolic-ref --short refs/remotes/origin/HEAD"]
+            + [f"git rev-parse --verify origin/{branch} 2>/dev/null" for branch in fallbacks],
+            workdir=self.workdir
         )
         
-        if result.exit_code == 0 and result.stdout.strip():
-            default_branch = result.stdout.strip()
+        if head.exit_code == 0 and head.stdout.strip():
+            default_branch = head.stdout.strip().removeprefix("origin/")
             logger.info(f"Detected default branch: {default_branch}")
             return default_branch
         
         # Fallback: check if common branches exist
-        for branch in ["main", "master", "develop"]:
-            result = await self.sandbox.run_command(
-                f"git rev-parse --verify origin/{branch} 2>/dev/null",
-                workdir=self.workdir
-            )
+        for branch, result in zip(fallbacks, checks):
             if result.exit_code == 0:
                 logger.info(f"Using fallback default branch: {branch}")
                 return branch
@@ -167,13 +307,15 @@ class GitTools:
         """
         logger.info(f"Committing: {message}")
         
-        await self.stage_all()
-        
-        result = await self.sandbox.run_command(
-            f'git commit -m "{message}"',
+        # Stage and commit in one sandbox command
+        result = await self.sandbox.run_script(
+            "git add -A",
+            f"git commit -m {shlex.quote(message)}",
             workdir=self.workdir
         )
         
+        invalidate_command_cache(self.sandbox.sandbox_id)
+        
         if result.exit_code != 0:
             if "nothing to commit" in result.stdout:
                 logger.warning("Nothing to commit")
@@ -189,34 +331,14 @@ class GitTools:
         """
         logger.info(f"Pushing branch: {branch_name}")
         
-        # Get the remote URL and update it to use token auth
-        result = await self.sandbox.run_command(
-            "git remote get-url origin",
-            workdir=self.workdir
-        )
-        remote_url = result.stdout.strip()
-        
-        # Convert to authenticated URL if it's a GitHub HTTPS URL
-        if "github.com" in remote_url and not "@" in remote_url:
-            # https://github.com/owner/repo -> https://token@github.com/owner/repo
-            auth_url = remote_url.replace("https://github.com", f"https://{self.github_token}@github.com")
-            await self.sandbox.run_command(
-                f'git remote set-url origin "{auth_url}"',
-                workdir=self.workdir
-            )
-        
+        # Authenticate through the credential helper instead of rewriting the
+        # remote URL to include the token and restoring it afterwards
         result = await self.sandbox.run_command(
-            f"git push -u origin {branch_name}",
-            workdir=self.workdir
+            f"git {_TOKEN_CREDENTIALS} push -u origin {shlex.quote(branch_name)}",
+            workdir=self.workdir,
+            env={"GH_TOKEN": self.github_token}
         )
         
-        # Restore original URL (don't leave token in git config)
-        if "github.com" in remote_url:
-            await self.sandbox.run_command(
-                f'git remote set-url origin "{remote_url}"',
-                workdir=self.workdir
-            )
-        
         if result.exit_code != 0:
             # Log more details for debugging
             logger.error(f"Push failed. Exit code: {result.exit_code}")
@@ -241,24 +363,25 @@ class GitTools:
         Returns:
             URL of the created PR
         """
-        # Auto-detect base branch if not specified
+        # Auto-detect base branch if not specified, alongside the current branch
         if base is None:
-            base = await self.get_default_branch()
-        
-        # Get current branch name
-        result = await self.sandbox.run_command(
-            "git branch --show-current",
-            workdir=self.workdir
-        )
-        current_branch = result.stdout.strip()
+            base, current_branch = await asyncio.gather(
+                self.get_default_branch(), self.get_current_branch()
+            )
+        else:
+            current_branch = await self.get_current_branch()
         
         logger.info(f"Creating PR: {title} (base: {base}, branch: {current_branch})")
         
-        # Push the current branch first
-        await self.push(current_branch)
+        # Push the current branch first, writing the description alongside;
+        # as a file it needs no shell quoting and isn't bound by argument limits
+        await asyncio.gather(
+            self.push(current_branch),
+            self.sandbox.write_file(PR_BODY_PATH, body),
+        )
         
         result = await self.sandbox.run_command(
-            f'gh pr create --title "{title}" --body "{body}" --base {base}',
+            f"gh pr create --title {shlex.quote(title)} --base {shlex.quote(base)} --body-file {PR_BODY_PATH}",
             workdir=self.workdir,
             env={"GH_TOKEN": self.github_token}
         )
@@ -291,19 +414,21 @@ class GitTools:
         Returns:
             Issue title, body, and comments
         """
-        logger.info(f"Fetching issue #{issue_number}")
-        
-        # Get issue details
-        result = await self.sandbox.run_command(
-            f"gh issue view {issue_number} --json title,body,comments,state,labels",
-            workdir=self.workdir,
-            env={"GH_TOKEN": self.github_token}
-        )
-        
-        if result.exit_code != 0:
-            return f"Error fetching issue: {result.stderr}"
+        return await self._gh_view("issue", issue_number, "title,body,comments,state,labels")
+    
+    async def fetch_issues(self, issue_numbers: list[int]) -> dict[int, str]:
+        """
+        Fetch several GitHub issues concurrently.
         
-        return result.stdout
+        Args:
+            issue_numbers: The issue numbers to fetch
+            
+        Returns:
+            Dict mapping each issue number to what fetch_issue returns for it
+        """
+        numbers = list(dict.fromkeys(issue_numbers))
+        results = await asyncio.gather(*(self.fetch_issue(n) for n in numbers))
+        return dict(zip(numbers, results))
     
     async def fetch_pr(self, pr_number: int) -> str:
         """
@@ -315,20 +440,82 @@ class GitTools:
         Returns:
             PR title, body, and diff
         """
-        logger.info(f"Fetching PR #{pr_number}")
+        return await self._gh_view("pr", pr_number, "title,body,state,files")
+    
+    async def _gh_view(self, kind: str, number: int, fields: str) -> str:
+        """
+        Fetch an issue or PR, reusing the output of an earlier identical fetch.
+        
+        Uses the GitHub API directly when the repository is known, falling
+        back to `gh <kind> view` in the sandbox. Agents tend to look at the
+        same issue or PR several times in a run, so results are kept; errors
+        are not cached so a transient failure can be retried.
+        """
+        key = (kind, number)
+        if key in self._gh_views:
+            return self._gh_views[key]
+        
+        label = "issue" if kind == "issue" else "PR"
+        logger.info(f"Fetching {label} #{number}")
+        
+        if self.repo_name:
+            try:
+                view = await self._api_view(kind, number)
+                self._gh_views[key] = view
+                return view
+            except httpx.HTTPError as e:
+                logger.warning(f"GitHub API fetch of {label} #{number} failed, using gh: {e}")
         
-        # Get PR details
         result = await self.sandbox.run_command(
-            f"gh pr view {pr_number} --json title,body,state,files",
+            f"gh {kind} view {number} --json {fields}",
             workdir=self.workdir,
             env={"GH_TOKEN": self.github_token}
         )
         
         if result.exit_code != 0:
-            return f"Error fetching PR: {result.stderr}"
+            return f"Error fetching {label}: {result.stderr}"
         
+        self._gh_views[key] = result.stdout
         return result.stdout
     
+    async def _api_view(self, kind: str, number: int) -> str:
+        """
+        Fetch an issue or PR from the GitHub REST API.
+        
+        Returns JSON with the same fields as the `gh <kind> view --json` call
+        it replaces.
+        """
+        client = get_github_client()
+        headers = {"Authorization": f"Bearer {self.github_token}"}
+        base = f"/repos/{self.repo_name}/{'issues' if kind == 'issue' else 'pulls'}/{number}"
+        extra = "comments" if kind == "issue" else "files"
+        
+        item, items = await asyncio.gather(
+            client.get(base, headers=headers),
+            client.get(f"{base}/{extra}", headers=headers, params={"per_page": 100}),
+        )
+        item.raise_for_status()
+        items.raise_for_status()
+        item, items = item.json(), items.json()
+        
+        view = {"title": item["title"], "body": item.get("body") or "", "state": item["state"]}
+        if kind == "issue":
+            view["labels"] = [{"name": label["name"]} for label in item.get("labels", [])]
+            view["comments"] = [
+                {
+                    "author": {"login": (c.get("user") or {}).get("login", "")},
+                    "body": c.get("body") or "",
+                    "createdAt": c.get("created_at"),
+                }
+                for c in items
+            ]
+        else:
+            view["files"] = [
+                {"path": f["filename"], "additions": f["additions"], "deletions": f["deletions"]}
+                for f in items
+            ]
+        return json.dumps(view, indent=2)
+    
     async def run_gh_command(self, command: str) -> str:
         """
         Run an arbitrary gh CLI command with authentication.
@@ -353,13 +540,18 @@ class GitTools:
         return output
 
 
-def create_git_tools(sandbox: BaseSandbox, github_token: str, workdir: str = "/home/user/repo"):
+def create_git_tools(
+    sandbox: BaseSandbox,
+    github_token: str,
+    workdir: str = "/home/user/repo",
+    repo_name: Optional[str] = None
+):
     """
     Create LangChain tools for git operations.
     
     Returns a list of tools that can be bound to an LLM.
     """
-    git = GitTools(sandbox, github_token, workdir)
+    git = GitTools(sandbox, github_token, workdir, repo_name)
     
     @tool
     async def git_clone(repo_url: str) -> str:
@@ -404,6 +596,12 @@ def create_git_tools(sandbox: BaseSandbox, github_token: str, workdir: str = "/h
         """Fetch a GitHub issue's content including title, body, and comments. Use this to understand what an issue is asking for before making changes."""
         return await git.fetch_issue(issue_number)
     
+    @tool
+    async def fetch_github_issues(issue_numbers: list[int]) -> str:
+        """Fetch several GitHub issues at once. Faster than calling fetch_github_issue repeatedly."""
+        issues = await git.fetch_issues(issue_numbers)
+        return "\n\n".join(f"=== Issue #{number} ===\n{content}" for number, content in issues.items())
+    
     @tool
     async def fetch_github_pr(pr_number: int) -> str:
         """Fetch a GitHub PR's content including title, body, and changed files."""
@@ -414,4 +612,4 @@ def create_git_tools(sandbox: BaseSandbox, github_token: str, workdir: str = "/h
         """Run a GitHub CLI (gh) command with authentication. Example: 'issue list', 'pr list', 'repo view'. Do NOT include 'gh' prefix."""
         return await git.run_gh_command(command)
     
-    return [git_clone, git_create_branch, git_commit, git_push, git_create_pr, git_diff, git_status, fetch_github_issue, fetch_github_pr, run_gh_command], git
+    return [git_clone, git_create_branch, git_commit, git_push, git_create_pr, git_diff, git_status, fetch_github_issue, fetch_github_issues, fetch_github_pr, run_gh_command], git
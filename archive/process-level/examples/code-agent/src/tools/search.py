@@ -1,23 +1,48 @@
 """Semantic search tools using FAISS indexes."""
 
 import logging
+import time
+from functools import lru_cache
 from typing import Optional
 from langchain_core.tools import tool
 
-from src.indexer.repo_manager import RepoManager
+from src.indexer.repo_manager import RepoInfo, RepoManager
 
 logger = logging.getLogger(__name__)
 
-# Global repo manager instance
-_repo_manager: Optional[RepoManager] = None
+# Markdown block for one semantic_search result
+_RESULT_TEMPLATE = (
+    "### Result {i} (score: {hit.score:.3f})\n"
+    "**File:** {hit.file_path}\n"
+    "**Lines:** {hit.start_line}-{hit.end_line}\n"
+    "```{hit.language}\n"
+    "{hit.content}\n"
+    "```\n"
+)
 
+# Seconds to trust a cached repo lookup (indexes can be built while running)
+INDEX_CHECK_TTL = 60.0
 
+# Cached repo lookups by repo name: (checked_at, repo)
+_repo_lookups: dict[str, tuple[float, Optional[RepoInfo]]] = {}
+
+
+@lru_cache
 def get_repo_manager() -> RepoManager:
-    """Get or create the repo manager instance."""
-    global _repo_manager
-    if _repo_manager is None:
-        _repo_manager = RepoManager()
-    return _repo_manager
+    """Get the shared repo manager instance, creating it on first use."""
+    return RepoManager()
+
+
+def _lookup_repo(repo_name: str) -> Optional[RepoInfo]:
+    """Look up a repo by name, reusing lookups younger than INDEX_CHECK_TTL."""
+    now = time.monotonic()
+    cached = _repo_lookups.get(repo_name)
+    if cached and now - cached[0] < INDEX_CHECK_TTL:
+        return cached[1]
+    
+    repo = get_repo_manager().get_repo_by_name(repo_name)
+    _repo_lookups[repo_name] = (now, repo)
+    return repo
 
 
 def create_search_tools(repo_name: str):
@@ -31,7 +56,7 @@ def create_search_tools(repo_name: str):
         List of LangChain tools for semantic search
     """
     manager = get_repo_manager()
-    repo = manager.get_repo_by_name(repo_name)
+    repo = _lookup_repo(repo_name)
     
     if not repo:
         logger.warning(f"Repository {repo_name} not found in index")
@@ -61,16 +86,9 @@ def create_search_tools(repo_name: str):
         if not results:
             return "No relevant code found."
         
-        output = []
-        for i, result in enumerate(results, 1):
-            output.append(f"### Result {i} (score: {result['score']:.3f})")
-            output.append(f"**File:** {result['file_path']}")
-            output.append(f"**Lines:** {result['start_line']}-{result['end_line']}")
-            output.append(f"```{result['language']}")
-            output.append(result['content'])
-            output.append("```\n")
-        
-        return "\n".join(output)
+        return "\n".join(
+            _RESULT_TEMPLATE.format(i=i, hit=hit) for i, hit in enumerate(results, 1)
+        )
     
     @tool
     def find_similar_code(file_path: str, description: str) -> str:
@@ -99,13 +117,13 @@ def create_search_tools(repo_name: str):
             return "No similar code found."
         
         output = ["Found similar code patterns:\n"]
-        for result in results:
-            output.append(f"- **{result['file_path']}** (lines {result['start_line']}-{result['end_line']})")
-            # Show just first few lines
-            preview = result['content'].split('\n')[:5]
+        for hit in results:
+            output.append(f"- **{hit.file_path}** (lines {hit.start_line}-{hit.end_line})")
+            # Show just first few lines; a sixth element means there is more
+            lines = hit.content.split('\n', 5)
             output.append("  ```")
-            output.append("  " + "\n  ".join(preview))
-            if len(result['content'].split('\n')) > 5:
+            output.append("  " + "\n  ".join(lines[:5]))
+            if len(lines) > 5:
                 output.append("  ...")
             output.append("  ```")
         
@@ -115,7 +133,10 @@ def create_search_tools(repo_name: str):
 
 
 def check_index_available(repo_name: str) -> bool:
-    """Check if an index is available for a repository."""
-    manager = get_repo_manager()
-    repo = manager.get_repo_by_name(repo_name)
+    """
+    Check if an index is available for a repository.
+    
+    Results are cached per repo for INDEX_CHECK_TTL seconds.
+    """
+    repo = _lookup_repo(repo_name)
     return repo is not None and repo.index_status == "indexed"
@@ -1,52 +1,302 @@
 """Streamlit UI for the coding agent."""
 
+import atexit
 import streamlit as st
 import httpx
+import json
+import re
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # Configuration
 API_URL = "http://localhost:8000"
 
-st.set_page_config(
-    page_title="Code Agent",
-    page_icon="🤖",
-    layout="wide",
+# Timeouts (seconds) for each kind of API request. Connecting and waiting
+# for a free pooled connection fail fast, so a server that is down can't
+# use up the whole budget of a slow request such as submitting a task. The
+# log stream's read timeout exceeds the API's 15s keep-alive interval, so
+# only a dead stream times out.
+HTTP_TIMEOUTS = {
+    "default": httpx.Timeout(connect=2.0, read=10.0, write=5.0, pool=2.0),
+    "poll": httpx.Timeout(connect=1.0, read=5.0, write=2.0, pool=2.0),
+    "health": httpx.Timeout(connect=1.0, read=2.0, write=1.0, pool=1.0),
+    "submit": httpx.Timeout(connect=2.0, read=30.0, write=10.0, pool=2.0),
+    "stream": httpx.Timeout(connect=2.0, read=30.0, write=5.0, pool=2.0),
+}
+
+# Setup timings in the task logs, e.g. "Sandbox created: abc (1.2s)" or
+# "Setup complete in 15.8s", and the metric each one feeds
+TIMING_RE = re.compile(
+    r"(Sandbox created:|authentication configured|Repository cloned|Setup complete in)"
+    r"[^()\n]*?[(\s](\d+\.?\d*)s"
 )
+TIMING_KEYS = {
+    "Sandbox created:": "sandbox",
+    "authentication configured": "auth",
+    "Repository cloned": "clone",
+    "Setup complete in": "total_setup",
+}
 
-# Custom CSS
-st.markdown("""
+# Page styling, kept to the rules the page actually uses
+CUSTOM_CSS = """
 <style>
     .stTextArea textarea {
         font-family: monospace;
     }
-    .log-container {
-        background-color: #1e1e1e;
-        color: #d4d4d4;
-        padding: 1rem;
-        border-radius: 0.5rem;
-        font-family: monospace;
-        font-size: 0.85rem;
-        max-height: 400px;
-        overflow-y: auto;
-    }
-    .status-badge {
-        padding: 0.25rem 0.5rem;
-        border-radius: 0.25rem;
-        font-weight: bold;
-    }
-    .status-pending { background-color: #ffc107; color: black; }
-    .status-running { background-color: #17a2b8; color: white; }
-    .status-completed { background-color: #28a745; color: white; }
-    .status-failed { background-color: #dc3545; color: white; }
-    .repo-card {
-        border: 1px solid #ddd;
-        border-radius: 8px;
-        padding: 12px;
-        margin-bottom: 8px;
-    }
 </style>
-""", unsafe_allow_html=True)
+"""
+FOOTER_HTML = """
+<div style="text-align: center; color: #666;">
+    <small>Code Agent v0.1.0 | Powered by LangGraph + E2B + FAISS</small>
+</div>
+"""
+
+# Models offered per LLM provider, as (model, label); an empty model
+# means the provider default
+MODEL_OPTIONS = {
+    "anthropic": (
+        ("", "Default (Claude Sonnet 4.5)"),
+        ("claude-sonnet-4-5-20250929", "Claude Sonnet 4.5 - Best for coding"),
+        ("claude-haiku-4-5-20251001", "Claude Haiku 4.5 - Fastest"),
+        ("claude-opus-4-5-20251101", "Claude Opus 4.5 - Most intelligent"),
+    ),
+    "openai": (
+        ("", "Default (GPT-5.2)"),
+        ("gpt-5.2", "GPT-5.2 - Latest, best for coding"),
+        ("gpt-5-mini", "GPT-5 mini - Fast, cost-efficient"),
+        ("gpt-5-nano", "GPT-5 nano - Fastest, cheapest"),
+        ("gpt-4.1", "GPT-4.1 - Smart non-reasoning"),
+        ("gpt-4o", "GPT-4o - Fast, flexible"),
+        ("gpt-4o-mini", "GPT-4o mini - Affordable"),
+    ),
+}
+
+# Badges for task statuses and sandbox providers
+STATUS_EMOJI = {
+    "pending": "🟡",
+    "running": "🔵",
+    "completed": "🟢",
+    "failed": "🔴",
+    "cancelled": "⚪",
+}
+SANDBOX_ICONS = {
+    "opensandbox": "🖥️",
+    "e2b": "☁️",
+}
+
+
+@st.cache_resource
+def api_client() -> httpx.Client:
+    """
+    Get the HTTP client for the API.
+    
+    Shared across reruns and sessions so requests reuse open connections
+    instead of connecting afresh each time.
+    """
+    client = httpx.Client(
+        base_url=API_URL,
+        timeout=HTTP_TIMEOUTS["default"],
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+    )
+    atexit.register(client.close)
+    return client
+
+
+@st.cache_resource
+def fetch_pool() -> ThreadPoolExecutor:
+    """Get the thread pool that runs API requests off the script thread."""
+    pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="api-fetch")
+    atexit.register(pool.shutdown, wait=False)
+    return pool
+
+
+# Log lines shown in the status panel unless the full log is requested
+LOG_TAIL_LINES = 500
+
+# Bounds of the status panel's polling interval, in seconds, used when the
+# log stream is unavailable
+POLL_MIN_INTERVAL = 0.5
+POLL_MAX_INTERVAL = 10.0
+POLL_PENDING_INTERVAL = 1.0
+
+
+def next_poll_interval(state: dict, status: str, log_count: int) -> float:
+    """
+    Pick how long to wait before polling a task again.
+    
+    Polls quickly while new log lines keep arriving and backs off by half
+    again each time nothing changed.
+    """
+    if status == "pending":
+        interval = POLL_PENDING_INTERVAL
+    elif log_count > state.get("polled", 0):
+        interval = POLL_MIN_INTERVAL
+    else:
+        interval = min(state.get("interval", POLL_MIN_INTERVAL) * 1.5, POLL_MAX_INTERVAL)
+    state["interval"], state["polled"] = interval, log_count
+    return interval
+
+
+def follow_task_logs(task_id: str, start: int):
+    """
+    Yield a task's log lines from `start` as the API streams them.
+    
+    Ends when the task finishes. Lines are indented four spaces so that
+    st.write_stream renders them together as one preformatted block.
+    """
+    with api_client().stream(
+        "GET",
+        f"/task/{task_id}/logs",
+        params={"from": start},
+        timeout=HTTP_TIMEOUTS["stream"],
+    ) as response:
+        for line in response.iter_lines():
+            if line.startswith("event: done"):
+                return
+            if line.startswith("data: "):
+                yield "    " + json.loads(line[len("data: "):])["line"] + "\n"
+
+
+def task_state(task_id: str) -> dict:
+    """Get the status panel's per-task state, kept across reruns."""
+    return st.session_state.setdefault(f"task_{task_id}", {"timings": {}, "scanned": 0})
+
+
+def fetch_task(task_id: str) -> tuple[int, dict | None]:
+    """
+    Fetch a task's status, revalidating the copy from the last fetch.
+    
+    Once a copy is held only log lines after it are requested, and they are
+    appended to the lines already fetched, so the response size follows the
+    new output rather than the length of the whole log.
+    
+    The request runs on `fetch_pool()` and its future is kept in session
+    state, so a rerun while a slow request is in flight waits for that
+    request instead of sending another.
+    
+    Returns:
+        Tuple of (status_code, task_data), where task_data is None unless
+        the status code is 200. An unchanged task (304) is reported as 200
+        with the cached data.
+    """
+    cached = st.session_state.get(f"task_body_{task_id}")
+    future = st.session_state.get(f"task_fetch_{task_id}")
+    if future is None:
+        future = st.session_state[f"task_fetch_{task_id}"] = fetch_pool().submit(
+            api_client().get,
+            f"/task/{task_id}",
+            params={"from": cached[1]["log_offset"] + len(cached[1]["logs"])} if cached else None,
+            headers={"If-None-Match": cached[0]} if cached else None,
+            timeout=HTTP_TIMEOUTS["poll"],
+        )
+    try:
+        response = future.result()
+    finally:
+        del st.session_state[f"task_fetch_{task_id}"]
+    
+    if response.status_code == 304:
+        return 200, cached[1]
+    if response.status_code != 200:
+        return response.status_code, None
+    
+    task_data = response.json()
+    if cached:
+        task_data["logs"] = cached[1]["logs"] + task_data["logs"]
+        task_data["log_offset"] = cached[1]["log_offset"]
+    if "ETag" in response.headers:
+        st.session_state[f"task_body_{task_id}"] = (response.headers["ETag"], task_data)
+    return 200, task_data
+
+
+def render_task(task_id: str, task_data: dict, full_log: bool = False) -> None:
+    """
+    Render a task's status, metrics and logs.
+    
+    Only the last `LOG_TAIL_LINES` log lines are rendered unless `full_log`
+    is set, so long tasks don't resend their whole log on every refresh.
+    """
+    # Status display
+    status = task_data["status"]
+    status_emoji = STATUS_EMOJI.get(status, "⚪")
+    
+    st.markdown(f"### Status: {status_emoji} {status.upper()}")
+    
+    # Extract sandbox provider from logs
+    logs = task_data.get("logs", [])
+    sandbox_used = "unknown"
+    for log in logs:
+        if "Creating opensandbox" in log:
+            sandbox_used = "opensandbox"
+            break
+        elif "Creating e2b" in log:
+            sandbox_used = "e2b"
+            break
+    
+    info_cols = st.columns(3)
+    with info_cols[0]:
+        st.text(f"Repository: {task_data['repo_url']}")
+    with info_cols[1]:
+        st.text(f"Branch: {task_data.get('branch_name', 'N/A')}")
+    with info_cols[2]:
+        sandbox_icon = SANDBOX_ICONS.get(sandbox_used, "☁️")
+        st.text(f"Sandbox: {sandbox_icon} {sandbox_used}")
+    
+    if task_data.get("pr_url"):
+        st.success(f"✅ PR Created!")
+        st.markdown(f"[🔗 View Pull Request]({task_data['pr_url']})")
+    
+    if task_data.get("error"):
+        st.error(f"Error: {task_data['error']}")
+    
+    # Parse timing metrics from logs. Timings never change once logged,
+    # so only lines not seen on an earlier refresh are scanned; `scanned`
+    # is an absolute line index, as the API returns a window of the logs.
+    parsed = task_state(task_id)
+    log_offset = task_data.get("log_offset", 0)
+    for log in logs[max(parsed["scanned"] - log_offset, 0):]:
+        match = TIMING_RE.search(log)
+        if match:
+            parsed["timings"][TIMING_KEYS[match.group(1)]] = float(match.group(2))
+    parsed["scanned"] = log_offset + len(logs)
+    timings = parsed["timings"]
+    
+    # Display timing metrics if available
+    if timings:
+        st.subheader("⏱️ Performance Metrics")
+        metric_cols = st.columns(4)
+        with metric_cols[0]:
+            if "sandbox" in timings:
+                st.metric("Sandbox Spin-up", f"{timings['sandbox']:.1f}s")
+        with metric_cols[1]:
+            if "auth" in timings:
+                st.metric("Git Auth", f"{timings['auth']:.1f}s")
+        with metric_cols[2]:
+            if "clone" in timings:
+                st.metric("Clone", f"{timings['clone']:.1f}s")
+        with metric_cols[3]:
+            if "total_setup" in timings:
+                st.metric("Total Setup", f"{timings['total_setup']:.1f}s")
+    
+    # Logs
+    st.subheader("📜 Logs")
+    if logs:
+        shown = logs if full_log else logs[-LOG_TAIL_LINES:]
+        if len(shown) < len(logs):
+            st.caption(f"Showing the last {len(shown)} of {len(logs)} lines")
+        st.code("\n".join(shown), language="text")
+    else:
+        st.info("No logs yet...")
+
+
+st.set_page_config(
+    page_title="Code Agent",
+    page_icon="🤖",
+    layout="wide",
+)
+
+# Custom CSS
+st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
 
 # Header
 st.title("🤖 Code Agent")
@@ -55,14 +305,43 @@ st.markdown("*LangGraph-powered coding agent with sandboxed execution*")
 # Create tabs for different sections
 tab1, tab2 = st.tabs(["📝 Tasks", "📂 Repositories"])
 
-# Import repo manager for the repositories tab
-try:
-    from src.indexer.repo_manager import RepoManager
-    repo_manager = RepoManager()
-    REPO_MANAGER_AVAILABLE = True
-except ImportError:
-    REPO_MANAGER_AVAILABLE = False
-    repo_manager = None
+@st.cache_resource
+def get_repo_manager():
+    """
+    Get the repo manager, created once per process rather than per rerun.
+    
+    Returns None if the indexer's dependencies (faiss, numpy, openai) aren't
+    installed. That outcome is cached too, so the failing import isn't
+    retried on every rerun.
+    """
+    try:
+        from src.indexer.repo_manager import RepoManager
+    except ImportError:
+        return None
+    return RepoManager()
+
+
+@st.cache_data(ttl=30)
+def cached_list_repos() -> list:
+    """
+    List tracked repositories, reusing the result across reruns.
+    
+    Handlers that add, delete or index repositories call
+    `cached_list_repos.clear()`; the TTL covers changes made elsewhere.
+    """
+    return get_repo_manager().list_repos()
+
+
+@st.cache_data(ttl=15)
+def recent_tasks() -> list | None:
+    """
+    Fetch recent tasks for the sidebar, reusing the result across reruns.
+    
+    Returns None if the API answered with an error. Submitting a task calls
+    `recent_tasks.clear()` so it shows up right away.
+    """
+    response = api_client().get("/tasks", timeout=HTTP_TIMEOUTS["poll"])
+    return response.json() if response.status_code == 200 else None
 
 
 # Sidebar for configuration
@@ -76,36 +355,13 @@ with st.sidebar:
         help="Select the LLM provider to use"
     )
     
-    # Model selection based on provider
-    model_options = {
-        "anthropic": [
-            ("", "Default (Claude Sonnet 4.5)"),
-            ("claude-sonnet-4-5-20250929", "Claude Sonnet 4.5 - Best for coding"),
-            ("claude-haiku-4-5-20251001", "Claude Haiku 4.5 - Fastest"),
-            ("claude-opus-4-5-20251101", "Claude Opus 4.5 - Most intelligent"),
-        ],
-        "openai": [
-            ("", "Default (GPT-5.2)"),
-            ("gpt-5.2", "GPT-5.2 - Latest, best for coding"),
-            ("gpt-5-mini", "GPT-5 mini - Fast, cost-efficient"),
-            ("gpt-5-nano", "GPT-5 nano - Fastest, cheapest"),
-            ("gpt-4.1", "GPT-4.1 - Smart non-reasoning"),
-            ("gpt-4o", "GPT-4o - Fast, flexible"),
-            ("gpt-4o-mini", "GPT-4o mini - Affordable"),
-        ],
-    }
-    
-    available_models = model_options.get(llm_provider, [])
-    model_display = [m[1] for m in available_models]
-    model_values = [m[0] for m in available_models]
-    
-    selected_model_idx = st.selectbox(
+    # Model selection based on provider; each option is (model, label)
+    selected_model, _ = st.selectbox(
         "Model",
-        range(len(model_display)),
-        format_func=lambda i: model_display[i],
+        MODEL_OPTIONS[llm_provider],
+        format_func=lambda option: option[1],
         help="Select specific model (or use provider default)"
     )
-    selected_model = model_values[selected_model_idx] if selected_model_idx else ""
     
     st.divider()
     
@@ -140,24 +396,20 @@ with st.sidebar:
     
     # Fetch recent tasks
     try:
-        response = httpx.get(f"{API_URL}/tasks", timeout=5)
-        if response.status_code == 200:
-            recent_tasks = response.json()
-            for task in recent_tasks[:5]:
-                status = task["status"]
-                status_color = {
-                    "pending": "🟡",
-                    "running": "🔵",
-                    "completed": "🟢",
-                    "failed": "🔴",
-                    "cancelled": "⚪"
-                }.get(status, "⚪")
-                
-                with st.expander(f"{status_color} {task['task'][:30]}..."):
-                    st.text(f"ID: {task['task_id'][:8]}...")
-                    st.text(f"Repo: {task['repo_url']}")
-                    if task.get("pr_url"):
-                        st.markdown(f"[View PR]({task['pr_url']})")
+        tasks = recent_tasks()
+        if tasks is not None:
+            # One markdown element for the whole list rather than an
+            # expander with several elements per task
+            lines = []
+            for task in tasks[:5]:
+                line = (
+                    f"- {STATUS_EMOJI.get(task['status'], '⚪')} "
+                    f"`{task['task_id'][:8]}` {task['task'][:30]}..."
+                )
+                if task.get("pr_url"):
+                    line += f" [PR]({task['pr_url']})"
+                lines.append(line)
+            st.markdown("\n".join(lines))
         else:
             st.info("No recent tasks")
     except Exception:
@@ -173,8 +425,8 @@ with tab1:
         
         # Get list of indexed repos for dropdown
         indexed_repos = []
-        if REPO_MANAGER_AVAILABLE and repo_manager:
-            repos = repo_manager.list_repos()
+        if get_repo_manager():
+            repos = cached_list_repos()
             indexed_repos = [r for r in repos if r.index_status == "indexed"]
         
         # Option to use indexed repo or enter URL
@@ -236,7 +488,7 @@ with tab1:
         with submit_col2:
             if st.button("🔄 Check API", use_container_width=True):
                 try:
-                    response = httpx.get(f"{API_URL}/health", timeout=5)
+                    response = api_client().get("/health", timeout=HTTP_TIMEOUTS["health"])
                     if response.status_code == 200:
                         st.success("API is healthy!")
                     else:
@@ -263,108 +515,46 @@ with tab1:
         
         if active_task_id:
             try:
-                response = httpx.get(f"{API_URL}/task/{active_task_id}", timeout=10)
-                if response.status_code == 200:
-                    task_data = response.json()
-                    
-                    # Status display
-                    status = task_data["status"]
-                    status_emoji = {
-                        "pending": "🟡",
-                        "running": "🔵",
-                        "completed": "🟢",
-                        "failed": "🔴",
-                        "cancelled": "⚪"
-                    }.get(status, "⚪")
-                    
-                    st.markdown(f"### Status: {status_emoji} {status.upper()}")
+                # Placeholders let a running task refresh in place instead
+                # of rerunning the whole script
+                panel = st.empty()
+                full_log = st.checkbox("Show full log", key=f"full_log_{active_task_id}")
+                live = st.empty()
+                
+                # Show the last known state while the fetch is in flight
+                cached = st.session_state.get(f"task_body_{active_task_id}")
+                if cached:
+                    with panel.container():
+                        render_task(active_task_id, cached[1], full_log)
+                
+                status_code, task_data = fetch_task(active_task_id)
+                if status_code == 200:
+                    with panel.container():
+                        render_task(active_task_id, task_data, full_log)
                     
-                    # Extract sandbox provider from logs
-                    logs = task_data.get("logs", [])
-                    sandbox_used = "unknown"
-                    for log in logs:
-                        if "Creating opensandbox" in log:
-                            sandbox_used = "opensandbox"
-                            break
-                        elif "Creating e2b" in log:
-                            sandbox_used = "e2b"
+                    # Follow running tasks live, then show the outcome
+                    while task_data["status"] in ("pending", "running"):
+                        log_count = task_data["log_offset"] + len(task_data.get("logs", []))
+                        try:
+                            with live.container():
+                                st.write_stream(follow_task_logs(active_task_id, log_count))
+                        except httpx.HTTPError:
+                            # No log stream; fall back to polling
+                            time.sleep(next_poll_interval(
+                                task_state(active_task_id), task_data["status"], log_count
+                            ))
+                        live.empty()
+                        
+                        status_code, task_data = fetch_task(active_task_id)
+                        if status_code != 200:
                             break
-                    
-                    info_cols = st.columns(3)
-                    with info_cols[0]:
-                        st.text(f"Repository: {task_data['repo_url']}")
-                    with info_cols[1]:
-                        st.text(f"Branch: {task_data.get('branch_name', 'N/A')}")
-                    with info_cols[2]:
-                        sandbox_icon = "🖥️" if sandbox_used == "opensandbox" else "☁️"
-                        st.text(f"Sandbox: {sandbox_icon} {sandbox_used}")
-                    
-                    if task_data.get("pr_url"):
-                        st.success(f"✅ PR Created!")
-                        st.markdown(f"[🔗 View Pull Request]({task_data['pr_url']})")
-                    
-                    if task_data.get("error"):
-                        st.error(f"Error: {task_data['error']}")
-                    
-                    # Parse timing metrics from logs (logs already fetched above)
-                    import re
-                    timings = {}
-                    for log in logs:
-                        # Parse "Sandbox created: abc (1.2s)"
-                        if "Sandbox created:" in log:
-                            match = re.search(r'\((\d+\.?\d*)s\)', log)
-                            if match:
-                                timings["sandbox"] = float(match.group(1))
-                        # Parse "GitHub authentication configured (0.3s)"
-                        elif "authentication configured" in log:
-                            match = re.search(r'\((\d+\.?\d*)s\)', log)
-                            if match:
-                                timings["auth"] = float(match.group(1))
-                        # Parse "Repository cloned (14.2s)"
-                        elif "Repository cloned" in log:
-                            match = re.search(r'\((\d+\.?\d*)s\)', log)
-                            if match:
-                                timings["clone"] = float(match.group(1))
-                        # Parse "Setup complete in 15.8s"
-                        elif "Setup complete in" in log:
-                            match = re.search(r'in (\d+\.?\d*)s', log)
-                            if match:
-                                timings["total_setup"] = float(match.group(1))
-                    
-                    # Display timing metrics if available
-                    if timings:
-                        st.subheader("⏱️ Performance Metrics")
-                        metric_cols = st.columns(4)
-                        with metric_cols[0]:
-                            if "sandbox" in timings:
-                                st.metric("Sandbox Spin-up", f"{timings['sandbox']:.1f}s")
-                        with metric_cols[1]:
-                            if "auth" in timings:
-                                st.metric("Git Auth", f"{timings['auth']:.1f}s")
-                        with metric_cols[2]:
-                            if "clone" in timings:
-                                st.metric("Clone", f"{timings['clone']:.1f}s")
-                        with metric_cols[3]:
-                            if "total_setup" in timings:
-                                st.metric("Total Setup", f"{timings['total_setup']:.1f}s")
-                    
-                    # Logs
-                    st.subheader("📜 Logs")
-                    if logs:
-                        log_text = "\n".join(logs)
-                        st.code(log_text, language="text")
-                    else:
-                        st.info("No logs yet...")
-                    
-                    # Auto-refresh for running tasks
-                    if status == "running":
-                        time.sleep(2)
-                        st.rerun()
+                        with panel.container():
+                            render_task(active_task_id, task_data, full_log)
                         
-                elif response.status_code == 404:
-                    st.warning("Task not found")
+                elif status_code == 404:
+                    panel.warning("Task not found")
                 else:
-                    st.error(f"Error fetching task: {response.status_code}")
+                    panel.error(f"Error fetching task: {status_code}")
                     
             except Exception as e:
                 st.error(f"Error: {e}")
@@ -396,15 +586,16 @@ with tab1:
                 if base_branch:
                     payload["base_branch"] = base_branch
                 
-                response = httpx.post(
-                    f"{API_URL}/task",
+                response = api_client().post(
+                    "/task",
                     json=payload,
-                    timeout=30
+                    timeout=HTTP_TIMEOUTS["submit"],
                 )
                 
                 if response.status_code == 200:
                     result = response.json()
                     st.session_state.current_task_id = result["task_id"]
+                    recent_tasks.clear()
                     st.success(f"Task created! ID: {result['task_id']}")
                     st.rerun()
                 else:
@@ -419,7 +610,8 @@ with tab2:
     st.header("📂 Repository Management")
     st.markdown("Index repositories for faster semantic search during tasks.")
     
-    if not REPO_MANAGER_AVAILABLE:
+    repo_manager = get_repo_manager()
+    if repo_manager is None:
         st.error("Repository manager not available. Make sure dependencies are installed: `pip install faiss-cpu openai numpy`")
     else:
         # Add new repository
@@ -439,6 +631,7 @@ with tab2:
             with st.spinner("Cloning repository..."):
                 try:
                     repo_info = repo_manager.add_repo(new_repo_url)
+                    cached_list_repos.clear()
                     st.success(f"Added repository: {repo_info.name}")
                     st.rerun()
                 except Exception as e:
@@ -449,7 +642,7 @@ with tab2:
         # List repositories
         st.subheader("📋 Indexed Repositories")
         
-        repos = repo_manager.list_repos()
+        repos = cached_list_repos()
         
         if not repos:
             st.info("No repositories added yet. Add a repository above to get started.")
@@ -486,6 +679,8 @@ with tab2:
                                         st.rerun()
                                     except Exception as e:
                                         st.error(f"Failed to build index: {e}")
+                                    finally:
+                                        cached_list_repos.clear()
                         elif repo.index_status == "indexed":
                             if st.button("🔄 Rebuild", key=f"rebuild_{repo.id}", use_container_width=True):
                                 with st.spinner(f"Rebuilding index for {repo.name}..."):
@@ -495,6 +690,8 @@ with tab2:
                                         st.rerun()
                                     except Exception as e:
                                         st.error(f"Failed to rebuild index: {e}")
+                                    finally:
+                                        cached_list_repos.clear()
                         elif repo.index_status == "indexing":
                             st.button("⏳ Indexing...", key=f"indexing_{repo.id}", disabled=True, use_container_width=True)
                         elif repo.index_status == "error":
@@ -506,10 +703,13 @@ with tab2:
                                         st.rerun()
                                     except Exception as e:
                                         st.error(f"Failed to build index: {e}")
+                                    finally:
+                                        cached_list_repos.clear()
                     
                     with col3:
                         if st.button("🗑️ Delete", key=f"delete_{repo.id}", use_container_width=True):
                             repo_manager.delete_repo(repo.id)
+                            cached_list_repos.clear()
                             st.success(f"Deleted {repo.name}")
                             st.rerun()
                     
@@ -541,10 +741,10 @@ with tab2:
                             
                             if results:
                                 st.success(f"Found {len(results)} results")
-                                for i, result in enumerate(results, 1):
-                                    with st.expander(f"Result {i}: {result['file_path']} (score: {result['score']:.3f})"):
-                                        st.caption(f"Lines {result['start_line']}-{result['end_line']}")
-                                        st.code(result['content'], language=result['language'])
+                                for i, hit in enumerate(results, 1):
+                                    with st.expander(f"Result {i}: {hit.file_path} (score: {hit.score:.3f})"):
+                                        st.caption(f"Lines {hit.start_line}-{hit.end_line}")
+                                        st.code(hit.content, language=hit.language)
                             else:
                                 st.warning("No results found")
                     else:
@@ -555,8 +755,4 @@ with tab2:
 
 # Footer
 st.divider()
-st.markdown("""
-<div style="text-align: center; color: #666;">
-    <small>Code Agent v0.1.0 | Powered by LangGraph + E2B + FAISS</small>
-</div>
-""", unsafe_allow_html=True)
+st.markdown(FOOTER_HTML, unsafe_allow_html=True)
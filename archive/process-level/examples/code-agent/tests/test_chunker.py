@@ -0,0 +1,94 @@
+"""Tests for code chunking."""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from src.indexer.chunker import (
+    CODE_EXTENSIONS,
+    TARGET_CHUNK_SIZE,
+    _get_parser,
+    _scan,
+    chunk_file,
+    should_skip,
+)
+
+
+def _walk(root: Path) -> set:
+    """The os.walk based file discovery _scan replaced."""
+    found = set()
+    for dirpath, dirs, files in os.walk(root):
+        dirs[:] = [d for d in dirs if not should_skip(d)]
+        for name in files:
+            if Path(name).suffix.lower() in CODE_EXTENSIONS and not should_skip(name):
+                found.add(os.path.join(dirpath, name))
+    return found
+
+
+def _touch(root: Path, relative_path: str) -> None:
+    """Create a small source file, and its parent directories."""
+    path = root / relative_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("x = 1\n")
+
+
+def test_scan_matches_walk(tmp_path):
+    """Test that _scan finds the same files as os.walk, including under code-named directories."""
+    for relative_path in [
+        "src/a.py",
+        "lib/chart.js/index.js",
+        "docs/v1.md/readme.md",
+        "pkg/foo.py/mod.py",
+        "node_modules/dep/index.js",
+        "static/app.min.js",
+        "README",
+        ".hidden.py",
+        "data/image.png",
+    ]:
+        _touch(tmp_path, relative_path)
+    os.symlink(tmp_path / "src" / "a.py", tmp_path / "link.py")
+    os.symlink(tmp_path / "src", tmp_path / "linked_dir")
+
+    scanned = {entry.path for entry in _scan(str(tmp_path))}
+
+    assert scanned == _walk(tmp_path)
+    assert str(tmp_path / "lib" / "chart.js" / "index.js") in scanned
+    assert str(tmp_path / "docs" / "v1.md" / "readme.md") in scanned
+    assert str(tmp_path / "pkg" / "foo.py" / "mod.py") in scanned
+    assert str(tmp_path / "node_modules" / "dep" / "index.js") not in scanned
+
+
+def test_chunk_file_covers_all_lines():
+    """Test that line-based chunks cover the whole file, in order."""
+    content = "\n".join(f"line {i} " + "x" * 40 for i in range(200))
+    chunks = chunk_file("notes.txt", content)
+
+    assert len(chunks) > 1
+    assert chunks[0].start_line == 1
+    assert chunks[-1].end_line == 200
+    for chunk in chunks:
+        assert len(chunk.content) <= TARGET_CHUNK_SIZE
+        assert chunk.language == "text"
+
+
+@pytest.mark.skipif(_get_parser("javascript") is None, reason="tree-sitter not available")
+def test_chunk_file_merges_small_definitions():
+    """Test that small top-level statements are merged instead of chunked one by one."""
+    imports = [f"const dep{i} = require('dep{i}');" for i in range(20)]
+    functions = [f"function f{i}(x) {{\n  return x + {i};\n}}" for i in range(10)]
+    body = "\n".join(f"  total += step({i});" for i in range(120))
+    big = f"function big() {{\n  let total = 0;\n{body}\n  return total;\n}}"
+    content = "\n".join(imports + functions + [big]) + "\n"
+    lines = content.split("\n")
+
+    chunks = chunk_file("app.js", content)
+
+    # Imports and small functions share one chunk; the large function is
+    # split by lines, starting at its own first line
+    assert chunks[0].start_line == 1
+    assert "function f9" in chunks[0].content
+    assert "function big" not in chunks[0].content
+    assert lines[chunks[1].start_line - 1].startswith("function big")
+    assert chunks[-1].end_line == len(lines) - 1  # After the trailing newline
+    assert len(chunks) == 3
@@ -0,0 +1,156 @@
+"""Tests for the code tools."""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from src.models import CommandResult
+from src.tools.code import (
+    TRUNCATION_MARKER,
+    CodeTools,
+    format_command_result,
+    format_rg_matches,
+    is_read_only,
+)
+
+from .test_opensandbox import _sandbox, mock_server
+from .test_pool import FakeSandbox
+
+
+def _rg_match(path: str, line_number: int, text: str) -> str:
+    """One `rg --json` match record."""
+    return json.dumps({"type": "match", "data": {
+        "path": {"text": path},
+        "lines": {"text": text},
+        "line_number": line_number,
+    }})
+
+
+def test_format_rg_matches():
+    """Test that rg JSON matches become path:line:text lines, skipping other records."""
+    output = "\n".join([
+        json.dumps({"type": "begin", "data": {"path": {"text": "a.py"}}}),
+        _rg_match("a.py", 3, "x = 1\n"),
+        json.dumps({"type": "context", "data": {}}),
+        _rg_match("b/c.py", 7, "y = 2\n"),
+        json.dumps({"type": "end", "data": {}}),
+        '{"type": "match", "da',  # Cut off by head
+    ])
+    assert format_rg_matches(output) == "a.py:3:x = 1\nb/c.py:7:y = 2\n"
+
+
+def test_format_rg_matches_limit_and_fallback():
+    """Test that matches are capped at limit and grep output passes through."""
+    output = "\n".join(_rg_match("a.py", i, "x\n") for i in range(1, 11))
+    assert format_rg_matches(output, limit=3) == "a.py:1:x\na.py:2:x\na.py:3:x\n"
+    assert format_rg_matches("a.py:1:x\n") == "a.py:1:x\n"
+    assert format_rg_matches("") == ""
+
+
+def test_format_command_result():
+    """Test that short results are shown whole, with stderr and exit code when relevant."""
+    ok = CommandResult(stdout="done\n", stderr="", exit_code=0)
+    assert format_command_result(ok, 1000) == "done\n"
+
+    failed = CommandResult(stdout="out", stderr="err", exit_code=2)
+    assert format_command_result(failed, 1000) == "out\nSTDERR:\nerr\n(exit code: 2)"
+
+
+def test_format_command_result_keeps_tails():
+    """Test that long output is cut to the budget, keeping the end of each stream."""
+    result = CommandResult(stdout="o" * 5000 + "END", stderr="e" * 5000 + "ERR", exit_code=1)
+    formatted = format_command_result(result, 1000)
+
+    assert len(formatted) <= 1000 + 2 * len(TRUNCATION_MARKER)
+    stdout, stderr = formatted.split("STDERR:\n")
+    assert stdout.rstrip("\n").endswith("END")
+    assert stderr.endswith("ERR\n(exit code: 1)")
+
+
+class ListingSandbox(FakeSandbox):
+    """A sandbox whose directory listings record each batch request."""
+
+    def __init__(self, listings: dict[str, list[str]]):
+        super().__init__()
+        self.listings = listings
+        self.batches = []
+
+    async def list_files_batch(self, paths: list[str]) -> dict[str, list[str]]:
+        self.batches.append(paths)
+        return {path: self.listings[path] for path in paths if path in self.listings}
+
+
+@pytest.mark.asyncio
+async def test_list_directory_coalesces():
+    """Test that concurrent listings are sent as one batch, with duplicates listed once."""
+    sandbox = ListingSandbox({"/repo/src": ["pkg/", "a.py"], "/repo/tests": ["test_a.py"]})
+    tools = CodeTools(sandbox, workdir="/repo")
+
+    results = await asyncio.gather(
+        tools.list_directory("src"),
+        tools.list_directory("tests"),
+        tools.list_directory("src"),
+        tools.list_directory("missing"),
+    )
+
+    assert results == ["pkg/\na.py", "test_a.py", "pkg/\na.py", "Directory not found: missing"]
+    assert sandbox.batches == [["/repo/src", "/repo/tests", "/repo/missing"]]
+
+    assert await tools.list_directory("tests") == "test_a.py"
+    assert len(sandbox.batches) == 2
+
+
+@pytest.mark.asyncio
+async def test_list_directory_batch_error():
+    """Test that a failed batch fails every listing in it."""
+    class FailingSandbox(ListingSandbox):
+        async def list_files_batch(self, paths):
+            raise ConnectionError("sandbox gone")
+
+    tools = CodeTools(FailingSandbox({}), workdir="/repo")
+    results = await asyncio.gather(
+        tools._list_coalesced("/repo/a"),
+        tools._list_coalesced("/repo/b"),
+        return_exceptions=True,
+    )
+    assert all(isinstance(r, ConnectionError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_list_directory_marks_directories():
+    """Test that directories in an OpenSandbox listing end with a slash."""
+    def handler(request):
+        entries = [
+            {"name": "src", "is_directory": True, "size": 0},
+            {"name": "setup.py", "is_directory": False, "size": 10},
+        ]
+        paths = json.loads(request.content)["paths"]
+        return httpx.Response(200, json={"listings": {path: entries for path in paths}})
+
+    with mock_server(handler):
+        listing = await CodeTools(_sandbox(), workdir="/repo").list_directory()
+
+    assert listing == "src/\nsetup.py"
+
+
+@pytest.mark.parametrize("command, expected", [
+    ("ls -la", True),
+    ("git status", True),
+    ("find . -name '*.py' -type f", True),
+    ("git diff HEAD~1", True),
+    ("find . -name '*.pyc' -delete", False),
+    ("find . -exec rm {} +", False),
+    ("find . -execdir rm {} +", False),
+    ("find . -fprint /tmp/out", False),
+    ("git diff --output=/tmp/patch", False),
+    ("rg --pre ./script pattern", False),
+    ("tree -o /tmp/tree.txt", False),
+    ("cat a.py > b.py", False),
+    ("cat 'unterminated", False),
+    ("python setup.py", False),
+])
+def test_is_read_only(command, expected):
+    """Test that only commands that cannot write or run other programs count as read-only."""
+    assert is_read_only(command) is expected
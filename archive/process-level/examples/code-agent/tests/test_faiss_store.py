@@ -0,0 +1,139 @@
+"""Tests for the FAISS vector store."""
+
+import hashlib
+import shutil
+
+import msgpack
+import numpy as np
+import pytest
+
+from src.indexer import faiss_store
+from src.indexer.chunker import CodeChunk
+from src.indexer.embeddings import EMBEDDING_DIMENSIONS
+from src.indexer.faiss_store import ChunkTable, EmbeddingCache, FAISSStore
+
+
+def fake_vector(text: str) -> np.ndarray:
+    """A deterministic stand-in for a text's embedding."""
+    seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "little")
+    return np.random.default_rng(seed).random(EMBEDDING_DIMENSIONS, dtype=np.float32)
+
+
+@pytest.fixture
+def embedded(monkeypatch):
+    """The texts sent for embedding, with the API replaced by fake_vector."""
+    texts = []
+
+    def embed_texts(batch, batch_size=100):
+        texts.extend(batch)
+        return [fake_vector(text) for text in batch]
+
+    monkeypatch.setattr(faiss_store, "embed_texts", embed_texts)
+    return texts
+
+
+def _chunks() -> list[CodeChunk]:
+    """Chunks whose paths share long prefixes, as a directory walk yields them."""
+    return [
+        CodeChunk("def a(): pass", "src/pkg/module/a.py", 0, 1, "python"),
+        CodeChunk("def b(): pass", "src/pkg/module/a.py", 2, 3, "python"),
+        CodeChunk("fn c() {}", "src/pkg/module/b.rs", 0, 0, "rust"),
+        CodeChunk("x = 1", "src/pkg/other.py", 0, 0, "python"),
+        CodeChunk("# Title", "README.md", 0, 0, "markdown"),
+        CodeChunk("y = 2", "src/pkg/module/c.py", 0, 0, "python"),
+    ]
+
+
+def test_save_and_load(tmp_path, embedded):
+    """Test that a saved index loads back whole and leaves no temp files behind."""
+    store = FAISSStore(str(tmp_path))
+    store.build_index(_chunks())
+    store.save()
+
+    assert not list(tmp_path.glob("*.tmp"))
+    loaded = FAISSStore(str(tmp_path))
+    assert loaded.load()
+    assert loaded.index.ntotal == len(_chunks())
+    assert [loaded.chunks[i] for i in range(len(loaded.chunks))] == _chunks()
+
+
+def test_load_rejects_mismatched_files(tmp_path, embedded):
+    """Test that an index and metadata from different saves are not loaded together."""
+    other = FAISSStore(str(tmp_path / "other"))
+    other.build_index(_chunks()[:2])
+    other.save()
+
+    store = FAISSStore(str(tmp_path))
+    store.build_index(_chunks())
+    store.save()
+    # As if a crash landed between the two renames in save()
+    shutil.copy(other.faiss_file, store.faiss_file)
+
+    loaded = FAISSStore(str(tmp_path))
+    assert not loaded.load()
+    assert loaded.index is None
+    assert len(loaded.chunks) == 0
+
+
+def test_embedding_cache(tmp_path):
+    """Test that cached vectors are returned for known keys only, and survive reopening."""
+    cache = EmbeddingCache(tmp_path / "embeddings.db")
+    keys = [EmbeddingCache.key(text) for text in ("a", "b", "c")]
+    cache.put_many([(keys[0], fake_vector("a")), (keys[1], fake_vector("b"))])
+
+    found = EmbeddingCache(tmp_path / "embeddings.db").get_many(keys)
+    assert set(found) == set(keys[:2])
+    np.testing.assert_array_equal(found[keys[0]], fake_vector("a"))
+
+
+def test_embedding_cache_batches_lookups(tmp_path, monkeypatch):
+    """Test that lookups over LOOKUP_BATCH keys are split across queries."""
+    monkeypatch.setattr(EmbeddingCache, "LOOKUP_BATCH", 3)
+    cache = EmbeddingCache(tmp_path / "embeddings.db")
+    texts = [str(i) for i in range(10)]
+    cache.put_many([(EmbeddingCache.key(text), fake_vector(text)) for text in texts])
+
+    found = cache.get_many([EmbeddingCache.key(text) for text in texts])
+    assert len(found) == len(texts)
+
+
+def test_build_index_uses_cache(tmp_path, embedded):
+    """Test that rebuilding an index only embeds texts it hasn't seen."""
+    store = FAISSStore(str(tmp_path))
+    store.build_index(_chunks()[:4])
+    assert len(embedded) == 4
+
+    embedded.clear()
+    store.build_index(_chunks())
+    assert len(embedded) == 2
+    assert store.index.ntotal == len(_chunks())
+
+
+def test_chunk_table_without_files():
+    """Test that without_files drops every chunk of the given files and keeps the order."""
+    table = ChunkTable.from_chunks(_chunks())
+    kept = table.without_files(["src/pkg/module/a.py", "missing.py"])
+    assert kept == _chunks()[2:]
+
+
+def test_chunk_table_round_trip():
+    """Test that a front-coded table survives to_dict, msgpack and from_dict unchanged."""
+    table = ChunkTable.from_chunks(_chunks())
+    data = msgpack.unpackb(msgpack.packb(table.to_dict(), use_bin_type=True), raw=False)
+    loaded = ChunkTable.from_dict(data)
+
+    assert loaded.paths == table.paths
+    assert [loaded[i] for i in range(len(loaded))] == _chunks()
+    # Only suffixes are stored for paths sharing a prefix with their predecessor
+    assert data["path_suffixes"][1] == "b.rs"
+
+
+def test_chunk_table_legacy_paths():
+    """Test that tables saved before front-coding still load."""
+    data = ChunkTable.from_chunks(_chunks()).to_dict()
+    data["paths"] = faiss_store._front_decode(
+        np.frombuffer(data.pop("path_prefix_lens"), dtype=np.uint16), data.pop("path_suffixes")
+    )
+
+    loaded = ChunkTable.from_dict(data)
+    assert [loaded[i] for i in range(len(loaded))] == _chunks()
@@ -0,0 +1,32 @@
+"""Tests for the agent workflow's log reporting."""
+
+import pytest
+
+from src.agent.graph import ShellOutputLogger
+from src.models import CommandResult
+from src.tools.code import create_code_tools
+
+from .test_pool import FakeSandbox
+
+
+class StreamingSandbox(FakeSandbox):
+    """A sandbox whose commands produce their output in a few chunks."""
+
+    async def run_command(self, command, workdir=None, env=None, on_chunk=None) -> CommandResult:
+        for stream, text in [("stdout", "collecting"), ("stdout", " 3 items\nok"), ("stderr", "warn\n")]:
+            await on_chunk(stream, text)
+        return CommandResult(stdout="collecting 3 items\nok", stderr="warn\n", exit_code=0)
+
+
+@pytest.mark.asyncio
+async def test_shell_output_reaches_logs():
+    """Test that run_shell_command output is reported as log lines, whole lines only."""
+    lines = []
+    tools, _ = create_code_tools(StreamingSandbox(), workdir="/repo")
+    run_shell_command = next(t for t in tools if t.name == "run_shell_command")
+
+    await run_shell_command.ainvoke(
+        {"command": "pytest"}, config={"callbacks": [ShellOutputLogger(lines.extend)]}
+    )
+
+    assert [line.split("] ", 1)[1] for line in lines] == ["| collecting 3 items", "! warn", "| ok"]
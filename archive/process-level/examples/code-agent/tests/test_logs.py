@@ -0,0 +1,156 @@
+"""Tests for task log storage."""
+
+import asyncio
+import threading
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from src.api import server
+from src.api.logs import TaskLogs
+from src.models import TaskStatus
+
+
+def _logs(tmp_path, max_lines=10, flush_every=4) -> TaskLogs:
+    """Create TaskLogs with a small window so lines spill quickly."""
+    return TaskLogs(tmp_path / "task.log.gz", max_lines=max_lines, flush_every=flush_every)
+
+
+def test_append_within_window(tmp_path):
+    """Test that lines stay in memory until the window is full."""
+    logs = _logs(tmp_path)
+    logs.extend(f"line {i}" for i in range(10))
+
+    assert len(logs) == 10
+    assert logs.first_index == 0
+    assert logs.recent() == [f"line {i}" for i in range(10)]
+    assert not logs.archive_path.exists()
+
+
+def test_spill_and_archive(tmp_path):
+    """Test that lines pushed out of the window are spilled, then archived."""
+    logs = _logs(tmp_path)
+    logs.extend(f"line {i}" for i in range(13))
+
+    # 3 lines spilled, not yet flushed
+    assert len(logs) == 13
+    assert logs.first_index == 3
+    assert logs.recent() == [f"line {i}" for i in range(3, 13)]
+    assert not logs.archive_path.exists()
+
+    logs.append("line 13")
+    assert logs.archive_path.exists()
+    assert logs.first_index == 4
+
+
+def test_since_across_archive_boundary(tmp_path):
+    """Test that since() joins archived, spilled and in-memory lines."""
+    logs = _logs(tmp_path)
+    lines = [f"line {i}" for i in range(27)] + ["multi\nline"]
+    logs.extend(lines)
+
+    for index in [0, 1, 5, 15, 17, 20, 27, 28, 40]:
+        assert logs.since(index) == lines[index:], index
+
+    logs.flush()
+    assert logs.since(0) == lines
+    assert logs.since(-3) == lines
+
+
+def test_held_since(tmp_path):
+    """Test that held_since() only answers from memory."""
+    logs = _logs(tmp_path)
+    lines = [f"line {i}" for i in range(15)]
+    logs.extend(lines)
+
+    # Lines 0-3 are archived, 4 is spilled, 5-14 are in the window
+    assert logs.held_since(3) is None
+    assert logs.held_since(4) == lines[4:]
+    assert logs.held_since(10) == lines[10:]
+    assert logs.held_since(15) == []
+
+
+def test_since_while_appending(tmp_path):
+    """Test that since() called from another thread sees a consistent log."""
+    logs = _logs(tmp_path, max_lines=50, flush_every=10)
+    total = 20_000
+    errors = []
+
+    def read():
+        while len(logs) < total:
+            got = logs.since(0)
+            if got != [f"line {i}" for i in range(len(got))]:
+                errors.append(len(got))
+                return
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    for i in range(total):
+        logs.append(f"line {i}")
+    reader.join()
+
+    assert not errors
+    assert logs.since(0) == [f"line {i}" for i in range(total)]
+
+
+def test_delete_removes_archive(tmp_path):
+    """Test that delete() removes the archive, and is harmless when there is none."""
+    logs = _logs(tmp_path)
+    logs.extend(f"line {i}" for i in range(14))
+    assert logs.archive_path.exists()
+
+    logs.delete()
+    assert not logs.archive_path.exists()
+    logs.delete()
+
+
+def test_evict_finished_tasks(tmp_path, monkeypatch):
+    """Test that only finished tasks past the retention are dropped, with their archives."""
+    monkeypatch.setattr(server, "tasks", {})
+    now = datetime.now()
+    for task_id, status, age in [
+        ("old", TaskStatus.COMPLETED, 120),
+        ("recent", TaskStatus.FAILED, 30),
+        ("running", TaskStatus.RUNNING, 120),
+    ]:
+        logs = TaskLogs(tmp_path / f"{task_id}.log.gz", max_lines=1, flush_every=1)
+        logs.extend(["a", "b"])
+        server.tasks[task_id] = {
+            "status": status,
+            "updated_at": now - timedelta(seconds=age),
+            "logs": logs,
+        }
+
+    server.evict_finished_tasks(retention=60)
+
+    assert set(server.tasks) == {"recent", "running"}
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["recent.log.gz", "running.log.gz"]
+
+
+def test_poll_with_from_revalidates(tmp_path, monkeypatch):
+    """Test that polling past the held lines with the previous ETag gets a 304 until the task changes."""
+    monkeypatch.setattr(server, "tasks", {})
+    logs = TaskLogs(tmp_path / "task.log.gz", max_lines=10)
+    logs.extend(["a", "b"])
+    task = server.tasks["t"] = {
+        "task_id": "t",
+        "status": TaskStatus.RUNNING,
+        "created_at": datetime.now(),
+        "updated_at": datetime.now(),
+        "repo_url": "https://github.com/owner/repo",
+        "task": "task",
+        "logs": logs,
+        "changed": asyncio.Event(),
+    }
+    client = TestClient(server.app)
+
+    first = client.get("/task/t")
+    etag = first.headers["etag"]
+    params = {"from": first.json()["log_offset"] + len(first.json()["logs"])}
+    assert client.get("/task/t", params=params, headers={"If-None-Match": etag}).status_code == 304
+
+    logs.append("c")
+    server.touch_task(task)
+    changed = client.get("/task/t", params=params, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["logs"] == ["c"]
@@ -0,0 +1,57 @@
+"""Tests for the OpenSandbox HTTP client, against a mocked server."""
+
+import json
+from contextlib import contextmanager
+
+import httpx
+import pytest
+
+from src.sandbox.opensandbox import OpenSandbox, _client_cv
+
+
+@contextmanager
+def mock_server(handler):
+    """Route the OpenSandbox client's requests to a handler function."""
+    token = _client_cv.set(httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    try:
+        yield
+    finally:
+        _client_cv.reset(token)
+
+
+def _sandbox() -> OpenSandbox:
+    """Create a client for an already created session."""
+    sandbox = OpenSandbox("http://sandbox.test")
+    sandbox._session_id = "session"
+    return sandbox
+
+
+@pytest.mark.asyncio
+async def test_run_commands():
+    """Test that run_commands returns one result per command."""
+    def handler(request):
+        commands = json.loads(request.content)["commands"]
+        return httpx.Response(200, json={"results": [
+            {"stdout": command["command"][-1], "stderr": "", "exit_code": 0}
+            for command in commands
+        ]})
+
+    with mock_server(handler):
+        results = await _sandbox().run_commands(["echo a", "echo b"])
+
+    assert [r.stdout for r in results] == ["echo a", "echo b"]
+
+
+@pytest.mark.asyncio
+async def test_run_commands_http_error():
+    """Test that a failed batch request fails every command."""
+    def handler(request):
+        return httpx.Response(500, text="boom")
+
+    with mock_server(handler):
+        results = await _sandbox().run_commands(["a", "b", "c"])
+        stopped = await _sandbox().run_commands(["a", "b", "c"], stop_on_error=True)
+
+    assert len(results) == 3
+    assert all(r.exit_code == 1 and "boom" in r.stderr for r in results)
+    assert len(stopped) == 1
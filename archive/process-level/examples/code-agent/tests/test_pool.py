@@ -0,0 +1,205 @@
+"""Tests for the warm sandbox pool."""
+
+import asyncio
+import itertools
+import subprocess
+from typing import Optional
+
+import pytest
+
+import src.sandbox
+from src.models import CommandResult
+from src.sandbox import pool
+from src.sandbox.base import BaseSandbox
+from src.sandbox.pool import RESET_CHECKOUT_COMMAND, SandboxPool, repo_key
+
+_ids = itertools.count()
+
+KEY = repo_key("https://github.com/owner/repo", "token")
+
+
+class FakeSandbox(BaseSandbox):
+    """A sandbox that only records what was done to it."""
+
+    def __init__(self):
+        self._id = None
+        self.destroyed = False
+        self.commands = []
+
+    @property
+    def sandbox_id(self) -> Optional[str]:
+        return self._id
+
+    @property
+    def is_active(self) -> bool:
+        return self._id is not None and not self.destroyed
+
+    async def create(self, timeout: int = 1800) -> str:
+        self._id = f"fake-{next(_ids)}"
+        return self._id
+
+    async def run_command(self, command, workdir=None, env=None, on_chunk=None) -> CommandResult:
+        self.commands.append((command, workdir))
+        return CommandResult(stdout="", stderr="", exit_code=0)
+
+    async def read_file(self, path: str) -> str:
+        raise FileNotFoundError(path)
+
+    async def write_file(self, path: str, content: str) -> None:
+        pass
+
+    async def list_files(self, path: str = ".") -> list[str]:
+        return []
+
+    async def destroy(self) -> None:
+        self.destroyed = True
+
+
+class Clock:
+    """A settable replacement for time.monotonic."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(pool.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def sandbox_pool(monkeypatch):
+    """A pool that creates FakeSandboxes."""
+    monkeypatch.setattr(src.sandbox, "get_sandbox", lambda provider, **kwargs: FakeSandbox())
+    return SandboxPool("fake", min_warm=1, max_idle=100.0, timeout=1000, min_remaining=300.0)
+
+
+async def settle() -> None:
+    """Let background refills and destroys run."""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_acquire_without_start(sandbox_pool):
+    """Test that an unstarted pool creates on demand and destroys on release."""
+    sandbox, reused = await sandbox_pool.acquire()
+    assert not reused
+
+    await sandbox_pool.release(sandbox, key=KEY, workdir="/repo")
+    assert sandbox.destroyed
+
+
+@pytest.mark.asyncio
+async def test_reuse_released_checkout(sandbox_pool, clock):
+    """Test that a released checkout is reset and handed back for the same key only."""
+    await sandbox_pool.start()
+    sandbox, _ = await sandbox_pool.acquire(KEY)
+
+    await sandbox_pool.release(sandbox, key=KEY, workdir="/repo")
+    assert sandbox.commands == [(RESET_CHECKOUT_COMMAND, "/repo")]
+
+    other, reused = await sandbox_pool.acquire(repo_key("https://github.com/owner/repo", "other"))
+    assert other is not sandbox and not reused
+
+    again, reused = await sandbox_pool.acquire(KEY)
+    assert again is sandbox and reused
+    await sandbox_pool.close()
+
+
+@pytest.mark.asyncio
+async def test_idle_checkout_is_destroyed(sandbox_pool, clock):
+    """Test that a checkout idle past max_idle is destroyed instead of reused."""
+    await sandbox_pool.start()
+    sandbox, _ = await sandbox_pool.acquire(KEY)
+    await sandbox_pool.release(sandbox, key=KEY, workdir="/repo")
+
+    clock.now += 100.0
+    again, reused = await sandbox_pool.acquire(KEY)
+    await settle()
+
+    assert again is not sandbox and not reused
+    assert sandbox.destroyed
+    await sandbox_pool.close()
+
+
+@pytest.mark.asyncio
+async def test_reuse_bounded_by_lifetime(sandbox_pool, clock):
+    """Test that a checkout reused back to back is retired before its timeout runs out."""
+    await sandbox_pool.start()
+    sandbox, _ = await sandbox_pool.acquire(KEY)
+
+    # Each task releases it well within max_idle, but its lifetime keeps running
+    for _ in range(7):
+        clock.now += 90.0
+        await sandbox_pool.release(sandbox, key=KEY, workdir="/repo")
+        again, reused = await sandbox_pool.acquire(KEY)
+        assert again is sandbox and reused
+
+    # 720s old: under 300s of its 1000s timeout would remain
+    clock.now += 90.0
+    await sandbox_pool.release(sandbox, key=KEY, workdir="/repo")
+    again, reused = await sandbox_pool.acquire(KEY)
+    await settle()
+
+    assert again is not sandbox and not reused
+    assert sandbox.destroyed
+    await sandbox_pool.close()
+
+
+def _git(cwd, *args: str) -> str:
+    """Run a git command in a test repository and return its output."""
+    return subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+        cwd=cwd, check=True, capture_output=True, text=True,
+    ).stdout
+
+
+def test_reset_checkout_command(tmp_path):
+    """Test that a released checkout is back on the default branch with no task branches left."""
+    origin = tmp_path / "origin"
+    origin.mkdir()
+    _git(origin, "init", "-q", "-b", "main")
+    (origin / "a.py").write_text("x = 1\n")
+    _git(origin, "add", ".")
+    _git(origin, "commit", "-qm", "initial")
+
+    checkout = tmp_path / "checkout"
+    _git(tmp_path, "clone", "-q", str(origin), str(checkout))
+    _git(checkout, "checkout", "-qb", "agent/feature")
+    (checkout / "a.py").write_text("x = 2\n")
+    _git(checkout, "commit", "-qam", "change")
+    _git(checkout, "branch", "other")
+    (checkout / "a.py").write_text("x = 3\n")
+    (checkout / "new.py").write_text("y = 1\n")
+
+    subprocess.run(["sh", "-c", RESET_CHECKOUT_COMMAND], cwd=checkout, check=True)
+
+    assert _git(checkout, "branch", "--format=%(refname:short)").split() == ["main"]
+    assert _git(checkout, "status", "--porcelain") == ""
+    assert (checkout / "a.py").read_text() == "x = 1\n"
+    # The next task can create its branch under the same name again
+    _git(checkout, "checkout", "-qb", "agent/feature")
+
+
+@pytest.mark.asyncio
+async def test_expire_replaces_warm_sandboxes(sandbox_pool, clock):
+    """Test that warm sandboxes close to expiry are destroyed and replaced."""
+    await sandbox_pool.start()
+    await settle()
+    (old, _), = list(sandbox_pool._warm._queue)
+
+    clock.now += 80.0
+    sandbox_pool._expire(margin=25.0)
+    await settle()
+
+    assert old.destroyed
+    (new, created_at), = list(sandbox_pool._warm._queue)
+    assert new is not old and created_at == clock.now
+    await sandbox_pool.close()
+    assert new.destroyed
@@ -0,0 +1,108 @@
+"""Tests for incremental repository indexing."""
+
+import asyncio
+import subprocess
+
+import pytest
+
+from src.indexer import faiss_store, repo_manager
+from src.indexer.embeddings import run_sync
+from src.indexer.repo_manager import RepoManager
+
+from .test_faiss_store import fake_vector
+
+
+def _git(cwd, *args: str) -> None:
+    """Run a git command in a test repository."""
+    subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+        cwd=cwd, check=True, capture_output=True,
+    )
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    """A RepoManager keeping its database, clones and indexes under tmp_path."""
+    monkeypatch.setattr(repo_manager, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(repo_manager, "REPOS_DIR", tmp_path / "repos")
+    monkeypatch.setattr(repo_manager, "INDEXES_DIR", tmp_path / "indexes")
+    monkeypatch.setattr(repo_manager, "DB_PATH", tmp_path / "repos.db")
+    manager = RepoManager()
+    yield manager
+    manager.close()
+
+
+@pytest.fixture
+def embedded(monkeypatch):
+    """The texts sent for embedding, with the API replaced by fake_vector."""
+    texts = []
+
+    def embed_texts(batch, batch_size=100):
+        texts.extend(batch)
+        return [fake_vector(text) for text in batch]
+
+    monkeypatch.setattr(faiss_store, "embed_texts", embed_texts)
+    return texts
+
+
+def _local_repo(tmp_path):
+    """A committed repository with three files where add_repo("owner/repo") expects its clone."""
+    local_path = tmp_path / "repos" / "owner_repo"
+    local_path.mkdir(parents=True)
+    (local_path / "a.py").write_text("def a():\n    return 1\n")
+    (local_path / "b.py").write_text("def b():\n    return 2\n")
+    (local_path / "c.py").write_text("def c():\n    return 3\n")
+    _git(local_path, "init", "-q")
+    _git(local_path, "add", ".")
+    _git(local_path, "commit", "-qm", "initial")
+    return local_path
+
+
+def test_reindex_only_changed_files(manager, embedded, tmp_path):
+    """Test that a rebuild re-chunks and re-embeds only files changed since the indexed commit."""
+    local_path = _local_repo(tmp_path)
+
+    repo = manager.add_repo("owner/repo", clone=False)
+    manager.build_index(repo.id)
+    assert len(embedded) == 3
+    assert manager.get_repo(repo.id).last_indexed_sha is not None
+
+    # Edit, delete and add a file, leaving the edit uncommitted
+    (local_path / "a.py").write_text("def a():\n    return 10\n")
+    _git(local_path, "rm", "-q", "b.py")
+    (local_path / "d.py").write_text("def d():\n    return 4\n")
+    _git(local_path, "add", "d.py")
+    _git(local_path, "commit", "-qm", "change")
+
+    embedded.clear()
+    store = manager.build_index(repo.id)
+
+    assert len(embedded) == 2
+    contents = {store.chunks[i].file_path: store.chunks[i].content for i in range(len(store.chunks))}
+    assert sorted(contents) == ["a.py", "c.py", "d.py"]
+    assert "return 10" in contents["a.py"]
+    assert manager.get_repo(repo.id).chunk_count == 3
+
+
+@pytest.mark.asyncio
+async def test_run_sync_inside_running_loop():
+    """Test that run_sync works both with and without an event loop running in the thread."""
+    async def answer():
+        await asyncio.sleep(0)
+        return 42
+
+    assert run_sync(answer()) == 42
+    assert await asyncio.to_thread(run_sync, answer()) == 42
+
+
+@pytest.mark.asyncio
+async def test_index_from_running_loop(manager, embedded, tmp_path):
+    """Test that repos can be added and indexed from async code."""
+    _local_repo(tmp_path)
+
+    repo = manager.add_repo("owner/repo", clone=False)
+    store = await manager.build_index_async(repo.id)
+    assert store.index.ntotal == 3
+
+    manager.build_index(repo.id)
+    assert manager.get_repo(repo.id).index_status == "indexed"
@@ -1,6 +1,10 @@
 """Tests for sandbox functionality."""
 
+import asyncio
+import uuid
+
 import pytest
+import pytest_asyncio
 from src.sandbox import get_sandbox, BaseSandbox, E2BSandbox
 
 
@@ -25,43 +29,48 @@ def test_sandbox_not_active_initially():
 
 
 # Integration tests (require E2B API key)
-@pytest.mark.integration
-@pytest.mark.asyncio
-async def test_sandbox_create_and_destroy():
-    """Test creating and destroying a sandbox."""
-    sandbox = E2BSandbox()
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def live_sandbox():
+    """
+    A sandbox shared by all integration tests.
     
+    Created once per session so the suite pays the sandbox start-up cost
+    only once. Tests should write to unique paths to stay independent.
+    """
+    sandbox = E2BSandbox()
+    await sandbox.create(timeout=300)
     try:
-        sandbox_id = await sandbox.create(timeout=300)
-        assert sandbox_id is not None
-        assert sandbox.is_active
-        
-        # Test running a command
-        result = await sandbox.run_command("echo 'hello world'")
-        assert result.exit_code == 0
-        assert "hello world" in result.stdout
-        
+        yield sandbox
     finally:
         await sandbox.destroy()
         assert not sandbox.is_active
 
 
 @pytest.mark.integration
-@pytest.mark.asyncio
-async def test_sandbox_file_operations():
+@pytest.mark.asyncio(loop_scope="session")
+async def test_sandbox_create_and_destroy(live_sandbox):
+    """Test creating a sandbox and running a command in it."""
+    assert live_sandbox.sandbox_id is not None
+    assert live_sandbox.is_active
+    
+    # Test running a command
+    result = await live_sandbox.run_command("echo 'hello world'")
+    assert result.exit_code == 0
+    assert "hello world" in result.stdout
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio(loop_scope="session")
+async def test_sandbox_file_operations(live_sandbox):
     """Test file read/write in sandbox."""
-    sandbox = E2BSandbox()
+    prefix = f"/tmp/test_{uuid.uuid4().hex}"
+    files = {f"{prefix}_a.txt": "Hello, World!", f"{prefix}_b.txt": "Goodbye!"}
     
-    try:
-        await sandbox.create(timeout=300)
-        
-        # Write a file
-        test_content = "Hello, World!"
-        await sandbox.write_file("/tmp/test.txt", test_content)
-        
-        # Read it back
-        content = await sandbox.read_file("/tmp/test.txt")
-        assert content == test_content
-        
-    finally:
-        await sandbox.destroy()
+    # Write the files; they are independent, so write them concurrently
+    await asyncio.gather(*(
+        live_sandbox.write_file(path, content) for path, content in files.items()
+    ))
+    
+    # Read them back
+    contents = await asyncio.gather(*(live_sandbox.read_file(path) for path in files))
+    assert contents == list(files.values())
@@ -13,21 +13,22 @@ async def main():
         print(f"Created sandbox: {sandbox.session_id}")
 
         try:
-            # Run a simple command
-            result = await sandbox.run("echo 'Hello, OpenSandbox!'")
+            # Run a simple command and write a file. They don't depend on each
+            # other, so send both at once over the shared gRPC channels.
+            result, _ = await asyncio.gather(
+                sandbox.run("echo 'Hello, OpenSandbox!'"),
+                sandbox.write_file("/tmp/test.py", "print('Hello from Python!')"),
+            )
             print(f"Command output: {result.stdout}")
             print(f"Exit code: {result.exit_code}")
-
-            # Write a file
-            await sandbox.write_file("/tmp/test.py", "print('Hello from Python!')")
             print("Wrote file: /tmp/test.py")
 
-            # Read the file back
-            content = await sandbox.read_file_text("/tmp/test.py")
+            # Read the file back and execute it, again concurrently
+            content, result = await asyncio.gather(
+                sandbox.read_file_text("/tmp/test.py"),
+                sandbox.run("python3 /tmp/test.py"),
+            )
             print(f"File content: {content}")
-
-            # Execute the Python script
-            result = await sandbox.run("python3 /tmp/test.py")
             print(f"Script output: {result.stdout}")
 
             # Set working directory
@@ -20,6 +20,7 @@ Usage:
 
 from .client import OpenSandbox
 from .sandbox import Sandbox, CommandResult
+from .sync import SyncOpenSandbox, SyncSandbox
 from .exceptions import (
     OpenSandboxError,
     SandboxNotFoundError,
@@ -34,6 +35,8 @@ __all__ = [
     "OpenSandbox",
     "Sandbox",
     "CommandResult",
+    "SyncOpenSandbox",
+    "SyncSandbox",
     "OpenSandboxError",
     "SandboxNotFoundError",
     "SandboxConnectionError",
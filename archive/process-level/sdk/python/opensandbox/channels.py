@@ -0,0 +1,83 @@
+"""Pool of gRPC channels shared by the sandboxes of one client."""
+
+import asyncio
+import itertools
+from typing import List, Optional
+
+import grpc
+
+from .proto import sandbox_pb2_grpc
+
+# Largest message the channels send or accept, matching the server's limit
+MAX_MESSAGE_LENGTH = 64 * 1024 * 1024
+
+# Channel options. Keepalive pings detect connections dropped while idle (e.g.
+# by a NAT or load balancer) instead of stalling the next call until a TCP
+# timeout. A local subchannel pool per channel keeps gRPC from sharing one
+# connection between the channels of a pool.
+CHANNEL_OPTIONS = [
+    ("grpc.keepalive_time_ms", 20000),
+    ("grpc.keepalive_timeout_ms", 10000),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.max_pings_without_data", 0),
+    ("grpc.http2.min_time_between_pings_ms", 10000),
+    ("grpc.max_send_message_length", MAX_MESSAGE_LENGTH),
+    ("grpc.max_receive_message_length", MAX_MESSAGE_LENGTH),
+    ("grpc.use_local_subchannel_pool", 1),
+]
+
+
+class ChannelPool:
+    """A fixed set of gRPC channels to one server, used round-robin.
+
+    A single HTTP/2 connection only allows a limited number of concurrent
+    streams (typically 100), so with many busy sandboxes RPCs on one channel
+    queue behind each other. Spreading calls over several channels, each on
+    its own connection, avoids that.
+    """
+
+    def __init__(
+        self,
+        target: str,
+        size: int,
+        credentials: Optional[grpc.ChannelCredentials] = None,
+    ):
+        """Open the channels.
+
+        Args:
+            target: Server address as "host:port".
+            size: Number of channels to open.
+            credentials: Channel credentials for TLS. If None, channels are insecure.
+        """
+        self._channels = []
+        for _ in range(max(size, 1)):
+            if credentials is not None:
+                channel = grpc.aio.secure_channel(target, credentials, options=CHANNEL_OPTIONS)
+            else:
+                channel = grpc.aio.insecure_channel(target, options=CHANNEL_OPTIONS)
+            self._channels.append(channel)
+        self._stubs = itertools.cycle(
+            [sandbox_pb2_grpc.SandboxServiceStub(c) for c in self._channels]
+        )
+        self._connect_tasks: List[asyncio.Task] = []
+
+    def connect(self) -> None:
+        """Start connecting all channels in the background.
+
+        Channels otherwise connect on their first call, which then waits for
+        the TCP and TLS handshakes. Must be called from a running event loop.
+        """
+        self._connect_tasks = [
+            asyncio.ensure_future(channel.channel_ready()) for channel in self._channels
+        ]
+
+    def stub(self) -> sandbox_pb2_grpc.SandboxServiceStub:
+        """Get the stub for the next channel in turn."""
+        return next(self._stubs)
+
+    async def close(self) -> None:
+        """Close all channels."""
+        for task in self._connect_tasks:
+            task.cancel()
+        await asyncio.gather(*self._connect_tasks, return_exceptions=True)
+        await asyncio.gather(*(channel.close() for channel in self._channels))
@@ -1,12 +1,26 @@
 """OpenSandbox client for creating and managing sandbox sessions."""
 
-from typing import Optional, Dict
+from typing import Any, Optional, Dict, Tuple
 from urllib.parse import urlparse
 
 import grpc
 import httpx
 
-from .sandbox import Sandbox
+try:
+    import orjson
+
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    import json
+
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode()
+
+    _loads = json.loads
+
+from .channels import ChannelPool
+from .sandbox import Sandbox, CommandResult
 from .exceptions import SandboxConnectionError
 
 
@@ -16,6 +30,12 @@ class OpenSandbox:
     This client uses HTTP for sandbox lifecycle (create/destroy) and
     gRPC for fast command execution and file operations.
 
+    Connections are opened once and shared by every sandbox the client
+    creates. gRPC calls are spread round-robin over a small pool of
+    channels, each multiplexing many calls over one HTTP/2 connection, so
+    independent operations can be issued concurrently (e.g. with
+    asyncio.gather) without opening more connections.
+
     Usage:
         async with OpenSandbox("https://opensandbox.example.com") as client:
             sandbox = await client.create()
@@ -30,7 +50,11 @@ class OpenSandbox:
         *,
         grpc_port: Optional[int] = None,
         grpc_insecure: Optional[bool] = None,
+        grpc_pool_size: int = 4,
         timeout: float = 30.0,
+        http2: bool = True,
+        max_connections: int = 1000,
+        max_keepalive_connections: int = 100,
     ):
         """Initialize the OpenSandbox client.
 
@@ -39,34 +63,54 @@ class OpenSandbox:
             grpc_port: gRPC port (default: 50051). If None, uses 50051.
             grpc_insecure: Force insecure gRPC even with HTTPS. Useful for Fly.io where
                           gRPC is exposed as raw TCP. If None, auto-detects from URL scheme.
+            grpc_pool_size: Number of gRPC channels (connections) to spread calls over.
             timeout: Default timeout for HTTP requests in seconds.
+            http2: Use HTTP/2 for the HTTP API, so concurrent create/destroy calls
+                   share one connection. Disable for HTTP/1.1-only proxies.
+            max_connections: Maximum number of concurrent HTTP connections.
+            max_keepalive_connections: Maximum number of idle connections kept open
+                                       for reuse.
         """
         self._base_url = base_url.rstrip("/")
-        self._grpc_port = grpc_port or 50051
+        self._grpc_pool_size = grpc_pool_size
         self._timeout = timeout
+        self._http2 = http2
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=30.0,
+        )
         self._http_client: Optional[httpx.AsyncClient] = None
-        self._grpc_channel: Optional[grpc.aio.Channel] = None
+        self._grpc_pool: Optional[ChannelPool] = None
 
         # Parse the URL to get host for gRPC
         parsed = urlparse(self._base_url)
-        self._host = parsed.hostname or "localhost"
-        # Use secure gRPC for HTTPS unless explicitly set to insecure
-        self._grpc_secure = parsed.scheme == "https" and not grpc_insecure
+        self._grpc_target = f"{parsed.hostname or 'localhost'}:{grpc_port or 50051}"
+        # Use secure gRPC for HTTPS unless explicitly set to insecure.
+        # Created once, as loading the root certificates is not free.
+        self._grpc_credentials: Optional[grpc.ChannelCredentials] = (
+            grpc.ssl_channel_credentials()
+            if parsed.scheme == "https" and not grpc_insecure
+            else None
+        )
 
     async def _ensure_connected(self) -> None:
         """Ensure HTTP and gRPC connections are established."""
         if self._http_client is None:
-            self._http_client = httpx.AsyncClient(timeout=self._timeout)
-
-        if self._grpc_channel is None:
-            grpc_target = f"{self._host}:{self._grpc_port}"
-            if self._grpc_secure:
-                # Use secure channel for HTTPS
-                credentials = grpc.ssl_channel_credentials()
-                self._grpc_channel = grpc.aio.secure_channel(grpc_target, credentials)
-            else:
-                # Use insecure channel for HTTP or when grpc_insecure=True
-                self._grpc_channel = grpc.aio.insecure_channel(grpc_target)
+            self._http_client = httpx.AsyncClient(
+                timeout=self._timeout,
+                http2=self._http2,
+                limits=self._limits,
+            )
+
+        if self._grpc_pool is None:
+            self._grpc_pool = ChannelPool(
+                self._grpc_target,
+                self._grpc_pool_size,
+                self._grpc_credentials,
+            )
+            # Connect while the caller waits on the HTTP API, e.g. in create()
+            self._grpc_pool.connect()
 
     async def create(
         self,
@@ -86,32 +130,76 @@ class OpenSandbox:
         Raises:
             SandboxConnectionError: If connection to the server fails.
         """
+        data = await self._create_session({"env": env} if env else {}, timeout)
+        return self._sandbox(data["session_id"])
+
+    async def create_and_run(
+        self,
+        command: str,
+        *,
+        env: Optional[Dict[str, str]] = None,
+        timeout: int = 300,
+    ) -> Tuple[Sandbox, CommandResult]:
+        """Create a new sandbox session and run a first command in it.
+
+        The command runs as part of session creation, so this takes one round
+        trip instead of two for create() followed by run(). The command gets
+        the default resource limits.
+
+        Args:
+            command: The shell command to execute.
+            env: Initial environment variables for the sandbox.
+            timeout: Sandbox timeout in seconds.
+
+        Returns:
+            Tuple of (sandbox, result of the command).
+
+        Raises:
+            SandboxConnectionError: If connection to the server fails or the
+                command could not be run.
+        """
+        body: Dict[str, Any] = {"init": [["/bin/sh", "-c", command]]}
+        if env:
+            body["env"] = env
+        data = await self._create_session(body, timeout)
+        result = data["init_results"][0]
+        return self._sandbox(data["session_id"]), CommandResult(
+            stdout=result["stdout"],
+            stderr=result["stderr"],
+            exit_code=result.get("exit_code") or 0,
+            signal=result.get("signal") or 0,
+        )
+
+    async def _create_session(self, body: Dict[str, Any], timeout: int) -> Dict[str, Any]:
+        """Create a session through the HTTP API and return the response data."""
         await self._ensure_connected()
 
         try:
             response = await self._http_client.post(
                 f"{self._base_url}/sessions",
-                json={"env": env or {}},
+                content=_dumps(body),
+                headers={"content-type": "application/json"},
                 timeout=timeout,
             )
             response.raise_for_status()
-            data = response.json()
-            session_id = data["session_id"]
+            return _loads(response.content)
         except httpx.HTTPError as e:
             raise SandboxConnectionError(f"Failed to create sandbox: {e}") from e
 
+    def _sandbox(self, session_id: str) -> Sandbox:
+        """Wrap a session in a Sandbox sharing this client's connections."""
         return Sandbox(
             session_id=session_id,
-            grpc_channel=self._grpc_channel,
+            grpc_pool=self._grpc_pool,
             http_base_url=self._base_url,
             http_client=self._http_client,
         )
 
     async def close(self) -> None:
         """Close all connections to the server."""
-        if self._grpc_channel is not None:
-            await self._grpc_channel.close()
-            self._grpc_channel = None
+        if self._grpc_pool is not None:
+            await self._grpc_pool.close()
+            self._grpc_pool = None
 
         if self._http_client is not None:
             await self._http_client.aclose()
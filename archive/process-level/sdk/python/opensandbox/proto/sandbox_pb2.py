@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\rsandbox.proto\x12\x07sandbox\"\xe6\x01\n\x11RunCommandRequest\x12\x12\n\nsession_id\x18\x01 \x01(\t\x12\x0f\n\x07\x63ommand\x18\x02 \x03(\t\x12\x0f\n\x07time_ms\x18\x03 \x01(\x04\x12\x0e\n\x06mem_kb\x18\x04 \x01(\x04\x12\x10\n\x08\x66size_kb\x18\x05 \x01(\x04\x12\x0e\n\x06nofile\x18\x06 \x01(\x04\x12\x30\n\x03\x65nv\x18\x07 \x03(\x0b\x32#.sandbox.RunCommandRequest.EnvEntry\x12\x0b\n\x03\x63wd\x18\x08 \x01(\t\x1a*\n\x08\x45nvEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"W\n\x12RunCommandResponse\x12\x0e\n\x06stdout\x18\x01 \x01(\t\x12\x0e\n\x06stderr\x18\x02 \x01(\t\x12\x11\n\texit_code\x18\x03 \x01(\x05\x12\x0e\n\x06signal\x18\x04 \x01(\x05\"E\n\x10WriteFileRequest\x12\x12\n\nsession_id\x18\x01 \x01(\t\x12\x0c\n\x04path\x18\x02 \x01(\t\x12\x0f\n\x07\x63ontent\x18\x03 \x01(\x0c\"3\n\x11WriteFileResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\r\n\x05\x65rror\x18\x02 \x01(\t\"3\n\x0fReadFileRequest\x12\x12\n\nsession_id\x18\x01 \x01(\t\x12\x0c\n\x04path\x18\x02 \x01(\t\"2\n\x10ReadFileResponse\x12\x0f\n\x07\x63ontent\x18\x01 \x01(\x0c\x12\r\n\x05\x65rror\x18\x02 \x01(\t\"}\n\rSetEnvRequest\x12\x12\n\nsession_id\x18\x01 \x01(\t\x12,\n\x03\x65nv\x18\x02 \x03(\x0b\x32\x1f.sandbox.SetEnvRequest.EnvEntry\x1a*\n\x08\x45nvEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"!\n\x0eSetEnvResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\"0\n\rSetCwdRequest\x12\x12\n\nsession_id\x18\x01 \x01(\t\x12\x0b\n\x03\x63wd\x18\x02 \x01(\t\"!\n\x0eSetCwdResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x32\xd2\x02\n\x0eSandboxService\x12\x45\n\nRunCommand\x12\x1a.sandbox.RunCommandRequest\x1a\x1b.sandbox.RunCommandResponse\x12\x42\n\tWriteFile\x12\x19.sandbox.WriteFileRequest\x1a\x1a.sandbox.WriteFileResponse\x12?\n\x08ReadFile\x12\x18.sandbox.ReadFileRequest\x1a\x19.sandbox.ReadFileResponse\x12\x39\n\x06SetEnv\x12\x16.sandbox.SetEnvRequest\x1a\x17.sandbox.SetEnvResponse\x12\x39\n\x06SetCwd\x12\x16.sandbox.SetCwdRequest\x1a\x17.sandbox.SetCwdResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\rsandbox.proto\x12\x07sandbox\"\xdf\x02\n\x11RunCommandRequest\x12\x12\n\nsession_id\x18\x01 \x01(\t\x12\x0f\n\x07\x63ommand\x18\x02 \x03(\t\x12\x0f\n\x07time_ms\x18\x03 \x01(\x04\x12\x0e\n\x06mem_kb\x18\x04 \x01(\x04\x12\x10\n\x08\x66size_kb\x18\x05 \x01(\x04\x12\x0e\n\x06nofile\x18\x06 \x01(\x04\x12\x30\n\x03\x65nv\x18\x07 \x03(\x0b\x32#.sandbox.RunCommandRequest.EnvEntry\x12\x0b\n\x03\x63wd\x18\x08 \x01(\t\x12\x37\n\x07set_env\x18\t \x03(\x0b\x32&.sandbox.RunCommandRequest.SetEnvEntry\x12\x0f\n\x07set_cwd\x18\n \x01(\t\x1a*\n\x08\x45nvEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\x1a-\n\x0bSetEnvEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"W\n\x12RunCommandResponse\x12\x0e\n\x06stdout\x18\x01 \x01(\t\x12\x0e\n\x06stderr\x18\x02 \x01(\t\x12\x11\n\texit_code\x18\x03 \x01(\x05\x12\x0e\n\x06signal\x18\x04 \x01(\x05\"q\n\x16\x42\x61tchRunCommandRequest\x12\x12\n\nsession_id\x18\x01 \x01(\t\x12,\n\x08\x63ommands\x18\x02 \x03(\x0b\x32\x1a.sandbox.RunCommandRequest\x12\x15\n\rstop_on_error\x18\x03 \x01(\x08\"G\n\x17\x42\x61tchRunCommandResponse\x12,\n\x07results\x18\x01 \x03(\x0b\x32\x1b.sandbox.RunCommandResponse\"E\n\x10WriteFileRequest\x12\x12\n\nsession_id\x18\x01 \x01(\t\x12\x0c\n\x04path\x18\x02 \x01(\t\x12\x0f\n\x07\x63ontent\x18\x03 \x01(\x0c\"C\n\x0eWriteFileChunk\x12\x12\n\nsession_id\x18\x01 \x01(\t\x12\x0c\n\x04path\x18\x02 \x01(\t\x12\x0f\n\x07\x63ontent\x18\x03 \x01(\x0c\"3\n\x11WriteFileResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\r\n\x05\x65rror\x18\x02 \x01(\t\"h\n\x0fReadFileRequest\x12\x12\n\nsession_id\x18\x01 \x01(\t\x12\x0c\n\x04path\x18\x02 \x01(\t\x12\x10\n\x08\x63ompress\x18\x05 \x01(\x08\x12\x15\n\rif_none_match\x18\x06 \x01(\tJ\x04\x08\x03\x10\x04J\x04\x08\x04\x10\x05\"2\n\x10ReadFileResponse\x12\x0f\n\x07\x63ontent\x18\x01 \x01(\x0c\x12\r\n\x05\x65rror\x18\x02 \x01(\t\"\x81\x01\n\rReadFileChunk\x12\x0f\n\x07\x63ontent\x18\x01 \x01(\x0c\x12\x12\n\ntotal_size\x18\x02 \x01(\x04\x12\r\n\x05\x65rror\x18\x03 \x01(\t\x12\x14\n\x0cnot_modified\x18\x05 \x01(\x08\x12\x12\n\ncompressed\x18\x06 \x01(\x08\x12\x0c\n\x04\x65tag\x18\x07 \x01(\tJ\x04\x08\x04\x10\x05\"+\n\x15\x44\x65stroySessionRequest\x12\x12\n\nsession_id\x18\x01 \x01(\t\")\n\x16\x44\x65stroySessionResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\"}\n\rSetEnvRequest\x12\x12\n\nsession_id\x18\x01 \x01(\t\x12,\n\x03\x65nv\x18\x02 \x03(\x0b\x32\x1f.sandbox.SetEnvRequest.EnvEntry\x1a*\n\x08\x45nvEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"!\n\x0eSetEnvResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\"0\n\rSetCwdRequest\x12\x12\n\nsession_id\x18\x01 \x01(\t\x12\x0b\n\x03\x63wd\x18\x02 \x01(\t\"!\n\x0eSetCwdResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\".\n\rBulkFileEntry\x12\x0c\n\x04path\x18\x01 \x01(\t\x12\x0f\n\x07\x63ontent\x18\x02 \x01(\x0c\"N\n\x11WriteFilesRequest\x12\x12\n\nsession_id\x18\x01 \x01(\t\x12%\n\x05\x66iles\x18\x02 \x03(\x0b\x32\x16.sandbox.BulkFileEntry\"I\n\x12WriteFilesResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\"\n\x06\x65rrors\x18\x02 \x03(\x0b\x32\x12.sandbox.FileError\"(\n\tFileError\x12\x0c\n\x04path\x18\x01 \x01(\t\x12\r\n\x05\x65rror\x18\x02 \x01(\t2\xd2\x05\n\x0eSandboxService\x12\x45\n\nRunCommand\x12\x1a.sandbox.RunCommandRequest\x1a\x1b.sandbox.RunCommandResponse\x12T\n\x0f\x42\x61tchRunCommand\x12\x1f.sandbox.BatchRunCommandRequest\x1a .sandbox.BatchRunCommandResponse\x12\x42\n\tWriteFile\x12\x19.sandbox.WriteFileRequest\x1a\x1a.sandbox.WriteFileResponse\x12\x45\n\nWriteFiles\x12\x1a.sandbox.WriteFilesRequest\x1a\x1b.sandbox.WriteFilesResponse\x12H\n\x0fWriteFileStream\x12\x17.sandbox.WriteFileChunk\x1a\x1a.sandbox.WriteFileResponse(\x01\x12?\n\x08ReadFile\x12\x18.sandbox.ReadFileRequest\x1a\x19.sandbox.ReadFileResponse\x12\x44\n\x0eReadFileStream\x12\x18.sandbox.ReadFileRequest\x1a\x16.sandbox.ReadFileChunk0\x01\x12Q\n\x0e\x44\x65stroySession\x12\x1e.sandbox.DestroySessionRequest\x1a\x1f.sandbox.DestroySessionResponse\x12\x39\n\x06SetEnv\x12\x16.sandbox.SetEnvRequest\x1a\x17.sandbox.SetEnvResponse\x12\x39\n\x06SetCwd\x12\x16.sandbox.SetCwdRequest\x1a\x17.sandbox.SetCwdResponseb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -33,32 +33,56 @@ if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
   _globals['_RUNCOMMANDREQUEST_ENVENTRY']._loaded_options = None
   _globals['_RUNCOMMANDREQUEST_ENVENTRY']._serialized_options = b'8\001'
+  _globals['_RUNCOMMANDREQUEST_SETENVENTRY']._loaded_options = None
+  _globals['_RUNCOMMANDREQUEST_SETENVENTRY']._serialized_options = b'8\001'
   _globals['_SETENVREQUEST_ENVENTRY']._loaded_options = None
   _globals['_SETENVREQUEST_ENVENTRY']._serialized_options = b'8\001'
   _globals['_RUNCOMMANDREQUEST']._serialized_start=27
-  _globals['_RUNCOMMANDREQUEST']._serialized_end=257
-  _globals['_RUNCOMMANDREQUEST_ENVENTRY']._serialized_start=215
-  _globals['_RUNCOMMANDREQUEST_ENVENTRY']._serialized_end=257
-  _globals['_RUNCOMMANDRESPONSE']._serialized_start=259
-  _globals['_RUNCOMMANDRESPONSE']._serialized_end=346
-  _globals['_WRITEFILEREQUEST']._serialized_start=348
-  _globals['_WRITEFILEREQUEST']._serialized_end=417
-  _globals['_WRITEFILERESPONSE']._serialized_start=419
-  _globals['_WRITEFILERESPONSE']._serialized_end=470
-  _globals['_READFILEREQUEST']._serialized_start=472
-  _globals['_READFILEREQUEST']._serialized_end=523
-  _globals['_READFILERESPONSE']._serialized_start=525
-  _globals['_READFILERESPONSE']._serialized_end=575
-  _globals['_SETENVREQUEST']._serialized_start=577
-  _globals['_SETENVREQUEST']._serialized_end=702
-  _globals['_SETENVREQUEST_ENVENTRY']._serialized_start=215
-  _globals['_SETENVREQUEST_ENVENTRY']._serialized_end=257
-  _globals['_SETENVRESPONSE']._serialized_start=704
-  _globals['_SETENVRESPONSE']._serialized_end=737
-  _globals['_SETCWDREQUEST']._serialized_start=739
-  _globals['_SETCWDREQUEST']._serialized_end=787
-  _globals['_SETCWDRESPONSE']._serialized_start=789
-  _globals['_SETCWDRESPONSE']._serialized_end=822
-  _globals['_SANDBOXSERVICE']._serialized_start=825
-  _globals['_SANDBOXSERVICE']._serialized_end=1163
+  _globals['_RUNCOMMANDREQUEST']._serialized_end=378
+  _globals['_RUNCOMMANDREQUEST_ENVENTRY']._serialized_start=289
+  _globals['_RUNCOMMANDREQUEST_ENVENTRY']._serialized_end=331
+  _globals['_RUNCOMMANDREQUEST_SETENVENTRY']._serialized_start=333
+  _globals['_RUNCOMMANDREQUEST_SETENVENTRY']._serialized_end=378
+  _globals['_RUNCOMMANDRESPONSE']._serialized_start=380
+  _globals['_RUNCOMMANDRESPONSE']._serialized_end=467
+  _globals['_BATCHRUNCOMMANDREQUEST']._serialized_start=469
+  _globals['_BATCHRUNCOMMANDREQUEST']._serialized_end=582
+  _globals['_BATCHRUNCOMMANDRESPONSE']._serialized_start=584
+  _globals['_BATCHRUNCOMMANDRESPONSE']._serialized_end=655
+  _globals['_WRITEFILEREQUEST']._serialized_start=657
+  _globals['_WRITEFILEREQUEST']._serialized_end=726
+  _globals['_WRITEFILECHUNK']._serialized_start=728
+  _globals['_WRITEFILECHUNK']._serialized_end=795
+  _globals['_WRITEFILERESPONSE']._serialized_start=797
+  _globals['_WRITEFILERESPONSE']._serialized_end=848
+  _globals['_READFILEREQUEST']._serialized_start=850
+  _globals['_READFILEREQUEST']._serialized_end=954
+  _globals['_READFILERESPONSE']._serialized_start=956
+  _globals['_READFILERESPONSE']._serialized_end=1006
+  _globals['_READFILECHUNK']._serialized_start=1009
+  _globals['_READFILECHUNK']._serialized_end=1138
+  _globals['_DESTROYSESSIONREQUEST']._serialized_start=1140
+  _globals['_DESTROYSESSIONREQUEST']._serialized_end=1183
+  _globals['_DESTROYSESSIONRESPONSE']._serialized_start=1185
+  _globals['_DESTROYSESSIONRESPONSE']._serialized_end=1226
+  _globals['_SETENVREQUEST']._serialized_start=1228
+  _globals['_SETENVREQUEST']._serialized_end=1353
+  _globals['_SETENVREQUEST_ENVENTRY']._serialized_start=289
+  _globals['_SETENVREQUEST_ENVENTRY']._serialized_end=331
+  _globals['_SETENVRESPONSE']._serialized_start=1355
+  _globals['_SETENVRESPONSE']._serialized_end=1388
+  _globals['_SETCWDREQUEST']._serialized_start=1390
+  _globals['_SETCWDREQUEST']._serialized_end=1438
+  _globals['_SETCWDRESPONSE']._serialized_start=1440
+  _globals['_SETCWDRESPONSE']._serialized_end=1473
+  _globals['_BULKFILEENTRY']._serialized_start=1475
+  _globals['_BULKFILEENTRY']._serialized_end=1521
+  _globals['_WRITEFILESREQUEST']._serialized_start=1523
+  _globals['_WRITEFILESREQUEST']._serialized_end=1601
+  _globals['_WRITEFILESRESPONSE']._serialized_start=1603
+  _globals['_WRITEFILESRESPONSE']._serialized_end=1676
+  _globals['_FILEERROR']._serialized_start=1678
+  _globals['_FILEERROR']._serialized_end=1718
+  _globals['_SANDBOXSERVICE']._serialized_start=1721
+  _globals['_SANDBOXSERVICE']._serialized_end=2443
 # @@protoc_insertion_point(module_scope)
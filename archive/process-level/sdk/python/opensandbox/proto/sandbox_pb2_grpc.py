@@ -39,16 +39,41 @@ class SandboxServiceStub(object):
                 request_serializer=sandbox__pb2.RunCommandRequest.SerializeToString,
                 response_deserializer=sandbox__pb2.RunCommandResponse.FromString,
                 _registered_method=True)
+        self.BatchRunCommand = channel.unary_unary(
+                '/sandbox.SandboxService/BatchRunCommand',
+                request_serializer=sandbox__pb2.BatchRunCommandRequest.SerializeToString,
+                response_deserializer=sandbox__pb2.BatchRunCommandResponse.FromString,
+                _registered_method=True)
         self.WriteFile = channel.unary_unary(
                 '/sandbox.SandboxService/WriteFile',
                 request_serializer=sandbox__pb2.WriteFileRequest.SerializeToString,
                 response_deserializer=sandbox__pb2.WriteFileResponse.FromString,
                 _registered_method=True)
+        self.WriteFiles = channel.unary_unary(
+                '/sandbox.SandboxService/WriteFiles',
+                request_serializer=sandbox__pb2.WriteFilesRequest.SerializeToString,
+                response_deserializer=sandbox__pb2.WriteFilesResponse.FromString,
+                _registered_method=True)
+        self.WriteFileStream = channel.stream_unary(
+                '/sandbox.SandboxService/WriteFileStream',
+                request_serializer=sandbox__pb2.WriteFileChunk.SerializeToString,
+                response_deserializer=sandbox__pb2.WriteFileResponse.FromString,
+                _registered_method=True)
         self.ReadFile = channel.unary_unary(
                 '/sandbox.SandboxService/ReadFile',
                 request_serializer=sandbox__pb2.ReadFileRequest.SerializeToString,
                 response_deserializer=sandbox__pb2.ReadFileResponse.FromString,
                 _registered_method=True)
+        self.ReadFileStream = channel.unary_stream(
+                '/sandbox.SandboxService/ReadFileStream',
+                request_serializer=sandbox__pb2.ReadFileRequest.SerializeToString,
+                response_deserializer=sandbox__pb2.ReadFileChunk.FromString,
+                _registered_method=True)
+        self.DestroySession = channel.unary_unary(
+                '/sandbox.SandboxService/DestroySession',
+                request_serializer=sandbox__pb2.DestroySessionRequest.SerializeToString,
+                response_deserializer=sandbox__pb2.DestroySessionResponse.FromString,
+                _registered_method=True)
         self.SetEnv = channel.unary_unary(
                 '/sandbox.SandboxService/SetEnv',
                 request_serializer=sandbox__pb2.SetEnvRequest.SerializeToString,
@@ -71,6 +96,13 @@ class SandboxServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def BatchRunCommand(self, request, context):
+        """Run several commands in one session, in order, in one round trip
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def WriteFile(self, request, context):
         """File operations
         """
@@ -78,12 +110,39 @@ class SandboxServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def WriteFiles(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def WriteFileStream(self, request_iterator, context):
+        """Upload a file as a stream of chunks, for files too large for one message
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def ReadFile(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def ReadFileStream(self, request, context):
+        """Download a file as a stream of chunks
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def DestroySession(self, request, context):
+        """Session lifecycle
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def SetEnv(self, request, context):
         """Environment/CWD
         """
@@ -105,16 +164,41 @@ def add_SandboxServiceServicer_to_server(servicer, server):
                     request_deserializer=sandbox__pb2.RunCommandRequest.FromString,
                     response_serializer=sandbox__pb2.RunCommandResponse.SerializeToString,
             ),
+            'BatchRunCommand': grpc.unary_unary_rpc_method_handler(
+                    servicer.BatchRunCommand,
+                    request_deserializer=sandbox__pb2.BatchRunCommandRequest.FromString,
+                    response_serializer=sandbox__pb2.BatchRunCommandResponse.SerializeToString,
+            ),
             'WriteFile': grpc.unary_unary_rpc_method_handler(
                     servicer.WriteFile,
                     request_deserializer=sandbox__pb2.WriteFileRequest.FromString,
                     response_serializer=sandbox__pb2.WriteFileResponse.SerializeToString,
             ),
+            'WriteFiles': grpc.unary_unary_rpc_method_handler(
+                    servicer.WriteFiles,
+                    request_deserializer=sandbox__pb2.WriteFilesRequest.FromString,
+                    response_serializer=sandbox__pb2.WriteFilesResponse.SerializeToString,
+            ),
+            'WriteFileStream': grpc.stream_unary_rpc_method_handler(
+                    servicer.WriteFileStream,
+                    request_deserializer=sandbox__pb2.WriteFileChunk.FromString,
+                    response_serializer=sandbox__pb2.WriteFileResponse.SerializeToString,
+            ),
             'ReadFile': grpc.unary_unary_rpc_method_handler(
                     servicer.ReadFile,
                     request_deserializer=sandbox__pb2.ReadFileRequest.FromString,
                     response_serializer=sandbox__pb2.ReadFileResponse.SerializeToString,
             ),
+            'ReadFileStream': grpc.unary_stream_rpc_method_handler(
+                    servicer.ReadFileStream,
+                    request_deserializer=sandbox__pb2.ReadFileRequest.FromString,
+                    response_serializer=sandbox__pb2.ReadFileChunk.SerializeToString,
+            ),
+            'DestroySession': grpc.unary_unary_rpc_method_handler(
+                    servicer.DestroySession,
+                    request_deserializer=sandbox__pb2.DestroySessionRequest.FromString,
+                    response_serializer=sandbox__pb2.DestroySessionResponse.SerializeToString,
+            ),
             'SetEnv': grpc.unary_unary_rpc_method_handler(
                     servicer.SetEnv,
                     request_deserializer=sandbox__pb2.SetEnvRequest.FromString,
@@ -163,6 +247,33 @@ class SandboxService(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def BatchRunCommand(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/sandbox.SandboxService/BatchRunCommand',
+            sandbox__pb2.BatchRunCommandRequest.SerializeToString,
+            sandbox__pb2.BatchRunCommandResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def WriteFile(request,
             target,
@@ -190,6 +301,60 @@ class SandboxService(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def WriteFiles(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/sandbox.SandboxService/WriteFiles',
+            sandbox__pb2.WriteFilesRequest.SerializeToString,
+            sandbox__pb2.WriteFilesResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def WriteFileStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/sandbox.SandboxService/WriteFileStream',
+            sandbox__pb2.WriteFileChunk.SerializeToString,
+            sandbox__pb2.WriteFileResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def ReadFile(request,
             target,
@@ -217,6 +382,60 @@ class SandboxService(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def ReadFileStream(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/sandbox.SandboxService/ReadFileStream',
+            sandbox__pb2.ReadFileRequest.SerializeToString,
+            sandbox__pb2.ReadFileChunk.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def DestroySession(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/sandbox.SandboxService/DestroySession',
+            sandbox__pb2.DestroySessionRequest.SerializeToString,
+            sandbox__pb2.DestroySessionResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def SetEnv(request,
             target,
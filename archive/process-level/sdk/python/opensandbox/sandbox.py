@@ -1,16 +1,29 @@
 """Sandbox session class for interacting with a running sandbox."""
 
+import gzip
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Optional, Dict
+from typing import AsyncIterable, AsyncIterator, Optional, Dict, List, Tuple, Union
 import grpc
+import httpx
 
-from .proto import sandbox_pb2, sandbox_pb2_grpc
+from .channels import ChannelPool
+from .proto import sandbox_pb2
 from .exceptions import (
     CommandExecutionError,
     FileOperationError,
     SandboxNotFoundError,
 )
 
+# Files larger than this are uploaded as a stream of chunks of this size
+WRITE_CHUNK_SIZE = 64 * 1024
+
+# Files smaller than this are not worth compressing
+COMPRESS_MIN_SIZE = 4096
+
+# Number of files kept by read_file(cache=True), per sandbox
+READ_CACHE_SIZE = 32
+
 
 @dataclass
 class CommandResult:
@@ -35,7 +48,7 @@ class Sandbox:
     def __init__(
         self,
         session_id: str,
-        grpc_channel: grpc.Channel,
+        grpc_pool: ChannelPool,
         http_base_url: str,
         http_client,
     ):
@@ -43,16 +56,20 @@ class Sandbox:
 
         Args:
             session_id: The unique session ID from the server.
-            grpc_channel: The gRPC channel for fast operations.
-            http_base_url: Base URL for HTTP API (used for destroy).
+            grpc_pool: The gRPC channels for fast operations.
+            http_base_url: Base URL for HTTP API (used if destroying over gRPC fails).
             http_client: HTTP client instance.
         """
         self.session_id = session_id
-        self._grpc_channel = grpc_channel
-        self._stub = sandbox_pb2_grpc.SandboxServiceStub(grpc_channel)
+        self._grpc_pool = grpc_pool
         self._http_base_url = http_base_url
         self._http_client = http_client
         self._destroyed = False
+        # Session state from set_env/set_cwd, sent with the next command
+        self._pending_env: Dict[str, str] = {}
+        self._pending_cwd: Optional[str] = None
+        # Files read with cache=True: path -> (etag, content)
+        self._read_cache: OrderedDict[str, Tuple[str, bytes]] = OrderedDict()
 
     async def run(
         self,
@@ -69,8 +86,8 @@ class Sandbox:
             command: The shell command to execute.
             timeout_ms: CPU time limit in milliseconds.
             mem_kb: Memory limit in KB.
-            env: Additional environment variables.
-            cwd: Working directory for the command.
+            env: Additional environment variables for this command only.
+            cwd: Working directory for this command only.
 
         Returns:
             CommandResult with stdout, stderr, exit_code, and signal.
@@ -82,36 +99,145 @@ class Sandbox:
         if self._destroyed:
             raise SandboxNotFoundError("Sandbox has been destroyed")
 
-        request = sandbox_pb2.RunCommandRequest(
+        request = self._run_request(command, timeout_ms, mem_kb, env, cwd)
+        self._take_pending(request)
+
+        try:
+            response = await self._grpc_pool.stub().RunCommand(request)
+            return self._command_result(response)
+        except grpc.RpcError as e:
+            self._restore_pending(request)
+            if e.code() == grpc.StatusCode.NOT_FOUND:
+                raise SandboxNotFoundError("Session not found") from e
+            raise CommandExecutionError(f"gRPC error: {e.details()}") from e
+
+    async def run_batch(
+        self,
+        commands: List[str],
+        *,
+        stop_on_error: bool = False,
+        timeout_ms: int = 300000,
+        mem_kb: int = 2097152,
+        env: Optional[Dict[str, str]] = None,
+        cwd: Optional[str] = None,
+    ) -> List[CommandResult]:
+        """Execute several shell commands in order, in a single round trip.
+
+        Args:
+            commands: The shell commands to execute.
+            stop_on_error: Skip the remaining commands once one exits non-zero.
+            timeout_ms: CPU time limit per command in milliseconds.
+            mem_kb: Memory limit per command in KB.
+            env: Additional environment variables for these commands only.
+            cwd: Working directory for these commands only.
+
+        Returns:
+            One CommandResult per command that ran. With stop_on_error, the
+            last result is the failed command.
+
+        Raises:
+            SandboxNotFoundError: If the session no longer exists.
+            CommandExecutionError: If there was an error executing the commands.
+        """
+        if self._destroyed:
+            raise SandboxNotFoundError("Sandbox has been destroyed")
+
+        request = sandbox_pb2.BatchRunCommandRequest(
             session_id=self.session_id,
-            command=["/bin/sh", "-c", command],
-            time_ms=timeout_ms,
-            mem_kb=mem_kb,
-            fsize_kb=1048576,
-            nofile=256,
-            env=env or {},
-            cwd=cwd or "",
+            commands=[
+                self._run_request(command, timeout_ms, mem_kb, env, cwd)
+                for command in commands
+            ],
+            stop_on_error=stop_on_error,
         )
+        if request.commands:
+            self._take_pending(request.commands[0])
 
         try:
-            response = await self._stub.RunCommand(request)
-            return CommandResult(
-                stdout=response.stdout,
-                stderr=response.stderr,
-                exit_code=response.exit_code,
-                signal=response.signal,
-            )
+            response = await self._grpc_pool.stub().BatchRunCommand(request)
+            return [self._command_result(result) for result in response.results]
         except grpc.RpcError as e:
+            if request.commands:
+                self._restore_pending(request.commands[0])
             if e.code() == grpc.StatusCode.NOT_FOUND:
                 raise SandboxNotFoundError("Session not found") from e
             raise CommandExecutionError(f"gRPC error: {e.details()}") from e
 
-    async def write_file(self, path: str, content: str | bytes) -> None:
+    def _run_request(
+        self,
+        command: str,
+        timeout_ms: int,
+        mem_kb: int,
+        env: Optional[Dict[str, str]],
+        cwd: Optional[str],
+    ) -> sandbox_pb2.RunCommandRequest:
+        """Build the request to run a shell command.
+
+        env and cwd are only set when given; unset fields are empty on the server.
+        """
+        request = sandbox_pb2.RunCommandRequest(
+            session_id=self.session_id,
+            command=("/bin/sh", "-c", command),
+            time_ms=timeout_ms,
+            mem_kb=mem_kb,
+            fsize_kb=1048576,
+            nofile=256,
+        )
+        if env:
+            request.env.update(env)
+        if cwd:
+            request.cwd = cwd
+        return request
+
+    def _take_pending(self, request: sandbox_pb2.RunCommandRequest) -> None:
+        """Move pending session state from set_env/set_cwd into a request."""
+        if self._pending_env:
+            request.set_env.update(self._pending_env)
+            self._pending_env = {}
+        if self._pending_cwd is not None:
+            request.set_cwd = self._pending_cwd
+            self._pending_cwd = None
+
+    def _restore_pending(self, request: sandbox_pb2.RunCommandRequest) -> None:
+        """Keep the session state of a failed request pending.
+
+        Values set again since the request was sent take precedence.
+        """
+        if request.set_env:
+            self._pending_env = {**request.set_env, **self._pending_env}
+        if request.set_cwd and self._pending_cwd is None:
+            self._pending_cwd = request.set_cwd
+
+    @staticmethod
+    def _command_result(response: sandbox_pb2.RunCommandResponse) -> CommandResult:
+        """Convert a RunCommandResponse into a CommandResult."""
+        return CommandResult(
+            stdout=response.stdout,
+            stderr=response.stderr,
+            exit_code=response.exit_code,
+            signal=response.signal,
+        )
+
+    async def write_file(
+        self,
+        path: str,
+        content: Union[str, bytes, bytearray, memoryview, AsyncIterable[bytes]],
+        *,
+        compression: bool = True,
+    ) -> None:
         """Write content to a file in the sandbox.
 
+        Content larger than `WRITE_CHUNK_SIZE` is streamed to the server in
+        chunks rather than sent as one message.
+
         Args:
             path: Absolute path in the sandbox filesystem.
-            content: File content (string or bytes).
+            content: File content (string or bytes-like object), or an async
+                     iterable of byte chunks, e.g. read from a local file, which is
+                     streamed without holding the whole file in memory.
+            compression: Gzip the upload unless it is smaller than
+                         `COMPRESS_MIN_SIZE`. Disable for content that is
+                         already compressed.
 
         Raises:
             SandboxNotFoundError: If the session no longer exists.
@@ -120,17 +246,38 @@ class Sandbox:
         if self._destroyed:
             raise SandboxNotFoundError("Sandbox has been destroyed")
 
+        self._read_cache.pop(path, None)
+
         if isinstance(content, str):
             content = content.encode("utf-8")
-
-        request = sandbox_pb2.WriteFileRequest(
-            session_id=self.session_id,
-            path=path,
-            content=content,
-        )
+        elif isinstance(content, (bytearray, memoryview)):
+            # Streamed from a view without copying the whole buffer
+            content = memoryview(content).cast("B")
+
+        streamed = isinstance(content, AsyncIterable)
+        if compression and (streamed or len(content) >= COMPRESS_MIN_SIZE):
+            compression_algorithm = grpc.Compression.Gzip
+        else:
+            compression_algorithm = None
+
+        stub = self._grpc_pool.stub()
+        if not streamed and len(content) <= WRITE_CHUNK_SIZE:
+            call = stub.WriteFile(
+                sandbox_pb2.WriteFileRequest(
+                    session_id=self.session_id,
+                    path=path,
+                    content=bytes(content) if isinstance(content, memoryview) else content,
+                ),
+                compression=compression_algorithm,
+            )
+        else:
+            call = stub.WriteFileStream(
+                self._file_chunks(path, content),
+                compression=compression_algorithm,
+            )
 
         try:
-            response = await self._stub.WriteFile(request)
+            response = await call
             if not response.success:
                 raise FileOperationError(f"Failed to write file: {response.error}")
         except grpc.RpcError as e:
@@ -138,11 +285,38 @@ class Sandbox:
                 raise SandboxNotFoundError("Session not found") from e
             raise FileOperationError(f"gRPC error: {e.details()}") from e
 
-    async def read_file(self, path: str) -> bytes:
+    async def _file_chunks(
+        self, path: str, content: Union[bytes, memoryview, AsyncIterable[bytes]]
+    ) -> AsyncIterator[sandbox_pb2.WriteFileChunk]:
+        """Split file content into WriteFileStream messages.
+
+        The first message names the session and path; the rest carry content.
+        """
+        yield sandbox_pb2.WriteFileChunk(session_id=self.session_id, path=path)
+        if not isinstance(content, AsyncIterable):
+            view = memoryview(content)
+            for start in range(0, len(view), WRITE_CHUNK_SIZE):
+                yield sandbox_pb2.WriteFileChunk(
+                    content=bytes(view[start:start + WRITE_CHUNK_SIZE])
+                )
+        else:
+            async for chunk in content:
+                yield sandbox_pb2.WriteFileChunk(content=chunk)
+
+    async def read_file(
+        self, path: str, *, cache: bool = False, compression: bool = True
+    ) -> bytes:
         """Read a file from the sandbox.
 
         Args:
             path: Absolute path in the sandbox filesystem.
+            cache: Keep the contents in a small per-sandbox cache. A later
+                   cached read of the same path only downloads the file again
+                   if it has changed (its inode, change or modification time,
+                   or size).
+            compression: Have the server gzip the file content where that makes
+                         it smaller. Disable for content that is already
+                         compressed.
 
         Returns:
             The file contents as bytes.
@@ -151,24 +325,86 @@ class Sandbox:
             SandboxNotFoundError: If the session no longer exists.
             FileOperationError: If the file cannot be read.
         """
+        cached = self._read_cache.get(path) if cache else None
+        content = bytearray()
+        etag = ""
+        async for chunk in self._read_chunks(path, compression, cached):
+            if chunk.not_modified:
+                self._read_cache.move_to_end(path)
+                return cached[1]
+            content.extend(self._chunk_content(chunk))
+            etag = chunk.etag
+
+        if cache and etag:
+            self._read_cache[path] = (etag, bytes(content))
+            self._read_cache.move_to_end(path)
+            if len(self._read_cache) > READ_CACHE_SIZE:
+                self._read_cache.popitem(last=False)
+            return self._read_cache[path][1]
+        return bytes(content)
+
+    async def read_file_iter(
+        self, path: str, *, compression: bool = True
+    ) -> AsyncIterator[bytes]:
+        """Read a file from the sandbox in chunks, as the server streams it.
+
+        Lets callers process or save large files without holding the whole
+        file in memory.
+
+        Args:
+            path: Absolute path in the sandbox filesystem.
+            compression: Have the server gzip the file content where that makes
+                         it smaller.
+
+        Yields:
+            Consecutive chunks of the file contents.
+
+        Raises:
+            SandboxNotFoundError: If the session no longer exists.
+            FileOperationError: If the file cannot be read.
+        """
+        async for chunk in self._read_chunks(path, compression):
+            yield self._chunk_content(chunk)
+
+    async def _read_chunks(
+        self,
+        path: str,
+        compression: bool,
+        cached: Optional[Tuple[str, bytes]] = None,
+    ) -> AsyncIterator[sandbox_pb2.ReadFileChunk]:
+        """Stream ReadFileStream messages, raising on a read error.
+
+        With a cached copy, the server sends a single not_modified message if
+        the file is unchanged.
+        """
         if self._destroyed:
             raise SandboxNotFoundError("Sandbox has been destroyed")
 
         request = sandbox_pb2.ReadFileRequest(
             session_id=self.session_id,
             path=path,
+            compress=compression,
         )
+        if cached is not None:
+            request.if_none_match = cached[0]
 
         try:
-            response = await self._stub.ReadFile(request)
-            if response.error:
-                raise FileOperationError(f"Failed to read file: {response.error}")
-            return response.content
+            async for chunk in self._grpc_pool.stub().ReadFileStream(request):
+                if chunk.error:
+                    raise FileOperationError(f"Failed to read file: {chunk.error}")
+                yield chunk
         except grpc.RpcError as e:
             if e.code() == grpc.StatusCode.NOT_FOUND:
                 raise SandboxNotFoundError("Session not found") from e
             raise FileOperationError(f"gRPC error: {e.details()}") from e
 
+    @staticmethod
+    def _chunk_content(chunk: sandbox_pb2.ReadFileChunk) -> bytes:
+        """Get the file bytes of a ReadFileStream message."""
+        if chunk.compressed:
+            return gzip.decompress(chunk.content)
+        return chunk.content
+
     async def read_file_text(self, path: str, encoding: str = "utf-8") -> str:
         """Read a text file from the sandbox.
 
@@ -185,69 +421,67 @@ class Sandbox:
     async def set_env(self, env: Dict[str, str]) -> None:
         """Set environment variables for subsequent commands.
 
+        No request is made: the variables are sent along with the next
+        command and applied to the session before it runs.
+
         Args:
             env: Dictionary of environment variables to set.
 
         Raises:
-            SandboxNotFoundError: If the session no longer exists.
+            SandboxNotFoundError: If the sandbox has been destroyed.
         """
         if self._destroyed:
             raise SandboxNotFoundError("Sandbox has been destroyed")
 
-        request = sandbox_pb2.SetEnvRequest(
-            session_id=self.session_id,
-            env=env,
-        )
-
-        try:
-            await self._stub.SetEnv(request)
-        except grpc.RpcError as e:
-            if e.code() == grpc.StatusCode.NOT_FOUND:
-                raise SandboxNotFoundError("Session not found") from e
-            raise
+        self._pending_env.update(env)
 
     async def set_cwd(self, cwd: str) -> None:
         """Set the working directory for subsequent commands.
 
+        No request is made: the directory is sent along with the next command
+        and applied to the session before it runs.
+
         Args:
             cwd: The new working directory path.
 
         Raises:
-            SandboxNotFoundError: If the session no longer exists.
+            SandboxNotFoundError: If the sandbox has been destroyed.
         """
         if self._destroyed:
             raise SandboxNotFoundError("Sandbox has been destroyed")
 
-        request = sandbox_pb2.SetCwdRequest(
-            session_id=self.session_id,
-            cwd=cwd,
-        )
-
-        try:
-            await self._stub.SetCwd(request)
-        except grpc.RpcError as e:
-            if e.code() == grpc.StatusCode.NOT_FOUND:
-                raise SandboxNotFoundError("Session not found") from e
-            raise
+        self._pending_cwd = cwd
 
     async def destroy(self) -> None:
         """Destroy this sandbox session.
 
         After calling this method, the sandbox cannot be used anymore.
+        Destroys over gRPC like other operations, falling back to the HTTP API
+        if that fails.
         """
         if self._destroyed:
             return
 
         try:
-            response = await self._http_client.delete(
-                f"{self._http_base_url}/sessions/{self.session_id}"
+            await self._grpc_pool.stub().DestroySession(
+                sandbox_pb2.DestroySessionRequest(session_id=self.session_id)
             )
-            response.raise_for_status()
-        except Exception:
-            pass  # Best effort cleanup
+            return
+        except grpc.RpcError as e:
+            if e.code() == grpc.StatusCode.NOT_FOUND:
+                return  # Already gone
         finally:
             self._destroyed = True
 
+        # Best effort cleanup: the response status is not checked, and
+        # cancellation propagates
+        try:
+            await self._http_client.delete(
+                f"{self._http_base_url}/sessions/{self.session_id}"
+            )
+        except httpx.HTTPError:
+            pass
+
     async def __aenter__(self):
         """Async context manager entry."""
         return self
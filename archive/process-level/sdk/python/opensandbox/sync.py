@@ -0,0 +1,157 @@
+"""Blocking wrappers around the async client, for code without an event loop."""
+
+import asyncio
+from typing import Any, Awaitable, Dict, Iterator, List, Optional, Tuple, TypeVar, Union
+
+from .client import OpenSandbox
+from .sandbox import Sandbox, CommandResult
+
+T = TypeVar("T")
+
+
+class SyncOpenSandbox:
+    """Blocking client for connecting to an OpenSandbox server.
+
+    Wraps OpenSandbox and runs every call on one event loop owned by the
+    client, so its HTTP and gRPC connections stay open between calls instead
+    of being re-dialed by a fresh asyncio.run() each time.
+
+    Usage:
+        with SyncOpenSandbox("https://opensandbox.example.com") as client:
+            with client.create() as sandbox:
+                result = sandbox.run("echo hello")
+                print(result.stdout)
+    """
+
+    def __init__(self, base_url: str, **kwargs: Any):
+        """Initialize the client.
+
+        Args:
+            base_url: Base URL of the OpenSandbox server.
+            **kwargs: Options passed to OpenSandbox.
+        """
+        self._loop = asyncio.new_event_loop()
+        self._client = OpenSandbox(base_url, **kwargs)
+
+    def _run(self, awaitable: Awaitable[T]) -> T:
+        """Run a coroutine on the client's event loop until it completes."""
+        return self._loop.run_until_complete(awaitable)
+
+    def create(
+        self,
+        *,
+        env: Optional[Dict[str, str]] = None,
+        timeout: int = 300,
+    ) -> "SyncSandbox":
+        """Create a new sandbox session. See OpenSandbox.create."""
+        return SyncSandbox(self._run(self._client.create(env=env, timeout=timeout)), self._run)
+
+    def create_and_run(
+        self,
+        command: str,
+        *,
+        env: Optional[Dict[str, str]] = None,
+        timeout: int = 300,
+    ) -> Tuple["SyncSandbox", CommandResult]:
+        """Create a sandbox and run a first command. See OpenSandbox.create_and_run."""
+        sandbox, result = self._run(
+            self._client.create_and_run(command, env=env, timeout=timeout)
+        )
+        return SyncSandbox(sandbox, self._run), result
+
+    def close(self) -> None:
+        """Close all connections to the server and the event loop."""
+        if self._loop.is_closed():
+            return
+        try:
+            self._run(self._client.close())
+            self._run(self._loop.shutdown_asyncgens())
+        finally:
+            self._loop.close()
+
+    def __enter__(self):
+        """Context manager entry."""
+        self._run(self._client._ensure_connected())
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.close()
+        return False
+
+
+class SyncSandbox:
+    """Blocking wrapper around a Sandbox. See Sandbox for the methods."""
+
+    def __init__(self, sandbox: Sandbox, run):
+        """Wrap a sandbox.
+
+        Args:
+            sandbox: The async sandbox.
+            run: Runs a coroutine on the owning client's event loop.
+        """
+        self._sandbox = sandbox
+        self._run = run
+
+    @property
+    def session_id(self) -> str:
+        """The unique session ID from the server."""
+        return self._sandbox.session_id
+
+    def run(self, command: str, **kwargs: Any) -> CommandResult:
+        """Execute a shell command in the sandbox."""
+        return self._run(self._sandbox.run(command, **kwargs))
+
+    def run_batch(self, commands: List[str], **kwargs: Any) -> List[CommandResult]:
+        """Execute several shell commands in order, in a single round trip."""
+        return self._run(self._sandbox.run_batch(commands, **kwargs))
+
+    def write_file(
+        self,
+        path: str,
+        content: Union[str, bytes, bytearray, memoryview],
+        **kwargs: Any,
+    ) -> None:
+        """Write content to a file in the sandbox."""
+        self._run(self._sandbox.write_file(path, content, **kwargs))
+
+    def read_file(self, path: str, **kwargs: Any) -> bytes:
+        """Read a file from the sandbox."""
+        return self._run(self._sandbox.read_file(path, **kwargs))
+
+    def read_file_iter(self, path: str, **kwargs: Any) -> Iterator[bytes]:
+        """Read a file from the sandbox in chunks, as the server streams it."""
+        chunks = self._sandbox.read_file_iter(path, **kwargs)
+        try:
+            while True:
+                try:
+                    yield self._run(chunks.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            self._run(chunks.aclose())
+
+    def read_file_text(self, path: str, encoding: str = "utf-8") -> str:
+        """Read a text file from the sandbox."""
+        return self._run(self._sandbox.read_file_text(path, encoding))
+
+    def set_env(self, env: Dict[str, str]) -> None:
+        """Set environment variables for subsequent commands."""
+        self._run(self._sandbox.set_env(env))
+
+    def set_cwd(self, cwd: str) -> None:
+        """Set the working directory for subsequent commands."""
+        self._run(self._sandbox.set_cwd(cwd))
+
+    def destroy(self) -> None:
+        """Destroy this sandbox session."""
+        self._run(self._sandbox.destroy())
+
+    def __enter__(self):
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit - destroys the sandbox."""
+        self.destroy()
+        return False
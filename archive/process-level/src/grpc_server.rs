@@ -2,9 +2,17 @@
 
 use crate::sandbox::{self, RunConfig};
 use crate::state::AppState;
+use flate2::write::GzEncoder;
+use flate2::Compression;
+use futures_util::Stream;
+use std::io::Write as _;
 use std::net::SocketAddr;
+use std::path::PathBuf;
+use std::pin::Pin;
 use std::time::Instant;
-use tonic::{Request, Response, Status};
+use tokio::io::{AsyncReadExt, AsyncWriteExt};
+use tonic::codec::CompressionEncoding;
+use tonic::{Request, Response, Status, Streaming};
 use tracing::info;
 
 // Import generated protobuf types
@@ -14,12 +22,38 @@ pub mod proto {
 
 use proto::sandbox_service_server::{SandboxService, SandboxServiceServer};
 use proto::{
-    ReadFileRequest, ReadFileResponse, RunCommandRequest, RunCommandResponse,
+    BatchRunCommandRequest, BatchRunCommandResponse,
+    DestroySessionRequest, DestroySessionResponse,
+    ReadFileChunk, ReadFileRequest, ReadFileResponse, RunCommandRequest, RunCommandResponse,
     SetCwdRequest, SetCwdResponse, SetEnvRequest, SetEnvResponse,
-    WriteFileRequest, WriteFileResponse,
+    WriteFileChunk, WriteFileRequest, WriteFileResponse,
     WriteFilesRequest, WriteFilesResponse, FileError,
 };
 
+/// Largest gRPC message accepted or sent (64MB), matching the SDK's limit.
+const MAX_MESSAGE_SIZE: usize = 64 * 1024 * 1024;
+
+/// Size of the chunks ReadFileStream sends.
+const READ_CHUNK_SIZE: usize = 64 * 1024;
+
+/// Chunks smaller than this are not worth compressing.
+const COMPRESS_MIN_SIZE: usize = 4096;
+
+type ReadFileChunkStream = Pin<Box<dyn Stream<Item = Result<ReadFileChunk, Status>> + Send>>;
+
+/// Gzip a chunk of file content, if that makes it smaller.
+/// Returns the content to send and whether it is compressed.
+fn compress_chunk(content: Vec<u8>) -> (Vec<u8>, bool) {
+    if content.len() < COMPRESS_MIN_SIZE {
+        return (content, false);
+    }
+    let mut encoder = GzEncoder::new(Vec::with_capacity(content.len() / 2), Compression::fast());
+    match encoder.write_all(&content).and_then(|_| encoder.finish()) {
+        Ok(compressed) if compressed.len() < content.len() => (compressed, true),
+        _ => (content, false),
+    }
+}
+
 /// gRPC service implementation.
 pub struct SandboxServiceImpl {
     state: AppState,
@@ -29,23 +63,24 @@ impl SandboxServiceImpl {
     pub fn new(state: AppState) -> Self {
         Self { state }
     }
-}
 
-#[tonic::async_trait]
-impl SandboxService for SandboxServiceImpl {
-    async fn run_command(
+    /// Build the run configuration for a command in a session, applying the
+    /// session's environment and working directory.
+    async fn run_config(
         &self,
-        request: Request<RunCommandRequest>,
-    ) -> Result<Response<RunCommandResponse>, Status> {
-        let req = request.into_inner();
-        info!("gRPC RunCommand: session={}, command={:?}", req.session_id, req.command);
-
-        // Get session info
+        session_id: &str,
+        mut req: RunCommandRequest,
+    ) -> Result<(PathBuf, RunConfig), Status> {
+        // Apply session state changes, then get session info
         let (sandbox_root, mut env, cwd) = {
             let mut sessions = self.state.sessions.write().await;
             let session = sessions
-                .get_mut(&req.session_id)
+                .get_mut(session_id)
                 .ok_or_else(|| Status::not_found("Session not found"))?;
+            session.env.extend(std::mem::take(&mut req.set_env));
+            if !req.set_cwd.is_empty() {
+                session.cwd = std::mem::take(&mut req.set_cwd);
+            }
             session.last_used = Instant::now();
             (session.sandbox_root.clone(), session.env.clone(), session.cwd.clone())
         };
@@ -63,6 +98,32 @@ impl SandboxService for SandboxServiceImpl {
             env,
             cwd,
         };
+        Ok((sandbox_root, config))
+    }
+}
+
+fn run_response(result: sandbox::RunResult) -> RunCommandResponse {
+    RunCommandResponse {
+        stdout: result.stdout,
+        stderr: result.stderr,
+        exit_code: result.exit_code.unwrap_or(0),
+        signal: result.signal.unwrap_or(0),
+    }
+}
+
+#[tonic::async_trait]
+impl SandboxService for SandboxServiceImpl {
+    type ReadFileStreamStream = ReadFileChunkStream;
+
+    async fn run_command(
+        &self,
+        request: Request<RunCommandRequest>,
+    ) -> Result<Response<RunCommandResponse>, Status> {
+        let req = request.into_inner();
+        info!("gRPC RunCommand: session={}, command={:?}", req.session_id, req.command);
+
+        let session_id = req.session_id.clone();
+        let (sandbox_root, config) = self.run_config(&session_id, req).await?;
 
         let result = tokio::task::spawn_blocking(move || {
             sandbox::run_in_session(&sandbox_root, &config)
@@ -71,12 +132,45 @@ impl SandboxService for SandboxServiceImpl {
         .map_err(|e| Status::internal(e.to_string()))?
         .map_err(|e| Status::internal(e))?;
 
-        Ok(Response::new(RunCommandResponse {
-            stdout: result.stdout,
-            stderr: result.stderr,
-            exit_code: result.exit_code.unwrap_or(0),
-            signal: result.signal.unwrap_or(0),
-        }))
+        Ok(Response::new(run_response(result)))
+    }
+
+    async fn batch_run_command(
+        &self,
+        request: Request<BatchRunCommandRequest>,
+    ) -> Result<Response<BatchRunCommandResponse>, Status> {
+        let req = request.into_inner();
+        info!("gRPC BatchRunCommand: session={}, count={}", req.session_id, req.commands.len());
+
+        // An empty batch runs nothing, but still needs an existing session
+        if req.commands.is_empty() {
+            let mut sessions = self.state.sessions.write().await;
+            let session = sessions
+                .get_mut(&req.session_id)
+                .ok_or_else(|| Status::not_found("Session not found"))?;
+            session.last_used = Instant::now();
+        }
+
+        let mut results = Vec::with_capacity(req.commands.len());
+        for command in req.commands {
+            // A command's set_env/set_cwd only apply once it is about to run,
+            // so commands skipped by stop_on_error leave the session alone
+            let (sandbox_root, config) = self.run_config(&req.session_id, command).await?;
+            let result = tokio::task::spawn_blocking(move || {
+                sandbox::run_in_session(&sandbox_root, &config)
+            })
+            .await
+            .map_err(|e| Status::internal(e.to_string()))?
+            .map_err(|e| Status::internal(e))?;
+
+            let failed = result.exit_code != Some(0);
+            results.push(run_response(result));
+            if failed && req.stop_on_error {
+                break;
+            }
+        }
+
+        Ok(Response::new(BatchRunCommandResponse { results }))
     }
 
     async fn write_file(
@@ -117,6 +211,71 @@ impl SandboxService for SandboxServiceImpl {
         }
     }
 
+    async fn write_file_stream(
+        &self,
+        request: Request<Streaming<WriteFileChunk>>,
+    ) -> Result<Response<WriteFileResponse>, Status> {
+        let mut stream = request.into_inner();
+        let mut file: Option<tokio::fs::File> = None;
+        let mut written = 0usize;
+
+        while let Some(chunk) = stream.message().await? {
+            if file.is_none() {
+                info!("gRPC WriteFileStream: session={}, path={}", chunk.session_id, chunk.path);
+
+                // Get sandbox root
+                let sandbox_root = {
+                    let mut sessions = self.state.sessions.write().await;
+                    let session = sessions
+                        .get_mut(&chunk.session_id)
+                        .ok_or_else(|| Status::not_found("Session not found"))?;
+                    session.last_used = Instant::now();
+                    session.sandbox_root.clone()
+                };
+
+                let path = chunk.path.clone();
+                let created = tokio::task::spawn_blocking(move || {
+                    sandbox::create_file_in_sandbox(&sandbox_root, &path)
+                })
+                .await
+                .map_err(|e| Status::internal(e.to_string()))?;
+
+                match created {
+                    Ok(f) => file = Some(tokio::fs::File::from_std(f)),
+                    Err(e) => {
+                        return Ok(Response::new(WriteFileResponse {
+                            success: false,
+                            error: e,
+                        }))
+                    }
+                }
+            }
+
+            let f = file.as_mut().expect("file is opened by the first chunk");
+            if let Err(e) = f.write_all(&chunk.content).await {
+                return Ok(Response::new(WriteFileResponse {
+                    success: false,
+                    error: format!("write file: {}", e),
+                }));
+            }
+            written += chunk.content.len();
+        }
+
+        let mut f = file.ok_or_else(|| Status::invalid_argument("Empty file stream"))?;
+        if let Err(e) = f.flush().await {
+            return Ok(Response::new(WriteFileResponse {
+                success: false,
+                error: format!("write file: {}", e),
+            }));
+        }
+        info!("gRPC WriteFileStream: wrote {} bytes", written);
+
+        Ok(Response::new(WriteFileResponse {
+            success: true,
+            error: String::new(),
+        }))
+    }
+
     async fn write_files(
         &self,
         request: Request<WriteFilesRequest>,
@@ -199,6 +358,124 @@ impl SandboxService for SandboxServiceImpl {
         }
     }
 
+    async fn read_file_stream(
+        &self,
+        request: Request<ReadFileRequest>,
+    ) -> Result<Response<Self::ReadFileStreamStream>, Status> {
+        let req = request.into_inner();
+        info!("gRPC ReadFileStream: session={}, path={}", req.session_id, req.path);
+
+        // Get sandbox root
+        let sandbox_root = {
+            let mut sessions = self.state.sessions.write().await;
+            let session = sessions
+                .get_mut(&req.session_id)
+                .ok_or_else(|| Status::not_found("Session not found"))?;
+            session.last_used = Instant::now();
+            session.sandbox_root.clone()
+        };
+
+        let path = req.path;
+        let compress = req.compress;
+        let opened = tokio::task::spawn_blocking(move || {
+            let file = sandbox::open_file_in_sandbox(&sandbox_root, &path)?;
+            let metadata = file.metadata().map_err(|e| format!("stat file: {}", e))?;
+            Ok::<_, String>((file, metadata.len(), sandbox::file_etag(&metadata)))
+        })
+        .await
+        .map_err(|e| Status::internal(e.to_string()))?;
+
+        let (file, total_size, etag) = match opened {
+            Ok((file, size, etag)) => (tokio::fs::File::from_std(file), size, etag),
+            Err(e) => {
+                let chunk = ReadFileChunk {
+                    content: Vec::new(),
+                    total_size: 0,
+                    error: e,
+                    not_modified: false,
+                    compressed: false,
+                    etag: String::new(),
+                };
+                let stream: ReadFileChunkStream =
+                    Box::pin(futures_util::stream::once(async move { Ok::<_, Status>(chunk) }));
+                return Ok(Response::new(stream));
+            }
+        };
+
+        // The client's cached copy is current
+        if !req.if_none_match.is_empty() && req.if_none_match == etag {
+            let chunk = ReadFileChunk {
+                content: Vec::new(),
+                total_size,
+                error: String::new(),
+                not_modified: true,
+                compressed: false,
+                etag,
+            };
+            let stream: ReadFileChunkStream =
+                Box::pin(futures_util::stream::once(async move { Ok::<_, Status>(chunk) }));
+            return Ok(Response::new(stream));
+        }
+
+        // Read the next chunk on each poll; the state is None after an error
+        let stream = futures_util::stream::unfold(Some(file), move |file| {
+            let etag = etag.clone();
+            async move {
+                let mut file = file?;
+                let mut content = vec![0u8; READ_CHUNK_SIZE];
+                match file.read(&mut content).await {
+                    Ok(0) => None,
+                    Ok(n) => {
+                        content.truncate(n);
+                        let (content, compressed) =
+                            if compress { compress_chunk(content) } else { (content, false) };
+                        let chunk = ReadFileChunk {
+                            content,
+                            total_size,
+                            error: String::new(),
+                            not_modified: false,
+                            compressed,
+                            etag,
+                        };
+                        Some((Ok::<_, Status>(chunk), Some(file)))
+                    }
+                    Err(e) => {
+                        let chunk = ReadFileChunk {
+                            content: Vec::new(),
+                            total_size,
+                            error: format!("read file: {}", e),
+                            not_modified: false,
+                            compressed: false,
+                            etag,
+                        };
+                        Some((Ok(chunk), None))
+                    }
+                }
+            }
+        });
+        let stream: ReadFileChunkStream = Box::pin(stream);
+        Ok(Response::new(stream))
+    }
+
+    async fn destroy_session(
+        &self,
+        request: Request<DestroySessionRequest>,
+    ) -> Result<Response<DestroySessionResponse>, Status> {
+        let req = request.into_inner();
+        info!("gRPC DestroySession: session={}", req.session_id);
+
+        let session = self
+            .state
+            .sessions
+            .write()
+            .await
+            .remove(&req.session_id)
+            .ok_or_else(|| Status::not_found("Session not found"))?;
+        session.teardown();
+
+        Ok(Response::new(DestroySessionResponse { success: true }))
+    }
+
     async fn set_env(
         &self,
         request: Request<SetEnvRequest>,
@@ -242,7 +519,14 @@ pub async fn run_server(port: u16, state: AppState) {
     let service = SandboxServiceImpl::new(state);
 
     tonic::transport::Server::builder()
-        .add_service(SandboxServiceServer::new(service))
+        .add_service(
+            SandboxServiceServer::new(service)
+                .max_decoding_message_size(MAX_MESSAGE_SIZE)
+                .max_encoding_message_size(MAX_MESSAGE_SIZE)
+                // Clients may gzip uploads. Responses are not compressed by
+                // gRPC; ReadFileStream compresses file content on request.
+                .accept_compressed(CompressionEncoding::Gzip),
+        )
         .serve(addr)
         .await
         .unwrap();
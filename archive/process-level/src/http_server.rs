@@ -1,21 +1,26 @@
 //! HTTP server implementation using Axum.
 
-use crate::sandbox::{self, RunConfig, RunResult, SandboxFileEntry};
+use crate::sandbox::{self, OutputStream, RunConfig, RunResult, SandboxFileEntry};
 use crate::state::{AppState, Session, SessionStatus, Sessions, SESSION_TTL_SECS};
 use axum::{
-    body::Body,
-    extract::{Host, Path, Query, State},
+    body::{Body, Bytes},
+    extract::{DefaultBodyLimit, Host, Path, Query, State},
     extract::ws::{WebSocket, WebSocketUpgrade, Message as AxumWsMsg},
-    http::{header, Request, StatusCode, Uri},
-    response::{IntoResponse, Response},
+    http::{header, HeaderMap, Request, StatusCode, Uri},
+    response::{
+        sse::{Event, KeepAlive, Sse},
+        IntoResponse, Response,
+    },
     routing::{delete, get, post},
     Json, Router,
 };
 use base64::{engine::general_purpose::STANDARD as BASE64, Engine};
-use futures_util::{SinkExt, StreamExt};
+use futures_util::{SinkExt, Stream, StreamExt};
 use serde::{Deserialize, Serialize};
 use std::collections::HashMap;
+use std::convert::Infallible;
 use std::net::SocketAddr;
+use std::path::PathBuf;
 use std::time::{Duration, Instant};
 use tokio::time::interval;
 use tokio_tungstenite::tungstenite::Message as TungsteniteMsg;
@@ -26,12 +31,22 @@ use tracing::info;
 struct CreateSessionRequest {
     #[serde(default)]
     env: HashMap<String, String>,
+    /// Initial working directory, created if it does not exist
+    #[serde(default = "default_cwd")]
+    cwd: String,
+    /// Commands run in the new session before the response is sent, with
+    /// the default limits and the session's env and cwd
+    #[serde(default)]
+    init: Vec<Vec<String>>,
 }
 
 #[derive(Serialize)]
 struct CreateSessionResponse {
     session_id: String,
     preview_url: Option<String>,
+    /// Results of the `init` commands, in order
+    #[serde(skip_serializing_if = "Vec::is_empty")]
+    init_results: Vec<RunResult>,
 }
 
 #[derive(Deserialize)]
@@ -51,6 +66,20 @@ struct RunRequest {
     cwd: String,
 }
 
+#[derive(Deserialize)]
+struct RunBatchRequest {
+    commands: Vec<RunRequest>,
+    /// Skip the remaining commands once one exits unsuccessfully
+    #[serde(default)]
+    stop_on_error: bool,
+}
+
+#[derive(Serialize)]
+struct RunBatchResponse {
+    /// Results of the commands that ran, in order
+    results: Vec<RunResult>,
+}
+
 fn default_time() -> u64 { 300000 }
 fn default_mem() -> u64 { 2097152 }
 fn default_nofile() -> u64 { 256 }
@@ -114,6 +143,14 @@ struct ReadFileResponse {
     content: String, // base64 encoded
 }
 
+#[derive(Deserialize)]
+struct FilePathQuery {
+    path: String,
+}
+
+/// Largest request body accepted by the raw file write endpoint (100MB)
+const MAX_FILE_BODY_BYTES: usize = 100 * 1024 * 1024;
+
 #[derive(Deserialize)]
 struct ListFilesQuery {
     path: String,
@@ -132,6 +169,35 @@ struct ListFilesResponse {
     files: Vec<FileEntry>,
 }
 
+#[derive(Deserialize)]
+struct ListFilesBatchRequest {
+    paths: Vec<String>,
+}
+
+#[derive(Serialize)]
+struct ListFilesBatchResponse {
+    listings: HashMap<String, Vec<FileEntry>>,
+    errors: Vec<PathError>,
+}
+
+#[derive(Deserialize)]
+struct ReadFilesBatchRequest {
+    paths: Vec<String>,
+}
+
+#[derive(Serialize)]
+struct ReadFilesBatchResponse {
+    /// File contents by requested path, decoded as UTF-8 (lossy)
+    files: HashMap<String, String>,
+    errors: Vec<PathError>,
+}
+
+#[derive(Serialize)]
+struct PathError {
+    path: String,
+    error: String,
+}
+
 #[derive(Deserialize)]
 struct BackgroundRunRequest {
     command: Vec<String>,
@@ -162,6 +228,9 @@ struct SetCwdRequest {
     cwd: String,
 }
 
+/// Pending connection queue length for the HTTP listener.
+const LISTEN_BACKLOG: u32 = 4096;
+
 /// Run the HTTP server on the given port with the provided state.
 pub async fn run_server(port: u16, state: AppState) {
     // Spawn cleanup task
@@ -183,15 +252,25 @@ pub async fn run_server(port: u16, state: AppState) {
         .route("/sessions/:id", get(get_session))
         .route("/sessions/:id", delete(delete_session))
         .route("/sessions/:id/run", post(run_in_session))
+        .route("/sessions/:id/run/stream", post(run_in_session_stream))
+        .route("/sessions/:id/run/batch", post(run_batch_in_session))
         .route("/sessions/:id/background", post(run_background))
         .route("/sessions/:id/background", delete(kill_background))
         .route("/sessions/:id/env", post(set_env))
         .route("/sessions/:id/cwd", post(set_cwd))
         // File operations
+        .route(
+            "/sessions/:id/files",
+            get(read_file_raw)
+                .put(write_file_raw)
+                .layer(DefaultBodyLimit::max(MAX_FILE_BODY_BYTES)),
+        )
         .route("/sessions/:id/files/write", post(write_file))
         .route("/sessions/:id/files/write-bulk", post(write_files_bulk))
         .route("/sessions/:id/files/read", get(read_file))
+        .route("/sessions/:id/files/read-batch", post(read_files_batch))
         .route("/sessions/:id/files/list", get(list_files))
+        .route("/sessions/:id/files/list-batch", post(list_files_batch))
         // Background diagnostics
         .route("/sessions/:id/background/status", get(background_status))
         // Stateless run
@@ -208,8 +287,16 @@ pub async fn run_server(port: u16, state: AppState) {
         info!("Preview domain: {}", domain);
     }
 
-    let listener = tokio::net::TcpListener::bind(addr).await.unwrap();
-    axum::serve(listener, app).await.unwrap();
+    // A deep accept queue absorbs bursts of connections from parallel tool
+    // calls; tokio drains every pending accept on each readiness wakeup.
+    let socket = tokio::net::TcpSocket::new_v4().unwrap();
+    socket.set_reuseaddr(true).unwrap();
+    socket.bind(addr).unwrap();
+    let listener = socket.listen(LISTEN_BACKLOG).unwrap();
+
+    // Responses are small JSON bodies on keep-alive connections; don't let
+    // Nagle's algorithm hold them back waiting for an ACK.
+    axum::serve(listener, app).tcp_nodelay(true).await.unwrap();
 }
 
 async fn health() -> &'static str {
@@ -222,9 +309,37 @@ async fn create_session(
 ) -> Result<Json<CreateSessionResponse>, (StatusCode, String)> {
     let session_id = uuid::Uuid::new_v4().to_string();
 
-    let sandbox_root = tokio::task::spawn_blocking({
+    let (sandbox_root, init_results) = tokio::task::spawn_blocking({
         let session_id = session_id.clone();
-        move || sandbox::create_session_sandbox(&session_id)
+        let cwd = req.cwd.clone();
+        let env = req.env.clone();
+        let init = req.init;
+        move || {
+            let sandbox_root = sandbox::create_session_sandbox(&session_id)?;
+            let setup = sandbox::create_dir_in_sandbox(&sandbox_root, &cwd).and_then(|_| {
+                init.into_iter()
+                    .map(|command| {
+                        let config = RunConfig {
+                            command,
+                            time_ms: default_time(),
+                            mem_kb: default_mem(),
+                            fsize_kb: default_fsize(),
+                            nofile: default_nofile(),
+                            env: env.clone(),
+                            cwd: cwd.clone(),
+                        };
+                        sandbox::run_in_session(&sandbox_root, &config)
+                    })
+                    .collect::<Result<Vec<_>, _>>()
+            });
+            match setup {
+                Ok(results) => Ok((sandbox_root, results)),
+                Err(e) => {
+                    sandbox::destroy_session_sandbox(&sandbox_root);
+                    Err(e)
+                }
+            }
+        }
     })
     .await
     .map_err(|e| (StatusCode::INTERNAL_SERVER_ERROR, e.to_string()))?
@@ -240,7 +355,7 @@ async fn create_session(
         id: session_id.clone(),
         sandbox_root,
         env: req.env,
-        cwd: "/".to_string(),
+        cwd: req.cwd,
         created_at: Instant::now(),
         last_used: Instant::now(),
         preview_url: preview_url.clone(),
@@ -255,6 +370,7 @@ async fn create_session(
     Ok(Json(CreateSessionResponse {
         session_id,
         preview_url,
+        init_results,
     }))
 }
 
@@ -304,18 +420,7 @@ async fn delete_session(
 ) -> Result<StatusCode, StatusCode> {
     let mut sessions = state.sessions.write().await;
     if let Some(session) = sessions.remove(&id) {
-        let sandbox_root = session.sandbox_root;
-        let pids = session.background_pids;
-        tokio::task::spawn_blocking(move || {
-            // Kill background processes first
-            for pid in pids {
-                let _ = nix::sys::signal::kill(
-                    nix::unistd::Pid::from_raw(pid as i32),
-                    nix::sys::signal::Signal::SIGKILL,
-                );
-            }
-            sandbox::destroy_session_sandbox(&sandbox_root);
-        });
+        session.teardown();
         info!("Deleted session: {}", id);
         Ok(StatusCode::NO_CONTENT)
     } else {
@@ -347,16 +452,18 @@ async fn set_cwd(
     Ok(StatusCode::OK)
 }
 
-async fn run_in_session(
-    State(state): State<AppState>,
-    Path(id): Path<String>,
-    Json(req): Json<RunRequest>,
-) -> Result<Json<RunResult>, (StatusCode, String)> {
+/// Build the run config for a session command, applying the session's env
+/// and cwd underneath the request's own.
+async fn session_run_config(
+    state: &AppState,
+    id: &str,
+    req: RunRequest,
+) -> Result<(PathBuf, RunConfig), (StatusCode, String)> {
     // Get session info
     let (sandbox_root, mut env, cwd) = {
         let mut sessions = state.sessions.write().await;
         let session = sessions
-            .get_mut(&id)
+            .get_mut(id)
             .ok_or((StatusCode::NOT_FOUND, "Session not found".to_string()))?;
         session.last_used = Instant::now();
         (session.sandbox_root.clone(), session.env.clone(), session.cwd.clone())
@@ -375,6 +482,15 @@ async fn run_in_session(
         env,
         cwd,
     };
+    Ok((sandbox_root, config))
+}
+
+async fn run_in_session(
+    State(state): State<AppState>,
+    Path(id): Path<String>,
+    Json(req): Json<RunRequest>,
+) -> Result<Json<RunResult>, (StatusCode, String)> {
+    let (sandbox_root, config) = session_run_config(&state, &id, req).await?;
 
     let result = tokio::task::spawn_blocking(move || {
         sandbox::run_in_session(&sandbox_root, &config)
@@ -386,6 +502,122 @@ async fn run_in_session(
     Ok(Json(result))
 }
 
+/// Run several commands in a session, one after another, in a single request.
+async fn run_batch_in_session(
+    State(state): State<AppState>,
+    Path(id): Path<String>,
+    Json(req): Json<RunBatchRequest>,
+) -> Result<Json<RunBatchResponse>, (StatusCode, String)> {
+    // An empty batch runs nothing, but still needs an existing session
+    if req.commands.is_empty() {
+        let mut sessions = state.sessions.write().await;
+        let session = sessions
+            .get_mut(&id)
+            .ok_or((StatusCode::NOT_FOUND, "Session not found".to_string()))?;
+        session.last_used = Instant::now();
+    }
+
+    let mut sandbox_root = PathBuf::new();
+    let mut configs = Vec::with_capacity(req.commands.len());
+    for command in req.commands {
+        let (root, config) = session_run_config(&state, &id, command).await?;
+        sandbox_root = root;
+        configs.push(config);
+    }
+    let stop_on_error = req.stop_on_error;
+
+    let results = tokio::task::spawn_blocking(move || {
+        let mut results = Vec::with_capacity(configs.len());
+        for config in &configs {
+            let result = sandbox::run_in_session(&sandbox_root, config)?;
+            let failed = result.exit_code != Some(0);
+            results.push(result);
+            if failed && stop_on_error {
+                break;
+            }
+        }
+        Ok::<_, String>(results)
+    })
+    .await
+    .map_err(|e| (StatusCode::INTERNAL_SERVER_ERROR, e.to_string()))?
+    .map_err(|e| (StatusCode::INTERNAL_SERVER_ERROR, e))?;
+
+    Ok(Json(RunBatchResponse { results }))
+}
+
+/// Decodes a byte stream as UTF-8, holding back a trailing partial character
+/// until the rest of it arrives.
+#[derive(Default)]
+struct Utf8Chunker {
+    pending: Vec<u8>,
+}
+
+impl Utf8Chunker {
+    fn push(&mut self, bytes: &[u8]) -> String {
+        self.pending.extend_from_slice(bytes);
+        let complete = match std::str::from_utf8(&self.pending) {
+            Err(e) if e.error_len().is_none() => e.valid_up_to(),
+            _ => self.pending.len(),
+        };
+        let rest = self.pending.split_off(complete);
+        sandbox::into_string(std::mem::replace(&mut self.pending, rest))
+    }
+
+    fn finish(&mut self) -> String {
+        sandbox::into_string(std::mem::take(&mut self.pending))
+    }
+}
+
+/// Run a command in a session, streaming its output as server-sent events.
+///
+/// `stdout` and `stderr` events carry a JSON string with the next chunk of
+/// output. The stream ends with an `exit` event carrying
+/// `{"exit_code", "signal"}`, or an `error` event with a message.
+async fn run_in_session_stream(
+    State(state): State<AppState>,
+    Path(id): Path<String>,
+    Json(req): Json<RunRequest>,
+) -> Result<Sse<impl Stream<Item = Result<Event, Infallible>>>, (StatusCode, String)> {
+    let (sandbox_root, config) = session_run_config(&state, &id, req).await?;
+    let (tx, rx) = tokio::sync::mpsc::channel::<Event>(64);
+
+    tokio::task::spawn_blocking(move || {
+        let send = |name: &str, text: String| {
+            if text.is_empty() {
+                return;
+            }
+            if let Ok(event) = Event::default().event(name).json_data(text) {
+                // The client may have gone away; the command still runs to completion
+                let _ = tx.blocking_send(event);
+            }
+        };
+
+        let mut stdout = Utf8Chunker::default();
+        let mut stderr = Utf8Chunker::default();
+        let result = sandbox::run_in_session_streaming(&sandbox_root, &config, |stream, bytes| {
+            match stream {
+                OutputStream::Stdout => send("stdout", stdout.push(bytes)),
+                OutputStream::Stderr => send("stderr", stderr.push(bytes)),
+            }
+        });
+        send("stdout", stdout.finish());
+        send("stderr", stderr.finish());
+
+        let event = match result {
+            Ok(status) => Event::default().event("exit").json_data(status),
+            Err(e) => Event::default().event("error").json_data(e),
+        };
+        if let Ok(event) = event {
+            let _ = tx.blocking_send(event);
+        }
+    });
+
+    let stream = futures_util::stream::unfold(rx, |mut rx| async move {
+        rx.recv().await.map(|event| (Ok(event), rx))
+    });
+    Ok(Sse::new(stream).keep_alive(KeepAlive::default()))
+}
+
 async fn run_oneshot(
     Json(req): Json<RunRequest>,
 ) -> Result<Json<RunResult>, (StatusCode, String)> {
@@ -423,17 +655,7 @@ async fn cleanup_expired_sessions(sessions: &Sessions) {
     for id in expired {
         if let Some(session) = sessions.remove(&id) {
             info!("Cleaning up expired session: {}", id);
-            let sandbox_root = session.sandbox_root;
-            let pids = session.background_pids;
-            tokio::task::spawn_blocking(move || {
-                for pid in pids {
-                    let _ = nix::sys::signal::kill(
-                        nix::unistd::Pid::from_raw(pid as i32),
-                        nix::sys::signal::Signal::SIGKILL,
-                    );
-                }
-                sandbox::destroy_session_sandbox(&sandbox_root);
-            });
+            session.teardown();
         }
     }
 }
@@ -469,6 +691,81 @@ async fn write_file(
     Ok(Json(WriteFileResponse { success: true }))
 }
 
+/// Resolve a file API path against the session's working directory.
+fn session_path(cwd: &str, path: &str) -> String {
+    if path.starts_with('/') {
+        path.to_string()
+    } else {
+        format!("{}/{}", cwd.trim_end_matches('/'), path)
+    }
+}
+
+/// Write the raw request body to a file, creating parent directories.
+async fn write_file_raw(
+    State(state): State<AppState>,
+    Path(id): Path<String>,
+    Query(query): Query<FilePathQuery>,
+    body: Bytes,
+) -> Result<StatusCode, (StatusCode, String)> {
+    let (sandbox_root, path) = {
+        let mut sessions = state.sessions.write().await;
+        let session = sessions
+            .get_mut(&id)
+            .ok_or((StatusCode::NOT_FOUND, "Session not found".to_string()))?;
+        session.last_used = Instant::now();
+        (session.sandbox_root.clone(), session_path(&session.cwd, &query.path))
+    };
+
+    tokio::task::spawn_blocking(move || {
+        sandbox::write_file_in_sandbox(&sandbox_root, &path, &body)
+    })
+    .await
+    .map_err(|e| (StatusCode::INTERNAL_SERVER_ERROR, e.to_string()))?
+    .map_err(|e| (StatusCode::INTERNAL_SERVER_ERROR, e))?;
+
+    Ok(StatusCode::NO_CONTENT)
+}
+
+/// Return a file's contents as the raw response body, tagged with an ETag.
+/// Answers 304 Not Modified when `If-None-Match` carries the current tag.
+async fn read_file_raw(
+    State(state): State<AppState>,
+    Path(id): Path<String>,
+    Query(query): Query<FilePathQuery>,
+    headers: HeaderMap,
+) -> Result<Response, (StatusCode, String)> {
+    let (sandbox_root, path) = {
+        let mut sessions = state.sessions.write().await;
+        let session = sessions
+            .get_mut(&id)
+            .ok_or((StatusCode::NOT_FOUND, "Session not found".to_string()))?;
+        session.last_used = Instant::now();
+        (session.sandbox_root.clone(), session_path(&session.cwd, &query.path))
+    };
+    let if_none_match = headers
+        .get(header::IF_NONE_MATCH)
+        .and_then(|v| v.to_str().ok())
+        .map(str::to_owned);
+
+    // Tag before reading: if the file changes in between, the next
+    // conditional request sees a different tag and fetches it again.
+    let file = tokio::task::spawn_blocking(move || {
+        let etag = sandbox::file_etag_in_sandbox(&sandbox_root, &path)?;
+        if if_none_match.as_deref() == Some(etag.as_str()) {
+            return Ok(None);
+        }
+        sandbox::read_file_in_sandbox(&sandbox_root, &path).map(|content| Some((etag, content)))
+    })
+    .await
+    .map_err(|e| (StatusCode::INTERNAL_SERVER_ERROR, e.to_string()))?
+    .map_err(|e| (StatusCode::NOT_FOUND, e))?;
+
+    Ok(match file {
+        None => StatusCode::NOT_MODIFIED.into_response(),
+        Some((etag, content)) => ([(header::ETAG, etag)], content).into_response(),
+    })
+}
+
 async fn write_files_bulk(
     State(state): State<AppState>,
     Path(id): Path<String>,
@@ -541,6 +838,42 @@ async fn read_file(
     }))
 }
 
+/// Read several files in one request. Relative paths resolve from the
+/// session's working directory.
+async fn read_files_batch(
+    State(state): State<AppState>,
+    Path(id): Path<String>,
+    Json(req): Json<ReadFilesBatchRequest>,
+) -> Result<Json<ReadFilesBatchResponse>, (StatusCode, String)> {
+    let (sandbox_root, cwd) = {
+        let mut sessions = state.sessions.write().await;
+        let session = sessions
+            .get_mut(&id)
+            .ok_or((StatusCode::NOT_FOUND, "Session not found".to_string()))?;
+        session.last_used = Instant::now();
+        (session.sandbox_root.clone(), session.cwd.clone())
+    };
+
+    // Read all files in a single blocking task
+    let response = tokio::task::spawn_blocking(move || {
+        let mut files = HashMap::with_capacity(req.paths.len());
+        let mut errors = Vec::new();
+        for path in req.paths {
+            match sandbox::read_file_in_sandbox(&sandbox_root, &session_path(&cwd, &path)) {
+                Ok(content) => {
+                    files.insert(path, sandbox::into_string(content));
+                }
+                Err(error) => errors.push(PathError { path, error }),
+            }
+        }
+        ReadFilesBatchResponse { files, errors }
+    })
+    .await
+    .map_err(|e| (StatusCode::INTERNAL_SERVER_ERROR, e.to_string()))?;
+
+    Ok(Json(response))
+}
+
 async fn list_files(
     State(state): State<AppState>,
     Path(id): Path<String>,
@@ -576,6 +909,49 @@ async fn list_files(
     Ok(Json(ListFilesResponse { files }))
 }
 
+async fn list_files_batch(
+    State(state): State<AppState>,
+    Path(id): Path<String>,
+    Json(req): Json<ListFilesBatchRequest>,
+) -> Result<Json<ListFilesBatchResponse>, (StatusCode, String)> {
+    let (sandbox_root, cwd) = {
+        let mut sessions = state.sessions.write().await;
+        let session = sessions
+            .get_mut(&id)
+            .ok_or((StatusCode::NOT_FOUND, "Session not found".to_string()))?;
+        session.last_used = Instant::now();
+        (session.sandbox_root.clone(), session.cwd.clone())
+    };
+
+    // List all directories in a single blocking task
+    let response = tokio::task::spawn_blocking(move || {
+        let mut listings = HashMap::with_capacity(req.paths.len());
+        let mut errors = Vec::new();
+        for path in req.paths {
+            match sandbox::list_files_in_sandbox(&sandbox_root, &session_path(&cwd, &path)) {
+                Ok(entries) => {
+                    let files = entries
+                        .into_iter()
+                        .map(|e| FileEntry {
+                            name: e.name,
+                            path: e.path,
+                            is_directory: e.is_directory,
+                            size: e.size,
+                        })
+                        .collect();
+                    listings.insert(path, files);
+                }
+                Err(error) => errors.push(PathError { path, error }),
+            }
+        }
+        ListFilesBatchResponse { listings, errors }
+    })
+    .await
+    .map_err(|e| (StatusCode::INTERNAL_SERVER_ERROR, e.to_string()))?;
+
+    Ok(Json(response))
+}
+
 // Background process handler
 
 async fn run_background(
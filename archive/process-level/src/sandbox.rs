@@ -5,13 +5,12 @@ use nix::sched::{clone, CloneFlags};
 use nix::sys::resource::{setrlimit, Resource};
 use nix::sys::signal::Signal;
 use nix::sys::wait::{waitpid, WaitStatus};
-use nix::unistd::{chdir, chroot, execvpe};
+use nix::unistd::{chdir, chroot, execvpe, Pid};
 use std::collections::HashMap;
 use std::ffi::CString;
 use std::fs;
-use std::io::{Read, Write};
-use std::os::fd::{AsRawFd, FromRawFd, OwnedFd};
-use std::os::unix::fs::PermissionsExt;
+use std::os::fd::{AsRawFd, OwnedFd};
+use std::os::unix::fs::{MetadataExt, PermissionsExt};
 use std::path::{Path, PathBuf};
 use tracing::info;
 
@@ -36,6 +35,20 @@ pub struct RunResult {
     pub signal: Option<i32>,
 }
 
+/// Exit status of a command whose output was streamed.
+#[derive(Debug, Clone, serde::Serialize)]
+pub struct RunStatus {
+    pub exit_code: Option<i32>,
+    pub signal: Option<i32>,
+}
+
+/// Which output stream a chunk of command output came from.
+#[derive(Debug, Clone, Copy, PartialEq, Eq)]
+pub enum OutputStream {
+    Stdout,
+    Stderr,
+}
+
 /// Run a command in a fresh sandbox (no session, cleanup after).
 pub fn run_oneshot(config: &RunConfig) -> Result<RunResult, String> {
     info!("=== run_oneshot called ===");
@@ -55,6 +68,21 @@ pub fn run_in_session(sandbox_root: &Path, config: &RunConfig) -> Result<RunResu
     run_in_sandbox(sandbox_root, config)
 }
 
+/// Run a command in an existing session sandbox, passing its output to
+/// `on_output` as it is produced instead of collecting it.
+pub fn run_in_session_streaming<F>(
+    sandbox_root: &Path,
+    config: &RunConfig,
+    on_output: F,
+) -> Result<RunStatus, String>
+where
+    F: FnMut(OutputStream, &[u8]),
+{
+    let (child_pid, stdout_read, stderr_read) = spawn_in_sandbox(sandbox_root, config)?;
+    pump_output(stdout_read, stderr_read, on_output);
+    wait_for_child(child_pid)
+}
+
 /// Start a long-running background process in the sandbox.
 /// Unlike `run_in_session`, this does NOT use CLONE_NEWPID so the process
 /// survives after the call returns. Returns the PID of the background process.
@@ -209,6 +237,36 @@ pub fn write_file_in_sandbox(sandbox_root: &Path, path: &str, content: &[u8]) ->
     Ok(())
 }
 
+/// Create (or truncate) a file in the sandbox filesystem for writing, creating
+/// its parent directories.
+pub fn create_file_in_sandbox(sandbox_root: &Path, path: &str) -> Result<fs::File, String> {
+    let full_path = sandbox_root.join(path.trim_start_matches('/'));
+
+    // Ensure parent directory exists
+    if let Some(parent) = full_path.parent() {
+        fs::create_dir_all(parent).map_err(|e| format!("mkdir parent: {}", e))?;
+    }
+
+    let file = fs::File::create(&full_path).map_err(|e| format!("create file: {}", e))?;
+
+    // Make file accessible
+    fs::set_permissions(&full_path, fs::Permissions::from_mode(0o644))
+        .map_err(|e| format!("chmod: {}", e))?;
+
+    Ok(file)
+}
+
+/// Create a directory (and its parents) directly in the sandbox filesystem.
+pub fn create_dir_in_sandbox(sandbox_root: &Path, path: &str) -> Result<(), String> {
+    // Normalize the path to be relative to sandbox root
+    let normalized_path = path.trim_start_matches('/');
+    if normalized_path.is_empty() {
+        return Ok(());
+    }
+
+    fs::create_dir_all(sandbox_root.join(normalized_path)).map_err(|e| format!("mkdir: {}", e))
+}
+
 /// Read a file directly from the sandbox filesystem.
 pub fn read_file_in_sandbox(sandbox_root: &Path, path: &str) -> Result<Vec<u8>, String> {
     // Normalize the path to be relative to sandbox root
@@ -223,6 +281,46 @@ pub fn read_file_in_sandbox(sandbox_root: &Path, path: &str) -> Result<Vec<u8>,
     fs::read(&full_path).map_err(|e| format!("read file: {}", e))
 }
 
+/// Open a file in the sandbox filesystem for reading.
+pub fn open_file_in_sandbox(sandbox_root: &Path, path: &str) -> Result<fs::File, String> {
+    let full_path = sandbox_root.join(path.trim_start_matches('/'));
+    fs::File::open(&full_path).map_err(|e| format!("read file: {}", e))
+}
+
+/// Modification time of a file in nanoseconds since the epoch, or 0 if unknown.
+pub fn mtime_ns(metadata: &fs::Metadata) -> u64 {
+    metadata
+        .modified()
+        .ok()
+        .and_then(|t| t.duration_since(std::time::UNIX_EPOCH).ok())
+        .map_or(0, |d| d.as_nanos() as u64)
+}
+
+/// Version tag for a file, built from its inode number, modification and
+/// change times, and size. Formatted as an HTTP entity tag (quoted).
+///
+/// Timestamps only advance once per kernel tick, so the inode number is what
+/// tells apart a file replaced within one tick (e.g. renamed over by `sed -i`).
+pub fn file_etag(metadata: &fs::Metadata) -> String {
+    let ctime_ns = (metadata.ctime() as u64)
+        .wrapping_mul(1_000_000_000)
+        .wrapping_add(metadata.ctime_nsec() as u64);
+    format!(
+        "\"{:x}-{:x}-{:x}-{:x}\"",
+        metadata.ino(),
+        mtime_ns(metadata),
+        ctime_ns,
+        metadata.len()
+    )
+}
+
+/// Version tag for a file in the sandbox. See `file_etag`.
+pub fn file_etag_in_sandbox(sandbox_root: &Path, path: &str) -> Result<String, String> {
+    let full_path = sandbox_root.join(path.trim_start_matches('/'));
+    let metadata = fs::metadata(&full_path).map_err(|e| format!("stat file: {}", e))?;
+    Ok(file_etag(&metadata))
+}
+
 /// Entry in a directory listing.
 #[derive(Debug, Clone)]
 pub struct SandboxFileEntry {
@@ -371,6 +469,38 @@ fn setup_sandbox_dir(sandbox_root: &Path) -> Result<(), String> {
 }
 
 fn run_in_sandbox(sandbox_root: &Path, config: &RunConfig) -> Result<RunResult, String> {
+    let (child_pid, stdout_read, stderr_read) = spawn_in_sandbox(sandbox_root, config)?;
+
+    // Drain the pipes before waiting, so a child writing more than a pipe
+    // buffer of output can't block forever on a full pipe.
+    let mut stdout = Vec::new();
+    let mut stderr = Vec::new();
+    pump_output(stdout_read, stderr_read, |stream, bytes| match stream {
+        OutputStream::Stdout => stdout.extend_from_slice(bytes),
+        OutputStream::Stderr => stderr.extend_from_slice(bytes),
+    });
+    info!(stdout_len = stdout.len(), stderr_len = stderr.len(), "Output captured");
+
+    let status = wait_for_child(child_pid)?;
+
+    Ok(RunResult {
+        stdout: into_string(stdout),
+        stderr: into_string(stderr),
+        exit_code: status.exit_code,
+        signal: status.signal,
+    })
+}
+
+/// Convert captured output to a String, reusing the buffer when it is valid
+/// UTF-8 (the common case) instead of copying it.
+pub fn into_string(bytes: Vec<u8>) -> String {
+    String::from_utf8(bytes)
+        .unwrap_or_else(|e| String::from_utf8_lossy(e.as_bytes()).into_owned())
+}
+
+/// Start a command in the sandbox, returning its pid and the read ends of
+/// its stdout and stderr pipes.
+fn spawn_in_sandbox(sandbox_root: &Path, config: &RunConfig) -> Result<(Pid, OwnedFd, OwnedFd), String> {
     info!(command = ?config.command, "Running command");
     info!(sandbox_root = ?sandbox_root, "Sandbox root");
     info!(time_ms = config.time_ms, mem_kb = config.mem_kb,
@@ -379,6 +509,8 @@ fn run_in_sandbox(sandbox_root: &Path, config: &RunConfig) -> Result<RunResult,
     // Create pipes for stdout/stderr capture
     let (stdout_read, stdout_write) = nix::unistd::pipe().map_err(|e| format!("pipe: {}", e))?;
     let (stderr_read, stderr_write) = nix::unistd::pipe().map_err(|e| format!("pipe: {}", e))?;
+    grow_pipe(&stdout_read);
+    grow_pipe(&stderr_read);
 
     // Get raw fds for the child process
     let stdout_write_fd = stdout_write.as_raw_fd();
@@ -424,53 +556,86 @@ fn run_in_sandbox(sandbox_root: &Path, config: &RunConfig) -> Result<RunResult,
     drop(stdout_write);
     drop(stderr_write);
 
-    // Wait for child
+    Ok((child_pid, stdout_read, stderr_read))
+}
+
+/// Capacity requested for output pipes. The 64 KiB default makes a chatty
+/// child block and wake us up every 64 KiB; a larger pipe lets both sides
+/// move more bytes per read(2)/write(2).
+const PIPE_SIZE: usize = 1024 * 1024;
+
+/// Enlarge a pipe's buffer to `PIPE_SIZE`. Best effort: the kernel may cap
+/// it at /proc/sys/fs/pipe-max-size, in which case the default is kept.
+fn grow_pipe(fd: &OwnedFd) {
+    unsafe {
+        libc::fcntl(fd.as_raw_fd(), libc::F_SETPIPE_SZ, PIPE_SIZE as libc::c_int);
+    }
+}
+
+/// Read stdout and stderr until both reach EOF, handing each chunk to
+/// `on_output` as soon as it is read.
+fn pump_output<F>(stdout: OwnedFd, stderr: OwnedFd, mut on_output: F)
+where
+    F: FnMut(OutputStream, &[u8]),
+{
+    let mut fds = [
+        libc::pollfd { fd: stdout.as_raw_fd(), events: libc::POLLIN, revents: 0 },
+        libc::pollfd { fd: stderr.as_raw_fd(), events: libc::POLLIN, revents: 0 },
+    ];
+    let streams = [OutputStream::Stdout, OutputStream::Stderr];
+    let mut buf = vec![0u8; PIPE_SIZE];
+    let mut open = fds.len();
+
+    while open > 0 {
+        let ready = unsafe { libc::poll(fds.as_mut_ptr(), fds.len() as libc::nfds_t, -1) };
+        if ready < 0 {
+            if std::io::Error::last_os_error().kind() == std::io::ErrorKind::Interrupted {
+                continue;
+            }
+            break;
+        }
+
+        for (pfd, stream) in fds.iter_mut().zip(streams) {
+            if pfd.fd < 0 || pfd.revents == 0 {
+                continue;
+            }
+            let n = unsafe { libc::read(pfd.fd, buf.as_mut_ptr() as *mut libc::c_void, buf.len()) };
+            if n > 0 {
+                on_output(stream, &buf[..n as usize]);
+            } else if n == 0
+                || std::io::Error::last_os_error().kind() != std::io::ErrorKind::Interrupted
+            {
+                // EOF or read error; poll skips negative fds. The OwnedFds
+                // still close the pipes when they go out of scope.
+                pfd.fd = -1;
+                open -= 1;
+            }
+        }
+    }
+}
+
+fn wait_for_child(child_pid: Pid) -> Result<RunStatus, String> {
     info!("Waiting for child...");
     let status = waitpid(child_pid, None).map_err(|e| format!("waitpid: {}", e))?;
     info!(status = ?status, "Child exited");
 
-    // Read output from pipes
-    let stdout = read_from_fd(stdout_read);
-    let stderr = read_from_fd(stderr_read);
-    info!(stdout_len = stdout.len(), stderr_len = stderr.len(), "Output captured");
-
     let (exit_code, signal) = match status {
         WaitStatus::Exited(_, code) => (Some(code), None),
         WaitStatus::Signaled(_, sig, _) => (None, Some(sig as i32)),
         _ => (None, None),
     };
-
-    Ok(RunResult {
-        stdout,
-        stderr,
-        exit_code,
-        signal,
-    })
-}
-
-fn read_from_fd(fd: OwnedFd) -> String {
-    let mut file = unsafe { std::fs::File::from_raw_fd(fd.as_raw_fd()) };
-    std::mem::forget(fd); // Don't double-close
-    let mut output = String::new();
-    let _ = file.read_to_string(&mut output);
-    output
+    Ok(RunStatus { exit_code, signal })
 }
 
 fn run_child(sandbox_root: &Path, config: &RunConfig) -> Result<(), String> {
-    eprintln!("[child] Starting, sandbox_root={:?}", sandbox_root);
-
     // chroot into sandbox
-    eprintln!("[child] chroot...");
     chroot(sandbox_root).map_err(|e| format!("chroot: {}", e))?;
-    eprintln!("[child] chdir to {:?}...", config.cwd);
     chdir(config.cwd.as_str()).map_err(|e| format!("chdir: {}", e))?;
 
     // Set resource limits
-    eprintln!("[child] Setting resource limits...");
     set_resource_limits(config)?;
-    eprintln!("[child] Resource limits set");
 
-    eprintln!("[child] Skipping privilege drop (sandbox still isolated by namespaces)");
+    // No privilege drop: the sandbox is still isolated by namespaces
 
     // Execute command
     let cmd = CString::new(config.command[0].as_str()).map_err(|e| format!("cmd: {}", e))?;
@@ -489,40 +654,30 @@ fn run_child(sandbox_root: &Path, config: &RunConfig) -> Result<(), String> {
     env.push(CString::new("PATH=/usr/bin:/bin").unwrap());
     env.push(CString::new("HOME=/home").unwrap());
 
-    eprintln!("[child] About to exec: {:?}", config.command);
-    eprintln!("[child] Flushing stderr before exec...");
-    let _ = std::io::stderr().flush();
     execvpe(&cmd, &args, &env).map_err(|e| format!("exec: {}", e))?;
     Ok(())
 }
 
 fn set_resource_limits(config: &RunConfig) -> Result<(), String> {
     let cpu_seconds = std::cmp::max(1, config.time_ms / 1000);
-    eprintln!("[rlimit] CPU: {} seconds", cpu_seconds);
     setrlimit(Resource::RLIMIT_CPU, cpu_seconds, cpu_seconds)
         .map_err(|e| format!("rlimit cpu: {}", e))?;
 
     let mem_bytes = config.mem_kb * 1024;
-    eprintln!("[rlimit] AS (mem): {} bytes ({} MB)", mem_bytes, mem_bytes / 1024 / 1024);
     setrlimit(Resource::RLIMIT_AS, mem_bytes, mem_bytes)
         .map_err(|e| format!("rlimit as: {}", e))?;
 
     let fsize_bytes = config.fsize_kb * 1024;
-    eprintln!("[rlimit] FSIZE: {} bytes", fsize_bytes);
     setrlimit(Resource::RLIMIT_FSIZE, fsize_bytes, fsize_bytes)
         .map_err(|e| format!("rlimit fsize: {}", e))?;
 
-    eprintln!("[rlimit] NOFILE: {}", config.nofile);
     setrlimit(Resource::RLIMIT_NOFILE, config.nofile, config.nofile)
         .map_err(|e| format!("rlimit nofile: {}", e))?;
 
-    eprintln!("[rlimit] CORE: 0");
     setrlimit(Resource::RLIMIT_CORE, 0, 0).map_err(|e| format!("rlimit core: {}", e))?;
 
-    eprintln!("[rlimit] NPROC: 64");
     setrlimit(Resource::RLIMIT_NPROC, 64, 64).map_err(|e| format!("rlimit nproc: {}", e))?;
 
-    eprintln!("[rlimit] All limits set successfully");
     Ok(())
 }
 
@@ -1,5 +1,6 @@
 //! Shared application state and session types.
 
+use crate::sandbox;
 use serde::Serialize;
 use std::collections::HashMap;
 use std::path::PathBuf;
@@ -42,6 +43,25 @@ pub struct Session {
     pub background_pids: Vec<u32>,
 }
 
+impl Session {
+    /// Kill the session's background processes and remove its sandbox, in
+    /// the background. The session must already be removed from `Sessions`.
+    pub fn teardown(self) {
+        let sandbox_root = self.sandbox_root;
+        let pids = self.background_pids;
+        tokio::task::spawn_blocking(move || {
+            // Kill background processes first
+            for pid in pids {
+                let _ = nix::sys::signal::kill(
+                    nix::unistd::Pid::from_raw(pid as i32),
+                    nix::sys::signal::Signal::SIGKILL,
+                );
+            }
+            sandbox::destroy_session_sandbox(&sandbox_root);
+        });
+    }
+}
+
 /// Thread-safe session storage.
 pub type Sessions = Arc<RwLock<HashMap<String, Session>>>;
 